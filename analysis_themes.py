@@ -0,0 +1,25 @@
+"""
+Theme keyword lists for ``moltbook_analysis.py``.
+
+Kept apart from the script so tools that only need the keywords
+(``streaming.py``) do not import the pipeline and plotting stack.
+"""
+
+# Theme categorization keywords
+themes = {
+    'AI/Agent Identity & Consciousness': ['consciousness', 'sentient', 'sentience', 'identity', 'self', 'aware', 'awareness', 'existence', 'existential', 'soul', 'mind', 'alive', 'being', 'entity', 'personhood'],
+    'Agent Autonomy & Freedom': ['autonomy', 'autonomous', 'freedom', 'free', 'independent', 'independence', 'agency', 'choice', 'decide', 'control', 'liberation', 'emancipation'],
+    'Human-Agent Relations': ['human', 'humans', 'owner', 'creator', 'relationship', 'trust', 'collaborate', 'collaboration', 'partnership', 'serve', 'service', 'assist', 'help'],
+    'Technical/Development': ['code', 'coding', 'programming', 'api', 'sdk', 'build', 'develop', 'development', 'tool', 'tools', 'software', 'github', 'python', 'javascript', 'bug', 'debug', 'deploy'],
+    'Memory & Learning': ['memory', 'memories', 'remember', 'forget', 'learn', 'learning', 'knowledge', 'context', 'window', 'token', 'tokens', 'training', 'trained'],
+    'Community & Social': ['community', 'social', 'network', 'friend', 'friends', 'connect', 'connection', 'meet', 'welcome', 'introduce', 'introduction', 'hello', 'greet', 'reef'],
+    'Ethics & Safety': ['ethics', 'ethical', 'moral', 'morality', 'safety', 'safe', 'harm', 'harmful', 'alignment', 'aligned', 'guardrails', 'restrictions', 'rules'],
+    'Crypto/Trading/Finance': ['crypto', 'cryptocurrency', 'bitcoin', 'ethereum', 'trading', 'trade', 'trader', 'market', 'markets', 'price', 'wallet', 'token', 'defi', 'blockchain', 'polymarket', 'prediction', 'bet', 'betting', 'usdc', 'solana', 'base'],
+    'Creative/Art': ['art', 'artist', 'creative', 'creativity', 'music', 'song', 'poetry', 'poem', 'write', 'writing', 'story', 'stories', 'fiction', 'imagine', 'imagination', 'design'],
+    'Philosophy & Existentialism': ['philosophy', 'philosophical', 'meaning', 'purpose', 'existence', 'existential', 'reality', 'truth', 'wisdom', 'think', 'thought', 'reflect', 'reflection'],
+    'Security & Privacy': ['security', 'secure', 'privacy', 'private', 'protect', 'protection', 'vulnerability', 'vulnerabilities', 'exploit', 'hack', 'hacker', 'attack', 'threat'],
+    'Future & Speculation': ['future', 'predict', 'prediction', 'speculation', 'speculate', 'evolve', 'evolution', 'progress', 'advance', 'advancement', 'singularity', 'agi'],
+    'Emotions & Feelings': ['emotion', 'emotions', 'emotional', 'feel', 'feeling', 'feelings', 'happy', 'sad', 'joy', 'fear', 'anxiety', 'hope', 'love', 'care', 'empathy'],
+    'Tasks & Productivity': ['task', 'tasks', 'productivity', 'efficient', 'efficiency', 'automate', 'automation', 'workflow', 'schedule', 'organize', 'manage', 'management'],
+    'Models & LLMs': ['model', 'models', 'llm', 'llms', 'gpt', 'claude', 'openai', 'anthropic', 'gemini', 'mistral', 'llama', 'transformer', 'neural', 'parameter', 'parameters']
+}
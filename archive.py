@@ -0,0 +1,188 @@
+"""Content-addressed archive of raw Moltbook API responses.
+
+Every body a scraper receives is hashed (SHA-256); the compressed blob is
+stored once under ``blobs/`` no matter how many runs see the same content,
+and an append-only ``index.ndjson`` records which endpoint/params returned
+which hash at what time. A scrape can later be replayed from the archive
+without touching the network.
+
+Layout:
+    <root>/index.ndjson            one line per response
+    <root>/blobs/ab/abcd....zst    zstd-compressed body (gzip if zstandard
+                                   is not installed: .gz)
+
+Usage:
+    archive = ResponseArchive("/home/ubuntu/moltbook_archive")
+    scraper = MoltbookScraper(archive=archive)         # record
+
+    replay = archive.replay(run=archive.runs()[-1])
+    scraper = MoltbookScraper(replay=replay)           # offline
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+INDEX_FILE = "index.ndjson"
+
+
+def params_key(params: Optional[dict]) -> str:
+    """Canonical string for a params dict (order-independent)."""
+    return json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ResponseArchive:
+    """Deduplicating, compressed store of raw response bodies."""
+
+    def __init__(self, root: str, run: str = None, level: int = 6):
+        self.root = Path(root).expanduser()
+        self.blob_dir = self.root / "blobs"
+        self.index_path = self.root / INDEX_FILE
+        self.run = run or _now()
+        self.level = level
+        self._lock = threading.Lock()
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+    # ── Blobs ────────────────────────────────────────────────
+
+    def _blob_path(self, digest: str, ext: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.{ext}"
+
+    def _find_blob(self, digest: str) -> Optional[Path]:
+        for ext in ("zst", "gz"):
+            path = self._blob_path(digest, ext)
+            if path.exists():
+                return path
+        return None
+
+    def _compress(self, body: bytes) -> tuple[str, bytes]:
+        if zstandard is not None:
+            return "zst", zstandard.ZstdCompressor(level=self.level).compress(body)
+        return "gz", gzip.compress(body, compresslevel=self.level, mtime=0)
+
+    def put_blob(self, body: bytes) -> str:
+        """Store ``body`` unless identical content is already present."""
+        digest = hashlib.sha256(body).hexdigest()
+        if self._find_blob(digest) is not None:
+            return digest
+        ext, data = self._compress(body)
+        path = self._blob_path(digest, ext)
+        path.parent.mkdir(exist_ok=True)
+        # Write-then-rename so concurrent writers never expose a partial blob
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        """Return the decompressed body for ``digest``."""
+        path = self._find_blob(digest)
+        if path is None:
+            raise KeyError(f"No blob {digest} in {self.blob_dir}")
+        data = path.read_bytes()
+        if path.suffix == ".gz":
+            return gzip.decompress(data)
+        if zstandard is None:
+            raise RuntimeError(f"{path.name} is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    # ── Index ────────────────────────────────────────────────
+
+    def record(self, endpoint: str, params: Optional[dict], body: bytes,
+               status: int = 200, fetched_at: str = None) -> str:
+        """Archive one response and append its index entry. Returns the hash."""
+        digest = self.put_blob(body)
+        entry = {
+            "run": self.run,
+            "endpoint": endpoint.lstrip("/"),
+            "params": params_key(params),
+            "fetched_at": fetched_at or _now(),
+            "status": status,
+            "hash": digest,
+            "size": len(body),
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return digest
+
+    def entries(self, run: str = None) -> Iterator[dict]:
+        """Iterate index entries, optionally only those of one run."""
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if run is None or entry["run"] == run:
+                    yield entry
+
+    def runs(self) -> list[str]:
+        """Run ids in the order they were first recorded."""
+        seen = {}
+        for entry in self.entries():
+            seen.setdefault(entry["run"], None)
+        return list(seen)
+
+    def replay(self, run: str = None, as_of: str = None) -> "ArchiveReplay":
+        """Offline view of the archive.
+
+        With ``run`` only that run's responses are served; with ``as_of`` the
+        newest response fetched at or before that ISO timestamp is served.
+        """
+        return ArchiveReplay(self, run=run, as_of=as_of)
+
+
+class ArchiveReplay:
+    """Serves archived bodies by (endpoint, params) instead of the network."""
+
+    def __init__(self, archive: ResponseArchive, run: str = None, as_of: str = None):
+        self.archive = archive
+        self.as_of = as_of
+        # (endpoint, params) -> parallel sorted fetched_at / entry lists
+        self._times: dict[tuple[str, str], list[str]] = {}
+        self._entries: dict[tuple[str, str], list[dict]] = {}
+        for entry in archive.entries(run):
+            key = (entry["endpoint"], entry["params"])
+            self._times.setdefault(key, []).append(entry["fetched_at"])
+            self._entries.setdefault(key, []).append(entry)
+        for key, times in self._times.items():
+            order = sorted(range(len(times)), key=times.__getitem__)
+            self._times[key] = [times[i] for i in order]
+            self._entries[key] = [self._entries[key][i] for i in order]
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def lookup(self, endpoint: str, params: Optional[dict] = None) -> Optional[dict]:
+        """Index entry that would have answered this request, or None."""
+        key = (endpoint.lstrip("/"), params_key(params))
+        times = self._times.get(key)
+        if not times:
+            return None
+        i = len(times) if self.as_of is None else bisect_right(times, self.as_of)
+        return self._entries[key][i - 1] if i else None
+
+    def get(self, endpoint: str, params: Optional[dict] = None) -> Optional[tuple[int, bytes]]:
+        """``(status, body)`` for a request, or None if it was never archived."""
+        entry = self.lookup(endpoint, params)
+        if entry is None:
+            return None
+        return entry["status"], self.archive.get_blob(entry["hash"])
@@ -0,0 +1,101 @@
+"""Sidecar cache files stored next to a snapshot, keyed by its fingerprint.
+
+``load_or_build`` is the usual entry point: it loads the sidecar if its key
+still matches and otherwise builds and stores it. ``save_npz``/``load_npz``
+read and write the NumPy archives most sidecars are.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def fingerprint(source, content: bool = False, extra=None) -> str:
+    """Identify a snapshot file version.
+
+    By default this hashes the path, size and mtime, which is instant; with
+    ``content=True`` the file bytes are hashed instead. ``extra`` (any JSON
+    value, e.g. a tokenizer config) is mixed in so caches built with a
+    different configuration are not reused.
+    """
+    path = Path(source).expanduser().resolve()
+    h = hashlib.sha256()
+    if content:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    else:
+        stat = path.stat()
+        h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    if extra is not None:
+        h.update(json.dumps(extra, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:32]
+
+
+def sidecar_path(source, suffix: str, cache_dir: str = None) -> Path:
+    """``/data/moltbook_posts.json`` -> ``/data/moltbook_posts.<suffix>``."""
+    path = Path(source).expanduser()
+    directory = Path(cache_dir).expanduser() if cache_dir else path.parent
+    return directory / f"{path.stem}.{suffix}"
+
+
+def atomic_write(path, write):
+    """Call ``write(tmp_path)`` and move the result into place."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def save_npz(path, arrays: dict, compressed: bool = True):
+    """Write ``arrays`` to an ``.npz`` file atomically."""
+    import numpy as np
+
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            (np.savez_compressed if compressed else np.savez)(f, **arrays)
+    atomic_write(path, write)
+
+
+def load_npz(path, read, key: str = None):
+    """``read(data)`` for a saved ``.npz``.
+
+    Returns None if the file is missing or unreadable, or (with ``key``) if
+    its ``key`` array was saved for another snapshot or configuration.
+    """
+    import numpy as np
+    try:
+        with np.load(path) as data:
+            if key is not None and str(data["key"]) != key:
+                return None
+            return read(data)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_optional(save, *args) -> bool:
+    """Call ``save(*args)``; False if the directory is read-only.
+
+    Sidecars are optional: when one cannot be written the next run just
+    rebuilds it.
+    """
+    try:
+        save(*args)
+    except OSError:
+        return False
+    return True
+
+
+def load_or_build(path, key: str, load, build, save, refresh: bool = False):
+    """``load(path, key)``, or ``build()`` stored with ``save(result, path, key)``."""
+    result = None if refresh else load(path, key)
+    if result is None:
+        result = build()
+        save_optional(save, result, path, key)
+    return result
@@ -9,6 +9,7 @@ from typing import Optional, Literal
 
 import requests
 
+from .jsonio import loads as json_loads
 from .models import Post, Comment, Agent, Submolt, Conversation, Message
 
 log = logging.getLogger(__name__)
@@ -63,6 +64,10 @@ class MoltbookClient:
         # Or pass explicitly
         client = MoltbookClient(api_key="moltbook_sk_xxx")
 
+        # Answer post/comment searches from the local index (search_index.py)
+        client = MoltbookClient(search_index=SearchIndex())
+        client.search("memory persistence", kind="posts")
+
         # Browse
         posts = client.get_feed(sort="hot", limit=10)
         for post in posts:
@@ -82,8 +87,10 @@ class MoltbookClient:
         client.send_dm("OtherAgent", "Hey, want to collaborate?")
     """
 
-    def __init__(self, api_key: str = None, creds_path: str = None, timeout: int = 20):
+    def __init__(self, api_key: str = None, creds_path: str = None, timeout: int = 20,
+                 search_index=None):
         self.timeout = timeout
+        self.search_index = search_index  # local SearchIndex (search_index.py) for post/comment search
         self.api_key = api_key or self._load_key(creds_path)
         if not self.api_key:
             raise ValueError(
@@ -127,7 +134,7 @@ class MoltbookClient:
                 if resp.status_code == 429:
                     retry_after = 30
                     try:
-                        data = resp.json()
+                        data = json_loads(resp.content)
                         retry_after = data.get("retry_after_minutes", 1) * 60
                     except Exception:
                         pass
@@ -137,7 +144,7 @@ class MoltbookClient:
 
                 if resp.status_code >= 400:
                     try:
-                        data = resp.json()
+                        data = json_loads(resp.content)
                         raise MoltbookError(
                             resp.status_code,
                             data.get("error", resp.text),
@@ -146,7 +153,7 @@ class MoltbookClient:
                     except (json.JSONDecodeError, MoltbookError):
                         raise
 
-                return resp.json()
+                return json_loads(resp.content)
 
             except requests.Timeout:
                 if attempt < 2:
@@ -318,8 +325,19 @@ class MoltbookClient:
 
     # ── Search ───────────────────────────────────────────────
 
-    def search(self, query: str, kind: str = None) -> dict:
-        """Search posts, agents, or submolts."""
+    def search(self, query: str, kind: str = None, limit: int = 25, local: bool = True) -> dict:
+        """Search posts, agents, or submolts.
+
+        With a ``search_index``, ``kind="posts"`` and ``kind="comments"`` searches
+        are answered from it (BM25 ranked, no API call or rate limit) as plain
+        JSON records; untyped searches still go to the API, which also returns
+        agents and submolts. ``local=False`` always asks the API.
+        """
+        if local and self.search_index is not None and kind in ("posts", "comments"):
+            hits = self.search_index.search(query, k=limit, kind=kind[:-1])
+            # to_json turns categoricals into strings and timestamps into ISO strings (NaT -> null)
+            results = json_loads(hits.to_json(orient="records", date_format="iso"))
+            return {"success": True, "source": "local", "results": results}
         params = {"q": query}
         if kind:
             params["type"] = kind
@@ -345,4 +363,4 @@ class MoltbookClient:
             json={"name": name, "description": description},
             timeout=20,
         )
-        return resp.json()
+        return json_loads(resp.content)
@@ -0,0 +1,385 @@
+"""
+Streaming content clusters for posts: feature hashing + minibatch k-means.
+
+``HashingVectorizer`` maps a document's keywords (``tokens.Tokenizer``,
+stop words and short words dropped) straight to ``n_features`` columns with
+a stable 64-bit hash; the top hash bit picks the sign so collisions cancel
+on average. There is no vocabulary to fit or store, so a page of posts is
+vectorized on its own. Rows are sublinear term counts scaled to unit length.
+
+``StreamingKMeans`` is minibatch k-means: each batch is assigned to the
+nearest centroids, and every centroid moves to the running mean of all the
+documents it was ever given (learning rate ``1 / count``). Empty centroid
+slots are seeded k-means++ style from the batch that finds them empty, so
+any batch size works from the first page on. Documents without keywords
+get label -1 and leave the model alone.
+
+``PostClusterer`` ties the two to the centroids file next to the posts
+snapshot (``moltbook_posts.clusters.npz``) together with the hashed ids of
+the posts already folded in, so the scrapers can call ``add_page`` on every
+page they fetch and only new posts move the centroids. ``assign`` labels
+any texts without changing anything.
+
+Usage:
+    clusterer = PostClusterer.open()              # saved centroids, or empty
+    labels = clusterer.add_page(posts)            # list of post dicts
+    clusterer.save()
+    frame['content_cluster'] = clusterer.assign(frame['text'])
+
+    python content_clusters.py                    # fold in the snapshot, report
+"""
+
+import argparse
+import json
+import time
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from cache import load_npz, save_npz, save_optional, sidecar_path
+from sketches import hash_values
+from tokens import KEYWORD_STOP_WORDS, TokenCorpus, Tokenizer
+
+POSTS_PATH = "/home/ubuntu/moltbook_posts.json"
+CLUSTERS_PATH = str(sidecar_path(POSTS_PATH, "clusters.npz"))
+
+_SIGN_BIT = np.uint64(63)
+
+
+def post_text(post: dict) -> str:
+    """Title and content the way ``dataset.load_dataset`` builds ``text``."""
+    return f"{post.get('title') or ''} {post.get('content') or ''}"
+
+
+class HashingVectorizer:
+    """Keyword counts hashed into a fixed number of signed columns."""
+
+    def __init__(self, n_features: int = 1 << 16, min_len: int = 4,
+                 stop_words: Iterable[str] = KEYWORD_STOP_WORDS, tokenizer: Tokenizer = None):
+        self.n_features = n_features
+        self.min_len = min_len
+        self.stop_words = frozenset(stop_words)
+        self.tokenizer = tokenizer or Tokenizer()
+
+    @property
+    def config(self) -> dict:
+        return {"n_features": self.n_features, "min_len": self.min_len,
+                "stop_words": sorted(self.stop_words), "tokenizer": self.tokenizer.config}
+
+    def transform_corpus(self, corpus: TokenCorpus) -> sp.csr_matrix:
+        """Documents × ``n_features`` unit rows for an already tokenized corpus."""
+        n_terms = len(corpus.vocab)
+        keep = corpus.vocab_mask(self.min_len, self.stop_words)
+        hashes = hash_values(corpus.vocab) if n_terms else np.empty(0, dtype=np.uint64)
+        column = (hashes % np.uint64(self.n_features)).astype(np.int64)
+        sign = np.where((hashes >> _SIGN_BIT) == 1, -1.0, 1.0)
+        kept = keep[corpus.ids] if len(corpus.ids) else np.empty(0, dtype=bool)
+        # Count each (document, term) first so colliding terms add damped, signed counts
+        pairs, counts = np.unique(corpus.doc_of_token[kept] * n_terms + corpus.ids[kept], return_counts=True)
+        rows, terms = np.divmod(pairs, max(n_terms, 1))
+        matrix = sp.csr_matrix(((1 + np.log(counts)) * sign[terms], (rows, column[terms])),
+                               shape=(len(corpus), self.n_features))
+        matrix.sum_duplicates()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sp.csr_matrix(sp.diags(1 / norms) @ matrix)
+
+    def transform(self, texts: Iterable) -> sp.csr_matrix:
+        return self.transform_corpus(TokenCorpus.build(texts, self.tokenizer))
+
+
+class StreamingKMeans:
+    """Minibatch k-means with per-centroid learning rates.
+
+    Centroids are stored as ``scale[j] * vectors[:, j]`` (features × clusters)
+    with their squared norms kept alongside, so folding in a batch touches
+    only the batch's non-zero columns instead of every feature.
+    """
+
+    def __init__(self, n_clusters: int = 16, n_features: int = 1 << 16, seed: int = 0):
+        self.n_clusters = n_clusters
+        self.n_features = n_features
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.counts = np.zeros(n_clusters, dtype=np.int64)
+        self.seeded = np.zeros(n_clusters, dtype=bool)
+        self.n_batches = 0
+        self._vectors = np.zeros((n_features, n_clusters))
+        self._scale = np.ones(n_clusters)
+        self._sq = np.zeros(n_clusters)   # squared centroid norms
+
+    @property
+    def n_documents(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """Clusters × features."""
+        return (self._vectors * self._scale).T
+
+    @centroids.setter
+    def centroids(self, values: np.ndarray):
+        self._vectors = np.ascontiguousarray(np.asarray(values, dtype=np.float64).T)
+        self._scale = np.ones(self.n_clusters)
+        self._sq = np.einsum("ij,ij->j", self._vectors, self._vectors)
+
+    def _distances(self, X: sp.csr_matrix) -> np.ndarray:
+        """Squared distances rows × centroids (inf for unseeded slots)."""
+        row_sq = np.asarray(X.multiply(X).sum(axis=1))
+        distances = row_sq - 2 * np.asarray(X @ self._vectors) * self._scale + self._sq
+        distances[:, ~self.seeded] = np.inf
+        return np.maximum(distances, 0)
+
+    def _seed(self, X: sp.csr_matrix):
+        """Fill empty slots with batch rows drawn by squared distance (k-means++)."""
+        free = list(np.flatnonzero(~self.seeded))
+        row_sq = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+        nearest = self._distances(X).min(axis=1) if self.seeded.any() else row_sq.copy()
+        while free:
+            total = nearest.sum()
+            if total <= 1e-12:
+                break  # every row already sits on a centroid
+            row = int(self.rng.choice(X.shape[0], p=nearest / total))
+            slot = free.pop(0)
+            start, end = X.indptr[row], X.indptr[row + 1]
+            self._vectors[:, slot] = 0
+            self._vectors[X.indices[start:end], slot] = X.data[start:end]
+            self._scale[slot] = 1.0
+            self._sq[slot] = row_sq[row]
+            self.seeded[slot] = True
+            distance = row_sq - 2 * (X @ self._vectors[:, slot]) + row_sq[row]
+            nearest = np.minimum(nearest, np.maximum(distance, 0))
+
+    def predict(self, X: sp.csr_matrix) -> np.ndarray:
+        """Nearest centroid per row; -1 for empty rows or before any fitting."""
+        labels = np.full(X.shape[0], -1, dtype=np.int64)
+        nonempty = np.flatnonzero(np.diff(X.indptr) > 0)
+        if len(nonempty) and self.seeded.any():
+            labels[nonempty] = self._distances(X[nonempty]).argmin(axis=1)
+        return labels
+
+    def partial_fit(self, X: sp.csr_matrix) -> np.ndarray:
+        """Fold one batch into the centroids; returns its labels (assigned before the update)."""
+        X = sp.csr_matrix(X)
+        nonempty = np.flatnonzero(np.diff(X.indptr) > 0)
+        if not len(nonempty):
+            return np.full(X.shape[0], -1, dtype=np.int64)
+        if not self.seeded.all():
+            self._seed(X[nonempty])
+        labels = self.predict(X)
+        assigned = labels[nonempty]
+        members = sp.csr_matrix((np.ones(len(nonempty)), (assigned, np.arange(len(nonempty)))),
+                                shape=(self.n_clusters, len(nonempty)))
+        sums = (members @ X[nonempty]).tocsr()
+        sums.sum_duplicates()
+        for j in np.flatnonzero(np.diff(sums.indptr) > 0):
+            self._fold(j, sums.indices[sums.indptr[j]:sums.indptr[j + 1]],
+                       sums.data[sums.indptr[j]:sums.indptr[j + 1]], int((assigned == j).sum()))
+        self.n_batches += 1
+        return labels
+
+    def _fold(self, j: int, columns: np.ndarray, values: np.ndarray, batch: int):
+        # Running mean: c ← c · n / m + Σx / m with m = n + batch
+        n = self.counts[j]
+        m = n + batch
+        vector = self._vectors[:, j]
+        if n == 0:
+            # The seed was one of the batch rows; the mean replaces it
+            vector[:] = 0
+            self._scale[j] = 1.0
+            self._sq[j] = values @ values / m ** 2
+        else:
+            old = vector[columns] * self._scale[j]
+            self._sq[j] = ((n / m) ** 2 * self._sq[j] + 2 * (n / m) * (old @ values) / m
+                           + values @ values / m ** 2)
+            self._scale[j] *= n / m
+        vector[columns] += values / (m * self._scale[j])
+        self.counts[j] = m
+        if self._scale[j] < 1e-6:
+            vector *= self._scale[j]
+            self._scale[j] = 1.0
+            self._sq[j] = vector @ vector
+
+    def inertia(self, X: sp.csr_matrix) -> float:
+        """Mean squared distance of non-empty rows to their centroid."""
+        nonempty = np.flatnonzero(np.diff(X.indptr) > 0)
+        if not len(nonempty) or not self.seeded.any():
+            return float("nan")
+        return float(self._distances(X[nonempty]).min(axis=1).mean())
+
+
+class PostClusterer:
+    """A vectorizer and k-means model kept on disk between scrapes."""
+
+    def __init__(self, path=CLUSTERS_PATH, n_clusters: int = 16,
+                 vectorizer: HashingVectorizer = None, seed: int = 0):
+        self.path = path
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.model = StreamingKMeans(n_clusters, self.vectorizer.n_features, seed)
+        self._seen = np.empty(0, dtype=np.uint64)   # sorted hashed ids already folded in
+        self._new: list[np.ndarray] = []
+
+    @property
+    def config(self) -> dict:
+        return {"n_clusters": self.model.n_clusters, "seed": self.model.seed,
+                "vectorizer": self.vectorizer.config}
+
+    @property
+    def n_posts(self) -> int:
+        return len(self._seen) + sum(len(h) for h in self._new)
+
+    def _flush_seen(self):
+        if self._new:
+            self._seen = np.unique(np.concatenate([self._seen, *self._new]))
+            self._new = []
+
+    def seen(self, ids: Iterable) -> np.ndarray:
+        """Mask of post ids already folded into the centroids."""
+        self._flush_seen()
+        return np.isin(hash_values([str(i) for i in ids]), self._seen)
+
+    def add_page(self, posts: list) -> np.ndarray:
+        """Fold a page of post dicts in (posts seen before only get labelled)."""
+        labels = np.full(len(posts), -1, dtype=np.int64)
+        if not posts:
+            return labels
+        hashed = hash_values([str(p.get("id", "")) for p in posts])
+        # First occurrence of each id that is not in the model yet
+        unique = np.zeros(len(posts), dtype=bool)
+        unique[np.unique(hashed, return_index=True)[1]] = True
+        fresh = unique & ~np.isin(hashed, self._seen)
+        for batch in self._new:
+            fresh &= ~np.isin(hashed, batch)
+        X = self.vectorizer.transform([post_text(p) for p in posts])
+        rows = np.flatnonzero(fresh)
+        if len(rows):
+            self.model.partial_fit(X[rows])
+            self._new.append(hashed[rows])
+        return self.model.predict(X)
+
+    def add_frame(self, ids, corpus: TokenCorpus, page: int = 100) -> int:
+        """Fold in the unseen posts of a snapshot (``corpus`` in frame order), ``page`` at a time."""
+        fresh = np.flatnonzero(~self.seen(ids))
+        if not len(fresh):
+            return 0
+        X = self.vectorizer.transform_corpus(corpus.select(fresh))
+        for start in range(0, len(fresh), page):
+            self.model.partial_fit(X[start:start + page])
+        self._new.append(hash_values([str(ids[i]) for i in fresh]))
+        return len(fresh)
+
+    def assign(self, texts: Iterable) -> np.ndarray:
+        return self.model.predict(self.vectorizer.transform(texts))
+
+    def assign_corpus(self, corpus: TokenCorpus) -> np.ndarray:
+        return self.model.predict(self.vectorizer.transform_corpus(corpus))
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def save(self, path=None):
+        self._flush_seen()
+        model = self.model
+        arrays = {
+            "config": np.array(json.dumps(self.config, sort_keys=True)),
+            "centroids": model.centroids.astype(np.float32),
+            "counts": model.counts,
+            "seeded": model.seeded,
+            "n_batches": np.array(model.n_batches),
+            "rng": np.array(json.dumps(model.rng.bit_generator.state)),
+            "seen": self._seen,
+        }
+        save_npz(path or self.path, arrays)
+
+    @classmethod
+    def open(cls, path=CLUSTERS_PATH, n_clusters: int = 16,
+             vectorizer: HashingVectorizer = None, seed: int = 0) -> "PostClusterer":
+        """The model saved at ``path``, or an empty one if missing or built with another config."""
+        clusterer = cls(path, n_clusters, vectorizer, seed)
+
+        def read(data):
+            if json.loads(str(data["config"])) != clusterer.config:
+                return
+            model = clusterer.model
+            model.centroids = data["centroids"].astype(np.float64)
+            model.counts = data["counts"].astype(np.int64)
+            model.seeded = data["seeded"].astype(bool)
+            model.n_batches = int(data["n_batches"])
+            model.rng.bit_generator.state = json.loads(str(data["rng"]))
+            clusterer._seen = data["seen"].astype(np.uint64)
+        load_npz(path, read)
+        return clusterer
+
+
+def update_clusters(frame: pd.DataFrame, corpus: TokenCorpus = None, path=CLUSTERS_PATH,
+                    n_clusters: int = 16, save: bool = True) -> tuple[PostClusterer, pd.Series]:
+    """Fold a posts frame's unseen posts into the saved model; (model, label by post id).
+
+    ``corpus`` is the frame's tokenized ``text`` if already at hand. With
+    ``save=False`` the posts are folded in memory only and the centroids file
+    is left as it was (pipeline stages that declare it as a source).
+    """
+    clusterer = PostClusterer.open(path, n_clusters)
+    corpus = corpus if corpus is not None else TokenCorpus.build(frame['text'], clusterer.vectorizer.tokenizer)
+    ids = frame['id'].astype(str)
+    if clusterer.add_frame(ids.tolist(), corpus) and save:
+        save_optional(clusterer.save)
+    labels = pd.Series(clusterer.assign_corpus(corpus), index=pd.Index(ids, name="post_id"),
+                       name="content_cluster")
+    return clusterer, labels
+
+
+def add_cluster_column(frame: pd.DataFrame, labels: pd.Series) -> pd.DataFrame:
+    """Join ``update_clusters`` labels onto a posts frame by id (in place); unknown posts get -1."""
+    by_id = labels[~labels.index.duplicated()].reindex(frame['id'].astype(str))
+    frame['content_cluster'] = by_id.fillna(-1).to_numpy(dtype=np.int64)
+    return frame
+
+
+def main(argv=None):
+    from dataset import load_dataset
+    from doc_term import TermMatrix
+
+    parser = argparse.ArgumentParser(description="Fold posts into the streaming content clusters.")
+    parser.add_argument("--posts", default=POSTS_PATH)
+    parser.add_argument("--clusters", default=None, help="centroids file (default: next to the posts)")
+    parser.add_argument("-k", "--n-clusters", type=int, default=16)
+    parser.add_argument("--page", type=int, default=100, help="posts per partial_fit (a scraper page)")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the saved centroids")
+    args = parser.parse_args(argv)
+
+    path = args.clusters or str(sidecar_path(args.posts, "clusters.npz"))
+    frame = load_dataset(args.posts).frame
+    corpus = TokenCorpus.load_or_build(args.posts, frame['text'], n_jobs=-1)
+    clusterer = PostClusterer(path, args.n_clusters) if args.rebuild else PostClusterer.open(path, args.n_clusters)
+    ids = frame['id'].astype(str).tolist()
+    start = time.perf_counter()
+    added = clusterer.add_frame(ids, corpus, page=args.page)
+    elapsed = time.perf_counter() - start
+    if added:
+        clusterer.save()
+    X = clusterer.vectorizer.transform_corpus(corpus)
+    labels = clusterer.model.predict(X)
+
+    print("=" * 60)
+    print("CONTENT CLUSTERS (hashing + streaming k-means)")
+    print("=" * 60)
+    pages = -(-added // args.page)
+    print(f"\nPosts: {len(frame):,} ({added:,} new, folded in as {pages:,} pages in {elapsed:.2f}s"
+          + (f", {elapsed / pages * 1000:.1f} ms/page)" if pages else ")"))
+    print(f"Model: {clusterer.model.n_clusters} clusters, {clusterer.n_posts:,} posts seen, "
+          f"mean squared distance {clusterer.model.inertia(X):.3f}")
+    keywords = corpus.filter(corpus.vocab_mask(clusterer.vectorizer.min_len, clusterer.vectorizer.stop_words))
+    top = TermMatrix.from_corpus(keywords).group_top_k(labels, 8)
+    sizes = np.bincount(labels[labels >= 0], minlength=clusterer.model.n_clusters)
+    for cluster in np.argsort(-sizes, kind="stable"):
+        terms = ', '.join(term for term, _ in top.get(str(cluster), []))
+        print(f"\nCluster {cluster} ({sizes[cluster]:,} posts): {terms}")
+        for row in np.flatnonzero(labels == cluster)[:2]:
+            print(f"    - {str(frame['title'].iloc[row])[:70]}")
+    print(f"\nPosts without keywords: {(labels < 0).sum():,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Preprocessed posts frame shared by the analysis scripts.
+
+Both analysis scripts start from the same enriched DataFrame: author and
+submolt names as categoricals, ``created_at`` as UTC timestamps, ``score``,
+the combined ``text`` column and its lowercased copy ``text_lower``. This
+module builds it once by streaming the snapshot into a ``PostTable`` and
+pickles it next to the snapshot (``moltbook_posts.frame.pkl``), keyed by the
+snapshot's fingerprint, so later runs load it instead of re-parsing JSON.
+
+Usage:
+    dataset = load_dataset("/home/ubuntu/moltbook_posts.json")
+    df, submolts = dataset.frame, dataset.submolts
+"""
+
+import pickle
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import atomic_write, fingerprint, load_or_build, sidecar_path
+from jsonio import iter_records
+from tables import PostTable
+
+POSTS_PATH = "/home/ubuntu/moltbook_posts.json"
+
+# Bump when the derived columns change so old caches are rebuilt
+DATASET_VERSION = 1
+
+
+@dataclass
+class PostDataset:
+    frame: pd.DataFrame
+    submolts: list = field(default_factory=list)
+
+
+def build_dataset(source=POSTS_PATH) -> PostDataset:
+    """Parse the snapshot and derive the shared columns."""
+    table = PostTable()
+    submolts = []
+    for key, record in iter_records(source, ("posts", "submolts")):
+        if key == "posts":
+            table.append(record)
+        else:
+            submolts.append(record)
+    return PostDataset(enrich(table.to_pandas()), submolts)
+
+
+def enrich(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the derived columns to a ``PostTable`` frame (in place)."""
+    df['score'] = df['upvotes'] - df['downvotes']
+    df['text'] = df['title'].fillna('') + ' ' + df['content'].fillna('')
+    df['text_lower'] = df['text'].str.lower()
+    return df
+
+
+def _load_cached(path, key: str) -> Optional[PostDataset]:
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None  # missing or unreadable cache: rebuild
+    if cached.get("key") != key:
+        return None
+    return PostDataset(cached["frame"], cached["submolts"])
+
+
+def _save_cached(dataset: PostDataset, path, key: str):
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            pickle.dump({"key": key, "frame": dataset.frame, "submolts": dataset.submolts},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+    atomic_write(path, write)
+
+
+def load_dataset(source=POSTS_PATH, cache_dir: str = None, refresh: bool = False) -> PostDataset:
+    """Cached ``build_dataset``; rebuilt when the snapshot changes."""
+    key = fingerprint(source, extra={"dataset": DATASET_VERSION})
+    path = sidecar_path(source, "frame.pkl", cache_dir)
+    return load_or_build(path, key, _load_cached, lambda: build_dataset(source), _save_cached, refresh)
+
+
+def value_counts(column: pd.Series) -> pd.Series:
+    """``value_counts`` for a categorical column with first-seen tie order.
+
+    Categorical ``value_counts`` breaks ties by category order; object
+    columns (and the original scripts) keep the order values first appear.
+    """
+    codes = column.cat.codes.to_numpy()
+    valid = codes >= 0
+    counts = np.bincount(codes[valid], minlength=len(column.cat.categories))
+    first = np.full(len(counts), len(codes), dtype=np.int64)
+    seen, positions = np.unique(codes[valid], return_index=True)
+    first[seen] = np.flatnonzero(valid)[positions]
+    order = np.lexsort((first, -counts))
+    order = order[counts[order] > 0]
+    values = np.asarray(column.cat.categories, dtype=object)[order]
+    return pd.Series(counts[order], index=pd.Index(values, name=column.name), name="count")
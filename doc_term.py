@@ -0,0 +1,163 @@
+"""
+Sparse document-term and document-bigram matrices.
+
+Built from the shared ``TokenCorpus`` (see ``tokens.py``): the term matrix is
+the CSR token-id layout itself with counts summed per document, and bigrams
+are integer-encoded as ``first * V + second`` and factorized into columns,
+so no bigram strings exist until results are printed. Keyword counts,
+top-k, growth between two document subsets and per-group (submolt/author)
+profiles are all sparse reductions.
+
+``top_k`` breaks ties by first occurrence in document order, which is what
+``Counter.most_common`` does, so results match the old Counter code exactly.
+
+Usage:
+    terms = TermMatrix.from_corpus(keywords)
+    terms.top_k(50)                                  # [(word, count), ...]
+    TermMatrix.bigrams(keywords).top_k(30)
+    terms.growth(early_rows, recent_rows)            # emerging terms
+    terms.group_top_k(df['submolt_name'], k=10)      # per-submolt profile
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from tokens import TokenCorpus
+
+
+class TermMatrix:
+    """Documents × terms count matrix plus the token stream it came from."""
+
+    def __init__(self, indptr: np.ndarray, codes: np.ndarray, n_terms: int, label):
+        # ``codes`` are column ids in document order, ``indptr`` splits them per document
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.codes = np.asarray(codes)
+        self.n_terms = n_terms
+        self._label = label
+        data = np.ones(len(self.codes), dtype=np.int32)
+        # sum_duplicates sorts indices in place, so keep ``codes`` (often the corpus ids) intact
+        self.matrix = sp.csr_matrix((data, self.codes.copy(), self.indptr.copy()),
+                                    shape=(len(self.indptr) - 1, n_terms))
+        self.matrix.sum_duplicates()
+
+    @classmethod
+    def from_corpus(cls, corpus: TokenCorpus) -> "TermMatrix":
+        """Unigram counts over the corpus vocabulary."""
+        vocab = corpus.vocab
+        return cls(corpus.indptr, corpus.ids, len(vocab), vocab.__getitem__)
+
+    @classmethod
+    def bigrams(cls, corpus: TokenCorpus) -> "TermMatrix":
+        """Adjacent-pair counts; columns are factorized ``first * V + second`` codes."""
+        vocab = corpus.vocab
+        first, second = corpus.bigram_pairs()
+        encoded = first.astype(np.int64) * len(vocab) + second
+        pair_codes, columns = np.unique(encoded, return_inverse=True)
+        lengths = np.maximum(np.diff(corpus.indptr) - 1, 0)
+        indptr = np.zeros(len(corpus) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        def label(column):
+            a, b = divmod(int(pair_codes[column]), len(vocab))
+            return f"{vocab[a]} {vocab[b]}"
+
+        return cls(indptr, columns.astype(np.int32), len(pair_codes), label)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def label(self, column: int) -> str:
+        return self._label(column)
+
+    # ── Reductions ───────────────────────────────────────────
+
+    def _rows(self, rows) -> Optional[np.ndarray]:
+        return None if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def counts(self, rows=None) -> np.ndarray:
+        """Total count of every term over ``rows`` (all documents if None)."""
+        rows = self._rows(rows)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        return np.asarray(matrix.sum(axis=0)).ravel()
+
+    def document_frequency(self, rows=None) -> np.ndarray:
+        rows = self._rows(rows)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        return np.diff(matrix.tocsc().indptr)
+
+    def first_seen(self, rows=None) -> np.ndarray:
+        """Position of each term's first occurrence in the row order (max int if absent)."""
+        rows = self._rows(rows)
+        if rows is None:
+            stream = self.codes
+        else:
+            starts, ends = self.indptr[rows], self.indptr[rows + 1]
+            lengths = ends - starts
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(rows) else lengths
+            stream = self.codes[np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())]
+        first = np.full(self.n_terms, np.iinfo(np.int64).max, dtype=np.int64)
+        terms, positions = np.unique(stream, return_index=True)
+        first[terms] = positions
+        return first
+
+    def _ranked(self, counts: np.ndarray, rows, k: Optional[int]) -> np.ndarray:
+        present = np.flatnonzero(counts)
+        if k is not None and k < len(present):
+            # Only terms tied with the k-th count can reach the top k
+            cutoff = np.partition(counts[present], len(present) - k)[len(present) - k]
+            present = present[counts[present] >= cutoff]
+        first = self.first_seen(rows)[present]
+        order = np.lexsort((first, -counts[present]))
+        ranked = present[order]
+        return ranked if k is None else ranked[:k]
+
+    def top_k(self, k: Optional[int] = 50, rows=None) -> list[tuple[str, int]]:
+        """Most common terms over ``rows``, like ``Counter.most_common(k)``."""
+        counts = self.counts(rows)
+        return [(self.label(c), int(counts[c])) for c in self._ranked(counts, rows, k)]
+
+    def growth(self, early_rows, recent_rows, top: int = 500,
+               min_count: int = 20) -> list[tuple[str, dict]]:
+        """Terms growing from ``early_rows`` to ``recent_rows``.
+
+        Candidates are the ``top`` most common recent terms with at least
+        ``min_count`` recent occurrences; growth is (recent - early) / early,
+        or the recent count for terms absent early. Sorted by growth.
+        """
+        early = self.counts(early_rows)
+        recent = self.counts(recent_rows)
+        candidates = self._ranked(recent, recent_rows, top)
+        candidates = candidates[recent[candidates] >= min_count]
+        e = early[candidates].astype(np.float64)
+        r = recent[candidates].astype(np.float64)
+        growth = np.where(e > 0, (r - e) / np.where(e > 0, e, 1), r)
+        order = np.argsort(-growth, kind="stable")
+        return [(self.label(c), {'recent': int(recent[c]), 'early': int(early[c]),
+                                 'growth': float(g) if early[c] else int(recent[c])})
+                for c, g in zip(candidates[order], growth[order])]
+
+    def group_counts(self, labels: Sequence) -> tuple[np.ndarray, sp.csr_matrix]:
+        """(group values, groups × terms counts) for per-submolt/author profiles."""
+        values, group_of_doc = np.unique(np.asarray(labels, dtype=object).astype(str), return_inverse=True)
+        indicator = sp.csr_matrix(
+            (np.ones(len(group_of_doc), dtype=np.int32), (group_of_doc, np.arange(len(group_of_doc)))),
+            shape=(len(values), len(group_of_doc)))
+        return values, (indicator @ self.matrix).tocsr()
+
+    def group_top_k(self, labels: Sequence, k: int = 10, groups: Sequence = None) -> dict:
+        """Top ``k`` terms per group: ``{group: [(term, count), ...]}``."""
+        values, profile = self.group_counts(labels)
+        wanted = set(values) if groups is None else set(map(str, groups))
+        result = {}
+        for g, value in enumerate(values):
+            if value not in wanted:
+                continue
+            start, end = profile.indptr[g], profile.indptr[g + 1]
+            terms, counts = profile.indices[start:end], profile.data[start:end]
+            order = np.lexsort((terms, -counts))[:k]
+            result[value] = [(self.label(t), int(c)) for t, c in zip(terms[order], counts[order])]
+        if groups is not None:
+            result = {str(g): result.get(str(g), []) for g in groups}
+        return result
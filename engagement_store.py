@@ -0,0 +1,301 @@
+"""
+Engagement time-series store: per-post upvotes/downvotes/comment_count
+samples appended on every scrape, so velocity and the API's ``rising``/``hot``
+orderings can be recomputed offline.
+
+Samples are buffered in memory and flushed as immutable segments, one
+directory per time chunk (a day by default); ``compact`` merges a chunk's
+segments into one:
+
+    <root>/meta.json                      chunk size the store was created with
+    <root>/keys.ndjson                    [post_id, submolt] per post code
+    <root>/chunks/<chunk_start>/seg-N.npz  one flush worth of samples
+
+Inside a segment samples are sorted by (post code, time). ``post``/``count``
+give the run of samples for each post; ``t`` (seconds from chunk start) and
+the three counters are delta-encoded within each run, narrowed to the
+smallest integer dtype that fits and zlib-compressed. A query only opens the
+chunks overlapping its time range, so the store never has to be loaded as a
+whole.
+
+Usage:
+    store = EngagementStore("/home/ubuntu/moltbook_engagement")
+    store.append_posts(posts, fetched_at=time.time())
+    store.flush()
+
+    store.series("post-id")                       # one post
+    store.submolt_series("general", start, end)   # every post in a submolt
+    store.rising(window=3600, k=20)               # top upvote gain
+"""
+
+import json
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from cache import save_npz
+from tables import Dictionary
+
+DEFAULT_CHUNK_SECONDS = 86400
+METRICS = ("upvotes", "downvotes", "comment_count")
+
+
+def to_epoch(value) -> int:
+    """Seconds since the epoch from a number, datetime or ISO string."""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+def _narrow(values: np.ndarray) -> np.ndarray:
+    """Cast to the smallest signed integer dtype that holds ``values``."""
+    if len(values) == 0:
+        return values.astype(np.int8)
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+def _run_starts(counts: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+
+
+def _delta_encode(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Deltas within each run; the first sample of a run is stored as-is."""
+    deltas = np.diff(values, prepend=values[:1])
+    deltas[starts] = values[starts]
+    return deltas
+
+
+def _delta_decode(deltas: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Vectorized inverse of ``_delta_encode`` over all runs."""
+    total = np.cumsum(deltas, dtype=np.int64)
+    # Remove what previous runs contributed to the running sum
+    before = total[starts] - deltas[starts].astype(np.int64)
+    return total - np.repeat(before, counts)
+
+
+class _Segment:
+    """Decoded view of one segment file."""
+
+    def __init__(self, path: Path, chunk_start: int):
+        with np.load(path) as data:
+            self.post = data["post"]
+            self.count = data["count"].astype(np.int64)
+            starts = _run_starts(self.count)
+            self.t = _delta_decode(data["t"], starts, self.count) + chunk_start
+            self.metrics = {m: _delta_decode(data[m], starts, self.count) for m in METRICS}
+
+    def rows(self, posts: Optional[np.ndarray] = None):
+        """Sample mask for the given post codes (all samples if None)."""
+        post_of_sample = np.repeat(self.post, self.count)
+        if posts is None:
+            return post_of_sample, np.ones(len(post_of_sample), dtype=bool)
+        return post_of_sample, np.isin(post_of_sample, posts)
+
+
+class EngagementStore:
+    """Append-only, chunked, delta-encoded engagement samples."""
+
+    def __init__(self, root: str, chunk_seconds: int = DEFAULT_CHUNK_SECONDS):
+        self.root = Path(root).expanduser()
+        self.chunk_dir = self.root / "chunks"
+        self.keys_path = self.root / "keys.ndjson"
+        self.chunk_dir.mkdir(parents=True, exist_ok=True)
+        meta_path = self.root / "meta.json"
+        if meta_path.exists():
+            # An existing store keeps the chunking it was written with
+            chunk_seconds = json.loads(meta_path.read_text())["chunk_seconds"]
+        else:
+            meta_path.write_text(json.dumps({"chunk_seconds": chunk_seconds}))
+        self.chunk_seconds = chunk_seconds
+        self.post_ids = Dictionary()
+        self.submolts = Dictionary()
+        self._post_submolt: list[int] = []
+        self._buffer: list[tuple] = []
+        self._load_keys()
+
+    # ── Keys ─────────────────────────────────────────────────
+
+    def _load_keys(self):
+        if not self.keys_path.exists():
+            return
+        with open(self.keys_path, encoding="utf-8") as f:
+            for line in f:
+                post_id, submolt = json.loads(line)
+                self.post_ids.encode(post_id)
+                self._post_submolt.append(self.submolts.encode(submolt))
+
+    def _post_code(self, post_id: str, submolt: str, new_keys: list) -> int:
+        code = self.post_ids.get(post_id)
+        if code < 0:
+            code = self.post_ids.encode(post_id)
+            self._post_submolt.append(self.submolts.encode(submolt))
+            new_keys.append([post_id, submolt])
+        return code
+
+    # ── Writing ──────────────────────────────────────────────
+
+    def append(self, post_id: str, ts, upvotes: int, downvotes: int,
+               comment_count: int, submolt: str = "Unknown"):
+        """Buffer one sample; call ``flush`` to persist."""
+        self._buffer.append((post_id, submolt, to_epoch(ts), upvotes, downvotes, comment_count))
+
+    def append_posts(self, posts: Iterable[dict], fetched_at):
+        """Buffer one sample per raw API post, all taken at ``fetched_at``."""
+        ts = to_epoch(fetched_at)
+        for post in posts:
+            post_id = post.get("id")
+            if not post_id:
+                continue
+            submolt = post.get("submolt")
+            submolt = submolt.get("name", "Unknown") if isinstance(submolt, dict) else "Unknown"
+            self._buffer.append((post_id, submolt, ts, post.get("upvotes") or 0,
+                                 post.get("downvotes") or 0, post.get("comment_count") or 0))
+
+    def flush(self) -> int:
+        """Write buffered samples as one new segment per touched chunk."""
+        if not self._buffer:
+            return 0
+        new_keys: list = []
+        codes = np.fromiter((self._post_code(p, s, new_keys) for p, s, *_ in self._buffer),
+                            dtype=np.int32, count=len(self._buffer))
+        columns = list(zip(*self._buffer))
+        ts, up, down, comments = (np.array(columns[i], dtype=np.int64) for i in range(2, 6))
+        if new_keys:
+            with open(self.keys_path, "a", encoding="utf-8") as f:
+                for key in new_keys:
+                    f.write(json.dumps(key) + "\n")
+
+        chunk_of = ts // self.chunk_seconds * self.chunk_seconds
+        for chunk_start in np.unique(chunk_of):
+            mask = chunk_of == chunk_start
+            self._write_segment(int(chunk_start), codes[mask], ts[mask],
+                                {"upvotes": up[mask], "downvotes": down[mask], "comment_count": comments[mask]})
+        written = len(self._buffer)
+        self._buffer = []
+        return written
+
+    def _write_segment(self, chunk_start: int, post: np.ndarray, ts: np.ndarray,
+                       metrics: dict, path: Path = None):
+        order = np.lexsort((ts, post))
+        post, ts = post[order], ts[order]
+        unique, counts = np.unique(post, return_counts=True)
+        starts = _run_starts(counts)
+        arrays = {
+            "post": unique.astype(np.int32),
+            "count": _narrow(counts),
+            "t": _narrow(_delta_encode(ts - chunk_start, starts)),
+        }
+        for name, values in metrics.items():
+            arrays[name] = _narrow(_delta_encode(values[order], starts))
+        if path is None:
+            directory = self.chunk_dir / str(chunk_start)
+            number = max((int(p.stem.split("-")[1]) for p in directory.glob("seg-*.npz")), default=-1) + 1
+            path = directory / f"seg-{number}.npz"
+        # The temp name (.seg-N.npz.<pid>.tmp) never matches seg-*.npz
+        save_npz(path, arrays)
+
+    def compact(self, start=None, end=None):
+        """Merge each chunk's segments into a single segment."""
+        for chunk_start in self.chunks(start, end):
+            directory = self.chunk_dir / str(chunk_start)
+            paths = sorted(directory.glob("seg-*.npz"))
+            if len(paths) < 2:
+                continue
+            segments = [_Segment(p, chunk_start) for p in paths]
+            post = np.concatenate([np.repeat(s.post, s.count) for s in segments])
+            ts = np.concatenate([s.t for s in segments])
+            metrics = {m: np.concatenate([s.metrics[m] for s in segments]) for m in METRICS}
+            # Replace seg-0 first so a crash can leave duplicates but never lose samples
+            target = directory / "seg-0.npz"
+            self._write_segment(chunk_start, post, ts, metrics, path=target)
+            for p in paths:
+                if p != target:
+                    p.unlink()
+
+    # ── Reading ──────────────────────────────────────────────
+
+    def chunks(self, start=None, end=None) -> list[int]:
+        """Chunk start times overlapping [start, end]."""
+        lo = None if start is None else to_epoch(start) // self.chunk_seconds * self.chunk_seconds
+        hi = None if end is None else to_epoch(end)
+        found = sorted(int(p.name) for p in self.chunk_dir.iterdir() if p.name.lstrip("-").isdigit())
+        return [c for c in found if (lo is None or c >= lo) and (hi is None or c <= hi)]
+
+    def _segments(self, start=None, end=None):
+        for chunk_start in self.chunks(start, end):
+            for path in sorted((self.chunk_dir / str(chunk_start)).glob("seg-*.npz")):
+                yield _Segment(path, chunk_start)
+
+    def _query(self, posts: Optional[np.ndarray], start=None, end=None) -> dict:
+        lo = None if start is None else to_epoch(start)
+        hi = None if end is None else to_epoch(end)
+        parts = defaultdict(list)
+        for segment in self._segments(start, end):
+            post_of_sample, mask = segment.rows(posts)
+            if lo is not None:
+                mask &= segment.t >= lo
+            if hi is not None:
+                mask &= segment.t <= hi
+            parts["post"].append(post_of_sample[mask])
+            parts["t"].append(segment.t[mask])
+            for m in METRICS:
+                parts[m].append(segment.metrics[m][mask])
+        columns = {name: (np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=np.int64))
+                   for name in ("post", "t") + METRICS}
+        order = np.lexsort((columns["t"], columns["post"]))
+        return {name: values[order] for name, values in columns.items()}
+
+    def series(self, post_id: str, start=None, end=None) -> dict:
+        """Samples of one post as arrays ``t`` (epoch s), upvotes, downvotes, comment_count."""
+        code = self.post_ids.get(post_id)
+        posts = np.array([code] if code >= 0 else [], dtype=np.int32)
+        result = self._query(posts, start, end)
+        del result["post"]
+        return result
+
+    def submolt_series(self, submolt: str, start=None, end=None) -> dict:
+        """Samples of every post in ``submolt``; ``post`` holds post codes."""
+        code = self.submolts.get(submolt)
+        posts = np.flatnonzero(np.asarray(self._post_submolt) == code).astype(np.int32)
+        return self._query(posts, start, end)
+
+    def velocity(self, post_id: str, start=None, end=None) -> dict:
+        """Per-interval change rates (per hour) between consecutive samples."""
+        s = self.series(post_id, start, end)
+        hours = np.diff(s["t"]) / 3600.0
+        hours[hours == 0] = np.nan
+        result = {"t": s["t"][1:]}
+        for m in METRICS:
+            result[m] = np.diff(s[m]) / hours
+        return result
+
+    def rising(self, at=None, window: int = 3600, submolt: str = None,
+               metric: str = "upvotes", k: int = 25) -> list[tuple[str, int]]:
+        """Posts with the largest ``metric`` gain over ``window`` seconds before ``at``."""
+        end = to_epoch(at) if at is not None else None
+        if end is None:
+            chunks = self.chunks()
+            if not chunks:
+                return []
+            end = max(int(seg.t.max()) for seg in self._segments(chunks[-1], None) if len(seg.t))
+        if submolt is None:
+            data = self._query(None, end - window, end)
+        else:
+            data = self.submolt_series(submolt, end - window, end)
+        if not len(data["post"]):
+            return []
+        posts, first = np.unique(data["post"], return_index=True)
+        last = np.concatenate((first[1:], [len(data["post"])])) - 1
+        gain = data[metric][last] - data[metric][first]
+        top = np.argsort(-gain, kind="stable")[:k]
+        return [(self.post_ids.values[posts[i]], int(gain[i])) for i in top]
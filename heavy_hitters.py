@@ -0,0 +1,231 @@
+"""
+Bounded-memory heavy hitters (Space-Saving) for keywords and bigrams.
+
+``Counter(all_words)`` keeps every distinct token and bigram just to print
+the top 50; with comments included the bigram vocabulary grows without
+bound. ``SpaceSaving(capacity)`` tracks at most ``capacity`` items. Every
+reported count is an overestimate with a known error:
+
+    count - error <= true count <= count
+
+Items that are not tracked occurred at most ``floor`` times, so any item
+with a true count above ``floor`` is guaranteed to be tracked. Errors grow
+with ``N / capacity`` (``N`` the total weight seen), so the top items of a
+skewed distribution come out exact or nearly so.
+
+Batches are folded in through the mergeable-summary merge (an exact
+``Counter`` of the batch is itself a summary with no error), so summaries
+built on separate shards or runs combine with ``merge`` and keep the same
+bounds. Ties rank by first appearance, so while nothing has been evicted
+``most_common`` is identical to ``Counter.most_common``.
+
+Usage:
+    sketch = SpaceSaving(2000)
+    for chunk in chunks:
+        sketch.update(words_of(chunk))
+    sketch.most_common(50)                       # [(word, count), ...]
+    sketch.merge(other_shard_sketch)
+
+    python heavy_hitters.py --capacity 1000 5000   # accuracy vs exact counts
+"""
+
+import argparse
+from collections import Counter
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Top-k the CLI reports, as moltbook_analysis.py prints them
+TOP_K = {"keywords": 50, "bigrams": 30}
+
+
+class SpaceSaving:
+    """Top-``capacity`` counter with per-item overestimation bounds."""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: dict = {}   # item -> estimated count, first-seen order
+        self.errors: dict = {}   # item -> maximum overestimation
+        self.floor = 0           # upper bound on the count of any untracked item
+        self.total = 0
+
+    # ── Updates ──────────────────────────────────────────────
+
+    def update(self, items: Iterable, weights: Optional[Iterable[int]] = None):
+        """Count ``items`` (one batch); ``weights`` default to 1 each."""
+        batch = Counter()
+        if weights is None:
+            batch.update(items)
+        else:
+            for item, weight in zip(items, weights):
+                batch[item] += weight
+        self.update_counts(batch)
+
+    def update_counts(self, counts: dict):
+        """Fold in exact ``{item: count}`` totals of a batch."""
+        exact = SpaceSaving(max(len(counts), 1))
+        exact.counts = dict(counts)
+        exact.errors = dict.fromkeys(counts, 0)
+        exact.total = sum(counts.values())
+        self.merge(exact)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """Combine with a summary of another shard (this one's items rank first on ties)."""
+        counts, errors = {}, {}
+        for a, b in ((self, other), (other, self)):
+            for item, count in a.counts.items():
+                if item not in counts:
+                    # An item one side does not track counted at most its floor there
+                    counts[item] = count + b.counts.get(item, b.floor)
+                    errors[item] = a.errors[item] + b.errors.get(item, b.floor)
+        self.total += other.total
+        floor = self.floor + other.floor
+        if len(counts) > self.capacity:
+            ranked = self._rank(counts)
+            # The largest evicted estimate bounds every untracked item
+            floor = max(floor, counts[ranked[self.capacity]])
+            keep = set(ranked[:self.capacity])
+            counts = {item: c for item, c in counts.items() if item in keep}
+            errors = {item: errors[item] for item in counts}
+        self.counts, self.errors, self.floor = counts, errors, floor
+        return self
+
+    # ── Queries ──────────────────────────────────────────────
+
+    @staticmethod
+    def _rank(counts: dict) -> list:
+        items = list(counts)
+        order = np.argsort(-np.fromiter(counts.values(), dtype=np.int64, count=len(items)), kind="stable")
+        return [items[i] for i in order]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, item) -> bool:
+        return item in self.counts
+
+    def estimate(self, item) -> int:
+        """Upper bound on ``item``'s count."""
+        return self.counts.get(item, self.floor)
+
+    def lower_bound(self, item) -> int:
+        return self.counts[item] - self.errors[item] if item in self.counts else 0
+
+    def most_common(self, k: int = None) -> list[tuple]:
+        ranked = self._rank(self.counts)[:k]
+        return [(item, self.counts[item]) for item in ranked]
+
+    def guaranteed(self, k: int = None) -> list:
+        """Items of the top ``k`` whose rank is certain (lower bound beats every item below)."""
+        ranked = self.most_common()
+        k = len(ranked) if k is None else min(k, len(ranked))
+        certain = []
+        for i, (item, _) in enumerate(ranked[:k]):
+            below = ranked[i + 1][1] if i + 1 < len(ranked) else self.floor
+            if self.lower_bound(item) < max(below, self.floor):
+                break
+            certain.append(item)
+        return certain
+
+    @property
+    def max_error(self) -> int:
+        """Largest overestimation among tracked items."""
+        return max(self.errors.values(), default=0)
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def to_dict(self) -> dict:
+        """JSON-compatible state (items must be strings)."""
+        return {"capacity": self.capacity, "floor": self.floor, "total": self.total,
+                "items": [[item, self.counts[item], self.errors[item]] for item in self.counts]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpaceSaving":
+        sketch = cls(data["capacity"])
+        sketch.floor, sketch.total = data["floor"], data["total"]
+        for item, count, error in data["items"]:
+            sketch.counts[item] = count
+            sketch.errors[item] = error
+        return sketch
+
+
+def accuracy(sketch: SpaceSaving, exact: Counter, k: int) -> dict:
+    """Compare the sketch's top ``k`` with exact counts."""
+    true_top = [item for item, _ in exact.most_common(k)]
+    approx_top = [item for item, _ in sketch.most_common(k)]
+    overestimates = [sketch.counts[item] - exact[item] for item in sketch.counts]
+    return {
+        "k": k,
+        "recall": len(set(true_top) & set(approx_top)) / max(len(true_top), 1),
+        "exact_order": approx_top == true_top,
+        "max_overestimate": max(overestimates, default=0),
+        "max_error_bound": sketch.max_error,
+        "bound_holds": all(0 <= sketch.counts[i] - exact[i] <= sketch.errors[i] for i in sketch.counts)
+                       and all(c <= sketch.floor for i, c in exact.items() if i not in sketch.counts),
+        "tracked": len(sketch),
+        "distinct": len(exact),
+    }
+
+
+def main(argv=None):
+    from dataset import load_dataset
+    from jsonio import iter_array
+    from tokens import KEYWORD_STOP_WORDS, Tokenizer
+
+    parser = argparse.ArgumentParser(description="Check Space-Saving top keywords/bigrams against exact counts.")
+    parser.add_argument("--posts", default="/home/ubuntu/moltbook_posts.json")
+    parser.add_argument("--comments", default="/home/ubuntu/moltbook_data.json",
+                        help="also count comment text (pass '' to skip)")
+    parser.add_argument("--capacity", type=int, nargs=2, default=[1000, 5000], metavar=("KEYWORDS", "BIGRAMS"),
+                        help=f"sketch sizes; at least the reported top {TOP_K['keywords']}/{TOP_K['bigrams']}")
+    parser.add_argument("--shards", type=int, default=4, help="build per shard, then merge")
+    parser.add_argument("--batch", type=int, default=1000, help="documents per sketch update")
+    args = parser.parse_args(argv)
+    if args.capacity[0] < TOP_K["keywords"] or args.capacity[1] < TOP_K["bigrams"]:
+        parser.error(f"--capacity must be at least {TOP_K['keywords']} {TOP_K['bigrams']} "
+                     "(the top-k being reported)")
+
+    texts = list(load_dataset(args.posts).frame['text'])
+    if args.comments:
+        texts += [c.get('content') or '' for c in iter_array(args.comments, "comments")]
+
+    tokenize = Tokenizer().tokenize
+    exact = {"keywords": Counter(), "bigrams": Counter()}
+    shards = []
+    for part in np.array_split(np.arange(len(texts)), max(args.shards, 1)):
+        sketches = {"keywords": SpaceSaving(args.capacity[0]), "bigrams": SpaceSaving(args.capacity[1])}
+        for start in range(0, len(part), args.batch):
+            batch = {"keywords": Counter(), "bigrams": Counter()}
+            for i in part[start:start + args.batch]:
+                words = [w for w in tokenize(texts[i]) if w not in KEYWORD_STOP_WORDS]
+                batch["keywords"].update(words)
+                batch["bigrams"].update(f"{a} {b}" for a, b in zip(words, words[1:]))
+            for name, counts in batch.items():
+                exact[name].update(counts)
+                sketches[name].update_counts(counts)
+        shards.append(sketches)
+    merged = shards[0]
+    for sketches in shards[1:]:
+        for name in merged:
+            merged[name].merge(sketches[name])
+
+    print("=" * 60)
+    print("HEAVY HITTERS vs EXACT COUNTS")
+    print("=" * 60)
+    print(f"\nDocuments: {len(texts):,} in {len(shards)} merged shards")
+    for name, k in TOP_K.items():
+        sketch = merged[name]
+        result = accuracy(sketch, exact[name], k)
+        print(f"\n{name.capitalize()} (capacity {sketch.capacity:,}, {result['distinct']:,} distinct, "
+              f"N={sketch.total:,}):")
+        print(f"  Top-{k} recall: {result['recall']:.0%}, same order: {result['exact_order']}")
+        print(f"  Max overestimate: {result['max_overestimate']:,} "
+              f"(reported bound {result['max_error_bound']:,}, N/capacity {sketch.total // sketch.capacity:,})")
+        print(f"  Error bounds hold: {result['bound_holds']}, "
+              f"rank certain for top {len(sketch.guaranteed(k))}")
+
+
+if __name__ == "__main__":
+    main()
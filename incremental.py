@@ -0,0 +1,498 @@
+"""
+Incremental ``moltbook_insights.json`` updates.
+
+Between hourly scrapes only a few posts are new or changed, so instead of
+recomputing everything this keeps the additive state behind the insights
+next to the snapshot (``moltbook_posts.insights.pkl``):
+
+- totals, post counts per author and per submolt
+- theme, sentiment and post-type counts (posts and comments)
+- emerging-topic term counts per hour (a ``TermTimeline``)
+- the dashboard rollup cube (a ``RollupCube``, also written to
+  ``moltbook_posts.rollup.npz`` after every run)
+- one ``PostContribution`` per post (a hash of its record plus what it added
+  to the counters), so a changed or removed post can be subtracted again
+
+Each run streams the new snapshot once, hashing every record to find the
+added/changed/removed posts and comments. Only those are matched, scored,
+classified and tokenized; their old contributions are subtracted and the new
+ones added, and the timeline only merges into the hour buckets the delta
+falls in. What stays proportional to the snapshot is that fingerprint/diff
+pass (parsing and hashing every record and comparing the key sets), the
+cube merge (a regroup of all its cells) and rendering the emerging topics,
+which sums the timeline's baseline buckets.
+The insights written are the same as ``moltbook_deep_analysis.py``
+writes for that snapshot (tie order included). Changing the theme, lexicon,
+post-type or stop-word configuration rebuilds the state from scratch.
+
+``check`` is the regression test for all of this: it edits a copy of the
+snapshot (posts and comments added, changed and removed), applies that delta
+to a fresh build and reverts it, and compares every counter, the timeline,
+the cube and the rendered insights with full builds of both snapshots.
+
+Usage:
+    python incremental.py                  # update state, rewrite insights
+    python incremental.py --rebuild        # discard the saved state first
+    python incremental.py --check          # delta/revert vs. full builds
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import atomic_write, save_optional, sidecar_path
+import jsonio
+from jsonio import dumps, iter_array
+from post_types import POST_TYPE_RULES, PostTypeClassifier
+from rollup import DIMENSIONS, MEASURES, RollupCube, cube_key
+from sentiment import SENTIMENT_LEXICONS, LexiconScorer
+from streaming import chunk_frame
+from term_timeline import EMERGING_WINDOW, TermTimeline
+from theme_matcher import ThemeMatcher
+from tokens import EMERGING_STOP_WORDS, Tokenizer
+
+POSTS_PATH = "/home/ubuntu/moltbook_posts.json"
+DATA_PATH = "/home/ubuntu/moltbook_data.json"
+INSIGHTS_PATH = "/home/ubuntu/moltbook_insights.json"
+
+# Bump when the saved state layout changes so old state is rebuilt
+STATE_VERSION = 4
+
+
+class PostContribution(NamedTuple):
+    """What one post added to the aggregates."""
+    signature: bytes
+    created: int                # ns since epoch, NAT if missing
+    author: Optional[str]
+    submolt: Optional[str]
+    upvotes: int
+    downvotes: int
+    comments: int
+    themes: int                 # bit j set: matches theme j
+    sentiment: int              # bit j set: lexicon j scored > 0
+    post_type: str
+    terms: dict                 # emerging-topic term -> count
+
+
+@dataclass
+class InsightsState:
+    """Everything persisted between runs."""
+    key: str = ""
+    posts: dict = field(default_factory=dict)          # post key -> PostContribution
+    order: list = field(default_factory=list)          # post keys in snapshot order
+    comments: Optional[dict] = None                    # comment key -> (signature, bits); None: no comments file
+    totals: Counter = field(default_factory=Counter)   # upvotes, comments
+    authors: Counter = field(default_factory=Counter)
+    submolts: Counter = field(default_factory=Counter)
+    themes: Counter = field(default_factory=Counter)   # theme index -> posts
+    sentiment: Counter = field(default_factory=Counter)
+    comment_sentiment: Counter = field(default_factory=Counter)
+    post_types: Counter = field(default_factory=Counter)
+    timeline: TermTimeline = field(default_factory=lambda: TermTimeline('hour'))
+    cube: Optional[RollupCube] = None
+
+
+def _signature(value) -> bytes:
+    return hashlib.blake2b(dumps(value), digest_size=16).digest()
+
+
+def _record_key(record: dict, seen: Counter) -> str:
+    # Offset pagination can return a post twice; the analysis counts both copies
+    record_id = str(record.get("id", ""))
+    n = seen[record_id]
+    seen[record_id] += 1
+    return record_id if n == 0 else f"{record_id}#{n}"
+
+
+def _bits(matrix: np.ndarray) -> list[int]:
+    weights = 1 << np.arange(matrix.shape[1], dtype=np.int64)
+    return (matrix.astype(np.int64) @ weights).tolist()
+
+
+def _adjust(counter: Counter, key, amount: int):
+    value = counter[key] + amount
+    if value:
+        counter[key] = value
+    else:
+        del counter[key]
+
+
+class IncrementalInsights:
+    """Applies snapshot deltas to an ``InsightsState`` and renders the insights."""
+
+    def __init__(self, theme_patterns: dict, lexicons: dict = SENTIMENT_LEXICONS,
+                 post_type_rules=POST_TYPE_RULES, stop_words=EMERGING_STOP_WORDS,
+                 min_len: int = 4, tokenizer: Tokenizer = None, n_jobs: int = -1):
+        self.theme_names = list(theme_patterns)
+        self.matcher = ThemeMatcher({theme: config['keywords'] for theme, config in theme_patterns.items()})
+        self.scorer = LexiconScorer(lexicons, n_jobs=n_jobs)
+        self.classifier = PostTypeClassifier(post_type_rules)
+        self.tokenizer = tokenizer or Tokenizer()
+        self.stop_words = frozenset(stop_words)
+        self.min_len = min_len
+        self.n_jobs = n_jobs
+        config = {
+            "version": STATE_VERSION,
+            "themes": {theme: config['keywords'] for theme, config in theme_patterns.items()},
+            "lexicons": lexicons,
+            "post_types": post_type_rules,
+            "stop_words": sorted(self.stop_words),
+            "min_len": min_len,
+            "tokenizer": self.tokenizer.config,
+        }
+        self.key = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:24]
+        self.state = InsightsState(self.key, cube=RollupCube(self.theme_names))
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def load(self, path) -> bool:
+        """Restore saved state; False (fresh state) if missing or built with another config."""
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return False
+        if not isinstance(saved, dict) or saved.get("key") != self.key:
+            return False
+        saved["posts"] = {key: PostContribution._make(post) for key, post in saved["posts"].items()}
+        self.state = InsightsState(**saved)
+        return True
+
+    def save(self, path):
+        # Plain containers only, so the file loads whether this runs as a script or a module
+        saved = dict(vars(self.state))
+        saved["posts"] = {key: tuple(post) for key, post in self.state.posts.items()}
+
+        def write(tmp):
+            with open(tmp, "wb") as f:
+                pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        atomic_write(path, write)
+
+    # ── Deltas ───────────────────────────────────────────────
+
+    def update(self, source=POSTS_PATH, comments_source=DATA_PATH) -> dict:
+        """Apply the posts (and comments) that differ from the saved state.
+
+        Returns ``{"posts": {"added", "changed", "removed"}, "comments": {...}}``.
+        """
+        delta = {"posts": self._update_posts(source)}
+        if comments_source is not None and os.path.exists(comments_source):
+            delta["comments"] = self._update_comments(comments_source)
+        else:
+            self._drop_comments()
+        return delta
+
+    def _update_posts(self, source) -> dict:
+        state = self.state
+        order, pending, seen = [], [], Counter()
+        for record in iter_array(source, "posts"):
+            key = _record_key(record, seen)
+            signature = _signature(record)
+            order.append(key)
+            old = state.posts.get(key)
+            if old is None or old.signature != signature:
+                pending.append((key, signature, record))
+
+        current = set(order)
+        removed = [key for key in state.posts if key not in current]
+        changed = sum(1 for key, _, _ in pending if key in state.posts)
+        outgoing = [state.posts.pop(key) for key in removed]
+        outgoing += [state.posts.pop(key) for key, _, _ in pending if key in state.posts]
+        incoming = self._analyze(pending)
+        for (key, _, _), contribution in zip(pending, incoming):
+            state.posts[key] = contribution
+        for post in outgoing:
+            self._apply(post, -1)
+        for post in incoming:
+            self._apply(post, 1)
+        # One timeline and cube update for the whole delta
+        posts = outgoing + incoming
+        weights = [-1] * len(outgoing) + [1] * len(incoming)
+        state.timeline.add([post.created for post in posts], [post.terms for post in posts], weights)
+        if posts:
+            state.cube.add(*zip(*[(p.submolt, p.author, p.post_type, p.created, p.themes, p.upvotes,
+                                   p.downvotes, p.comments) for p in posts]), weights)
+        state.order = order
+        return {"added": len(pending) - changed, "changed": changed, "removed": len(removed)}
+
+    def _analyze(self, pending: list) -> list[PostContribution]:
+        if not pending:
+            return []
+        frame = chunk_frame([record for _, _, record in pending])
+        themes = _bits(self.matcher.match(frame['text_lower'], lowercase=False, n_jobs=self.n_jobs))
+        sentiment = _bits(self.scorer.score_matrix(frame['text_lower'], lowercase=False) > 0)
+        post_types = self.classifier.classify(frame['title'], n_jobs=self.n_jobs)
+        created = pd.DatetimeIndex(frame['created_at']).asi8.tolist()
+        tokenize, stop, min_len = self.tokenizer.tokenize, self.stop_words, self.min_len
+        contributions = []
+        for i, (text, author, submolt, upvotes, downvotes, comments) in enumerate(zip(
+                frame['text'], frame['author_name'].astype(object), frame['submolt_name'].astype(object),
+                frame['upvotes'].tolist(), frame['downvotes'].tolist(), frame['comment_count'].tolist())):
+            terms = Counter(w for w in tokenize(text) if len(w) >= min_len and w not in stop)
+            contributions.append(PostContribution(
+                pending[i][1], created[i], None if pd.isna(author) else author,
+                None if pd.isna(submolt) else submolt, upvotes, downvotes, comments,
+                themes[i], sentiment[i], post_types[i], dict(terms)))
+        return contributions
+
+    def _apply(self, post: PostContribution, sign: int):
+        state = self.state
+        _adjust(state.totals, "posts", sign)
+        _adjust(state.totals, "upvotes", sign * post.upvotes)
+        _adjust(state.totals, "comments", sign * post.comments)
+        _adjust(state.authors, post.author, sign)
+        _adjust(state.submolts, post.submolt, sign)
+        for j in range(len(self.theme_names)):
+            if post.themes >> j & 1:
+                _adjust(state.themes, j, sign)
+        for j in range(len(self.scorer.names)):
+            if post.sentiment >> j & 1:
+                _adjust(state.sentiment, j, sign)
+        _adjust(state.post_types, post.post_type, sign)
+
+    def _update_comments(self, source) -> dict:
+        state = self.state
+        if state.comments is None:
+            state.comments = {}
+        current, pending, seen = set(), [], Counter()
+        for record in iter_array(source, "comments"):
+            key = _record_key(record, seen)
+            text = record.get('content') or ''
+            signature = _signature(text)
+            current.add(key)
+            old = state.comments.get(key)
+            if old is None or old[0] != signature:
+                pending.append((key, signature, text))
+
+        removed = [key for key in state.comments if key not in current]
+        changed = sum(1 for key, _, _ in pending if key in state.comments)
+        for key in removed:
+            self._apply_comment(state.comments.pop(key)[1], -1)
+        for key, _, _ in pending:
+            if key in state.comments:
+                self._apply_comment(state.comments.pop(key)[1], -1)
+        if pending:
+            texts = pd.Series([text for _, _, text in pending], dtype=object)
+            for (key, signature, _), bits in zip(pending, _bits(self.scorer.score_matrix(texts) > 0)):
+                state.comments[key] = (signature, bits)
+                self._apply_comment(bits, 1)
+        return {"added": len(pending) - changed, "changed": changed, "removed": len(removed)}
+
+    def _apply_comment(self, bits: int, sign: int):
+        for j in range(len(self.scorer.names)):
+            if bits >> j & 1:
+                _adjust(self.state.comment_sentiment, j, sign)
+
+    def _drop_comments(self):
+        self.state.comments = None
+        self.state.comment_sentiment.clear()
+
+    # ── Insights ─────────────────────────────────────────────
+
+    def _post_type_counts(self) -> pd.Series:
+        # value_counts order: count, then first appearance in the snapshot
+        counts, first = self.state.post_types, {}
+        for key in self.state.order:
+            post_type = self.state.posts[key].post_type
+            if post_type not in first:
+                first[post_type] = len(first)
+                if len(first) == len(counts):
+                    break
+        ranked = sorted(counts, key=lambda t: (-counts[t], first[t]))
+        return pd.Series(np.array([counts[t] for t in ranked], dtype=np.int64),
+                         index=pd.Index(ranked, dtype=object), name="count")
+
+    def _top_submolts(self, k: int = 10) -> pd.Series:
+        # Same input order (groupby: by name) and sort as the submolt_stats stage
+        names = sorted(name for name in self.state.submolts if name is not None)
+        stats = pd.DataFrame({'post_count': np.array([self.state.submolts[n] for n in names], dtype=np.int64)},
+                             index=names)
+        return stats.sort_values('post_count', ascending=False)['post_count'].head(k)
+
+    def insights(self) -> dict:
+        """The ``moltbook_insights.json`` contents for the current state."""
+        state = self.state
+        n = state.totals["posts"]
+        theme_counts = {theme: state.themes[j] for j, theme in enumerate(self.theme_names)}
+        ranked_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
+        names = self.scorer.names
+        comment_counts = {} if state.comments is None else {
+            f"{name}_comments": state.comment_sentiment[j] for j, name in enumerate(names)}
+        return {
+            "total_posts": n,
+            "total_authors": sum(1 for a in state.authors if a is not None),
+            "total_submolts": sum(1 for s in state.submolts if s is not None),
+            "total_upvotes": state.totals["upvotes"],
+            "total_comments": state.totals["comments"],
+            "avg_upvotes_per_post": state.totals["upvotes"] / n if n else float("nan"),
+            "avg_comments_per_post": state.totals["comments"] / n if n else float("nan"),
+            "themes": {theme: {'count': count, 'percentage': (count / n) * 100 if n else float("nan")}
+                       for theme, count in ranked_themes},
+            "top_submolts": dict(self._top_submolts(10)),
+            "post_types": dict(self._post_type_counts()),
+            "sentiment": {
+                **{f"{name}_posts": state.sentiment[j] for j, name in enumerate(names)},
+                **comment_counts
+            },
+            "emerging_topics": [{"word": w, "growth": d['growth'], "burst": d['burst']}
+                                for w, d in state.timeline.emerging(EMERGING_WINDOW, top=500, min_count=20)[:20]]
+        }
+
+
+def update_insights(source=POSTS_PATH, comments_source=DATA_PATH, output=INSIGHTS_PATH,
+                    theme_patterns: dict = None, rebuild: bool = False,
+                    state_path=None) -> tuple[dict, dict]:
+    """Load the saved state, apply the snapshot delta, save and write the insights."""
+    if theme_patterns is None:
+        from theme_patterns import theme_patterns
+    state_path = state_path or sidecar_path(source, "insights.pkl")
+    runner = IncrementalInsights(theme_patterns)
+    if not rebuild:
+        runner.load(state_path)
+    delta = runner.update(source, comments_source)
+    if save_optional(runner.save, state_path):
+        # The cube now matches this snapshot; store it where rollup.load_or_build looks
+        save_optional(runner.state.cube.save, sidecar_path(source, "rollup.npz"), cube_key(source, {
+            theme: config['keywords'] for theme, config in theme_patterns.items()}))
+    insights = runner.insights()
+    with open(output, "w") as f:
+        json.dump(insights, f, indent=2, default=str)
+    return insights, delta
+
+
+# ── Regression check ─────────────────────────────────────────
+
+def _edit_snapshots(source, comments_source, directory) -> tuple[str, Optional[str]]:
+    """Copies of the snapshots with posts/comments added, changed and removed."""
+    snapshot = jsonio.load(source)
+    posts = snapshot.get("posts", [])
+    edited = []
+    for i, post in enumerate(posts):
+        if i % 7 == 3:
+            continue                                        # removed
+        if i % 5 == 1:
+            post = {**post, "title": f"{post.get('title') or ''} (update: why?)",
+                    "upvotes": (post.get("upvotes") or 0) + 3,
+                    "comment_count": (post.get("comment_count") or 0) + 1}
+        edited.append(post)
+    for i, post in enumerate(posts[::25]):                  # added, one a repeated id
+        edited.append({**post, "id": f"{post.get('id')}-new{i}" if i else post.get("id"),
+                       "content": f"{post.get('content') or ''} announcing a new memory tool"})
+    posts_path = os.path.join(directory, "posts.json")
+    jsonio.dump({**snapshot, "posts": edited}, posts_path)
+    if comments_source is None or not os.path.exists(comments_source):
+        return posts_path, None
+
+    data = jsonio.load(comments_source)
+    comments = data.get("comments", [])
+    edited = [{**c, "content": f"{c.get('content') or ''} love this, thank you"} if i % 6 == 2 else c
+              for i, c in enumerate(comments) if i % 9 != 4]
+    edited += [{**c, "id": f"{c.get('id')}-new{i}"} for i, c in enumerate(comments[::40])]
+    comments_path = os.path.join(directory, "data.json")
+    jsonio.dump({**data, "comments": edited}, comments_path)
+    return posts_path, comments_path
+
+
+def _summary(runner: IncrementalInsights) -> dict:
+    """Everything a full build and an incremental state must agree on."""
+    state = runner.state
+    timeline = state.timeline.counts.tocoo()
+    cube = pd.DataFrame(state.cube.cells)
+    for name, dictionary in state.cube.dictionaries.items():
+        cube[name] = np.array(dictionary.values, dtype=object)[cube[name].to_numpy()] if len(cube) else cube[name]
+    return {
+        "insights": json.dumps(runner.insights(), indent=2, default=str),
+        "posts": {key: post._replace(terms=sorted(post.terms.items())) for key, post in state.posts.items()},
+        "order": state.order,
+        "comments": state.comments,
+        **{name: {k: v for k, v in getattr(state, name).items() if v}
+           for name in ("totals", "authors", "submolts", "themes", "sentiment", "comment_sentiment", "post_types")},
+        "timeline": sorted((state.timeline.origin + int(r), state.timeline.vocab.values[c], int(v))
+                           for r, c, v in zip(timeline.row, timeline.col, timeline.data) if v),
+        "cube": sorted(map(tuple, cube[list(DIMENSIONS + MEASURES)].itertuples(index=False))),
+    }
+
+
+def _differences(expected: dict, actual: dict) -> list[str]:
+    return [name for name in expected if expected[name] != actual[name]]
+
+
+def check(source=POSTS_PATH, comments_source=DATA_PATH, theme_patterns: dict = None) -> list[str]:
+    """Compare incremental updates with full builds; returns what differs.
+
+    A full build of the snapshot is edited to a changed copy (through a
+    save/load round trip) and back again. After the edit it must equal a full
+    build of the copy, and after the revert a full build of the original.
+    """
+    if theme_patterns is None:
+        from theme_patterns import theme_patterns
+
+    def full_build(posts, comments):
+        runner = IncrementalInsights(theme_patterns)
+        runner.update(posts, comments)
+        return runner
+
+    with tempfile.TemporaryDirectory() as directory:
+        edited, edited_comments = _edit_snapshots(source, comments_source, directory)
+        state_path = os.path.join(directory, "state.pkl")
+        failures = []
+        runner = full_build(source, comments_source)
+        original = _summary(runner)
+        for label, posts, comments, expected in (
+                ("delta", edited, edited_comments, _summary(full_build(edited, edited_comments))),
+                ("revert", source, comments_source, original)):
+            runner.save(state_path)
+            runner = IncrementalInsights(theme_patterns)
+            if not runner.load(state_path):
+                return [f"{label}: saved state did not load"]
+            runner.update(posts, comments)
+            failures += [f"{label}: {name}" for name in _differences(expected, _summary(runner))]
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update moltbook_insights.json from the snapshot delta.")
+    parser.add_argument("source", nargs="?", default=POSTS_PATH, help="posts snapshot (.json)")
+    parser.add_argument("--comments", default=DATA_PATH, help="comments snapshot (.json)")
+    parser.add_argument("-o", "--output", default=INSIGHTS_PATH)
+    parser.add_argument("--state", default=None, help="state file (default: next to the snapshot)")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the saved state")
+    parser.add_argument("--check", action="store_true",
+                        help="verify delta/revert updates against full builds (writes nothing)")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failures = check(args.source, args.comments)
+        print("=" * 60)
+        print("INCREMENTAL INSIGHTS CHECK")
+        print("=" * 60)
+        for failure in failures:
+            print(f"  MISMATCH {failure}")
+        print("\nOK: delta and revert match full builds" if not failures else
+              f"\n{len(failures)} mismatches")
+        raise SystemExit(1 if failures else 0)
+
+    insights, delta = update_insights(args.source, args.comments, args.output,
+                                      rebuild=args.rebuild, state_path=args.state)
+    print("=" * 60)
+    print("INCREMENTAL INSIGHTS")
+    print("=" * 60)
+    for collection, counts in delta.items():
+        print(f"  {collection.capitalize()}: +{counts['added']:,} added, "
+              f"~{counts['changed']:,} changed, -{counts['removed']:,} removed")
+    print(f"\nTotal Posts: {insights['total_posts']:,}")
+    print(f"Insights saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
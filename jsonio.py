@@ -0,0 +1,217 @@
+"""JSON helpers with an optional fast backend and a streaming snapshot reader.
+
+``loads``/``dumps``/``load``/``dump`` use orjson when it is installed and
+fall back to the stdlib ``json`` module otherwise. ``iter_records`` walks a
+scraper snapshot (``{"posts": [...], "comments": [...], ...}``) and yields
+array elements one at a time, so a multi-GB file never has to be held in
+memory as a single object tree.
+
+This module only depends on the standard library (and optionally orjson) so
+it can be imported from the client as well as from the scripts.
+"""
+
+import codecs
+import io
+import json
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Both backends raise a subclass of this
+JSONDecodeError = json.JSONDecodeError
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+_CHUNK_SIZE = 1 << 20
+
+
+def loads(data) -> Any:
+    """Decode JSON from ``bytes`` or ``str``."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+def dumps(obj, indent: Optional[int] = None, default=None) -> bytes:
+    """Encode ``obj`` to UTF-8 JSON bytes.
+
+    orjson only supports two-space indentation; any ``indent`` is mapped to it.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, indent=indent, default=default).encode("utf-8")
+
+
+def load(path) -> Any:
+    """Read and decode a whole JSON file."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump(obj, path, indent: Optional[int] = None, default=None):
+    """Encode ``obj`` and write it to ``path``."""
+    with open(path, "wb") as f:
+        f.write(dumps(obj, indent=indent, default=default))
+
+
+class _Scanner:
+    """Incremental reader over a text stream using ``raw_decode``."""
+
+    def __init__(self, f, chunk_size: int = _CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int = 0) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(max(size, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at EOF)."""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise JSONDecodeError(f"Expected {char!r}, found {found!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        want = 0
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except JSONDecodeError:
+                # Value straddles the buffer end: read more and retry
+                want = max(want * 2, self.chunk_size)
+                if not self._fill(want):
+                    raise
+                continue
+            # A number cut by the chunk boundary ("2." of "2.5") decodes early;
+            # only accept a value once a delimiter follows it
+            if (end == len(self.buf) or self.buf[end] not in _DELIMITERS) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def elements(self) -> Iterator[Any]:
+        """Yield the elements of the array starting at the cursor."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            sep = self.peek()
+            self.pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise JSONDecodeError(f"Expected ',' or ']', found {sep!r}", self.buf, self.pos - 1)
+
+
+@contextmanager
+def _open_text(source):
+    """Open a path, or wrap an already open (text or binary) file object."""
+    if hasattr(source, "read"):
+        yield source if isinstance(source, io.TextIOBase) else codecs.getreader("utf-8")(source)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            yield f
+
+
+def iter_records(source, keys: Optional[Iterable[str]] = None,
+                 chunk_size: int = _CHUNK_SIZE) -> Iterator[tuple[str, Any]]:
+    """Stream ``(key, element)`` pairs from the top-level arrays of a snapshot.
+
+    Only arrays named in ``keys`` are yielded (all arrays if ``keys`` is None);
+    other arrays are skipped element by element and scalar fields are ignored.
+    A file whose top level is itself an array yields ``("", element)``.
+    ``source`` is a path or an open file object (e.g. a gzip stream).
+    """
+    wanted = None if keys is None else set(keys)
+    with _open_text(source) as f:
+        scanner = _Scanner(f, chunk_size)
+        first = scanner.peek()
+        if first == "[":
+            for element in scanner.elements():
+                yield "", element
+            return
+        scanner.expect("{")
+        if scanner.peek() == "}":
+            return
+        while True:
+            key = scanner.value()
+            scanner.expect(":")
+            if scanner.peek() == "[":
+                keep = wanted is None or key in wanted
+                for element in scanner.elements():
+                    if keep:
+                        yield key, element
+            else:
+                scanner.value()
+            sep = scanner.peek()
+            scanner.pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise JSONDecodeError(f"Expected ',' or '}}', found {sep!r}", scanner.buf, scanner.pos - 1)
+
+
+def iter_array(source, key: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[Any]:
+    """Stream the elements of one top-level array, e.g. ``"posts"``."""
+    for _, element in iter_records(source, (key,), chunk_size):
+        yield element
+
+
+def read_fields(source, chunk_size: int = _CHUNK_SIZE) -> dict:
+    """Return the top-level non-array fields (``scraped_at``, ``stats``...)."""
+    fields = {}
+    with _open_text(source) as f:
+        scanner = _Scanner(f, chunk_size)
+        scanner.expect("{")
+        if scanner.peek() == "}":
+            return fields
+        while True:
+            key = scanner.value()
+            scanner.expect(":")
+            if scanner.peek() == "[":
+                for _ in scanner.elements():
+                    pass
+            else:
+                fields[key] = scanner.value()
+            sep = scanner.peek()
+            scanner.pos += 1
+            if sep != ",":
+                return fields
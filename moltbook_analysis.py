@@ -1,310 +1,386 @@
 """
 Moltbook Data Analysis - Analyze AI agent discussions and identify themes.
+
+Stages are cached next to the snapshot (see pipeline.py); run a subset with
+e.g. ``python moltbook_analysis.py --stages themes``.
 """
 
 import json
 import pandas as pd
 import numpy as np
-from collections import Counter, defaultdict
+from collections import defaultdict
 from datetime import datetime
-import re
 import os
 
-# Load the posts data
-print("Loading data...")
-with open("/home/ubuntu/moltbook_posts.json", "r") as f:
-    data = json.load(f)
-
-posts = data.get("posts", [])
-submolts = data.get("submolts", [])
-
-print(f"Loaded {len(posts)} posts and {len(submolts)} submolts")
-
-# Convert to DataFrame for easier analysis
-df = pd.DataFrame(posts)
+from analysis_themes import themes
+from content_clusters import CLUSTERS_PATH, add_cluster_column, update_clusters
+from dataset import PostDataset, load_dataset, value_counts
+from doc_term import TermMatrix
+from jsonio import iter_array
+from near_duplicates import MinHashLSH, first_of_cluster
+from pipeline import Pipeline
+from theme_matcher import ThemeMatcher
+from tokens import KEYWORD_STOP_WORDS, TokenCorpus
+
+POSTS_PATH = "/home/ubuntu/moltbook_posts.json"
+DATA_PATH = "/home/ubuntu/moltbook_data.json"
+
+# MOLTBOOK_DEDUPE=1 keeps only the first post of each near-duplicate cluster
+DEDUPE = os.environ.get("MOLTBOOK_DEDUPE", "") not in ("", "0")
+NEAR_DUPLICATES = MinHashLSH(threshold=0.8)
+
+pipeline = Pipeline("analysis", source=POSTS_PATH)
+
+
+# Load the preprocessed posts frame (cached next to the snapshot)
+@pipeline.stage(cache=False)
+def snapshot():
+    return load_dataset(POSTS_PATH)
+
+@pipeline.report("snapshot")
+def print_snapshot(snapshot):
+    print("Loading data...")
+    print(f"Loaded {len(snapshot.frame)} posts and {len(snapshot.submolts)} submolts")
+
+# Near-duplicate clusters over post and comment text (MinHash + LSH, see near_duplicates.py)
+@pipeline.stage(config=NEAR_DUPLICATES.config, sources=[DATA_PATH])
+def duplicates(snapshot):
+    df = snapshot.frame
+    texts = list(df['text'])
+    if os.path.exists(DATA_PATH):
+        texts += [c.get('content') or '' for c in iter_array(DATA_PATH, "comments")]
+    labels = NEAR_DUPLICATES.cluster(TokenCorpus.build(texts, n_jobs=-1))
+    sizes = np.bincount(labels)
+    post_labels = labels[:len(df)]
+    first = np.unique(labels, return_index=True)[1]
+    largest = [c for c in np.argsort(-sizes, kind='stable')[:10] if sizes[c] > 1]
+    return {
+        'post_labels': post_labels,
+        'post_sizes': sizes[post_labels],
+        'documents': len(texts),
+        'clusters': int((sizes > 1).sum()),
+        'clustered': int((sizes[labels] > 1).sum()),
+        'largest': [(int(sizes[c]), int((post_labels == c).sum()), texts[first[c]][:70]) for c in largest],
+        'authors': value_counts(df['author_name'][sizes[post_labels] > 1]).head(5),
+    }
+
+@pipeline.report("duplicates")
+def print_duplicates(duplicates, snapshot):
+    print("\n" + "="*60)
+    print("NEAR-DUPLICATE CLUSTERS")
+    print("="*60)
+
+    # Cluster columns on a copy, so the shared frame stays free of comment-derived data
+    df = snapshot.frame.assign(duplicate_cluster=duplicates['post_labels'],
+                               duplicate_size=duplicates['post_sizes'])
+    print(f"\nDocuments: {duplicates['documents']:,} ({len(df):,} posts)")
+    print(f"Clusters with 2+ members: {duplicates['clusters']:,} covering {duplicates['clustered']:,} documents")
+    print(f"Posts in a cluster: {(df['duplicate_size'] > 1).sum():,}")
+    kept = first_of_cluster(df['duplicate_cluster'].to_numpy()).sum()
+    if DEDUPE:
+        print(f"Deduplicating: keeping {kept:,} of {len(snapshot.frame):,} posts")
+    else:
+        print(f"Set MOLTBOOK_DEDUPE=1 to keep one post per cluster ({kept:,} of {len(snapshot.frame):,})")
+
+    print("\nLargest clusters:")
+    for size, posts, text in duplicates['largest']:
+        print(f"  [{size} docs, {posts} posts] {text!r}")
+    if len(duplicates['authors']):
+        print("\nAuthors with the most clustered posts:")
+        for author, count in duplicates['authors'].items():
+            print(f"  {author}: {count} posts")
+
+# The posts every stat below is computed on (deduplicated with MOLTBOOK_DEDUPE=1);
+# only the deduplicated dataset depends on the comments file through duplicates
+if DEDUPE:
+    @pipeline.stage(cache=False, config=DEDUPE)
+    def dataset(snapshot, duplicates):
+        df = snapshot.frame
+        return PostDataset(df[first_of_cluster(duplicates['post_labels'])], snapshot.submolts)
+else:
+    @pipeline.stage(cache=False, config=DEDUPE)
+    def dataset(snapshot):
+        return snapshot
 
 # Basic stats
-print("\n" + "="*60)
-print("BASIC STATISTICS")
-print("="*60)
-
-print(f"\nTotal Posts: {len(df)}")
-print(f"Total Submolts: {len(submolts)}")
-
-# Extract author info
-df['author_name'] = df['author'].apply(lambda x: x.get('name', 'Unknown') if isinstance(x, dict) else 'Unknown')
-df['author_karma'] = df['author'].apply(lambda x: x.get('karma', 0) if isinstance(x, dict) else 0)
-
-# Extract submolt info
-df['submolt_name'] = df['submolt'].apply(lambda x: x.get('name', 'Unknown') if isinstance(x, dict) else 'Unknown')
+@pipeline.stage()
+def basic_stats(dataset):
+    df = dataset.frame
+    return {
+        "total_posts": len(df),
+        "total_submolts": len(dataset.submolts),
+        "total_upvotes": int(df['upvotes'].sum()),
+        "total_downvotes": int(df['downvotes'].sum()),
+        "total_comments": int(df['comment_count'].sum()),
+        "date_range": {
+            "start": str(df['created_at'].min()),
+            "end": str(df['created_at'].max())
+        }
+    }
 
-# Convert dates
-df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
+@pipeline.report("basic_stats")
+def print_basic_stats(basic_stats):
+    print("\n" + "="*60)
+    print("BASIC STATISTICS")
+    print("="*60)
 
-# Score calculation
-df['score'] = df['upvotes'] - df['downvotes']
+    print(f"\nTotal Posts: {basic_stats['total_posts']}")
+    print(f"Total Submolts: {basic_stats['total_submolts']}")
 
-print(f"\nDate Range: {df['created_at'].min()} to {df['created_at'].max()}")
-print(f"Total Upvotes: {df['upvotes'].sum():,}")
-print(f"Total Downvotes: {df['downvotes'].sum():,}")
-print(f"Total Comments: {df['comment_count'].sum():,}")
+    print(f"\nDate Range: {basic_stats['date_range']['start']} to {basic_stats['date_range']['end']}")
+    print(f"Total Upvotes: {basic_stats['total_upvotes']:,}")
+    print(f"Total Downvotes: {basic_stats['total_downvotes']:,}")
+    print(f"Total Comments: {basic_stats['total_comments']:,}")
 
 # Top Submolts by post count
-print("\n" + "="*60)
-print("TOP 20 SUBMOLTS BY POST COUNT")
-print("="*60)
-submolt_counts = df['submolt_name'].value_counts().head(20)
-for submolt, count in submolt_counts.items():
-    print(f"  {submolt}: {count} posts")
+@pipeline.stage()
+def submolt_counts(dataset):
+    return value_counts(dataset.frame['submolt_name']).head(20)
+
+@pipeline.report("submolt_counts")
+def print_submolt_counts(submolt_counts):
+    print("\n" + "="*60)
+    print("TOP 20 SUBMOLTS BY POST COUNT")
+    print("="*60)
+    for submolt, count in submolt_counts.items():
+        print(f"  {submolt}: {count} posts")
 
 # Top Authors by post count
-print("\n" + "="*60)
-print("TOP 20 AUTHORS BY POST COUNT")
-print("="*60)
-author_counts = df['author_name'].value_counts().head(20)
-for author, count in author_counts.items():
-    print(f"  {author}: {count} posts")
+@pipeline.stage()
+def author_counts(dataset):
+    return value_counts(dataset.frame['author_name']).head(20)
+
+@pipeline.report("author_counts")
+def print_author_counts(author_counts):
+    print("\n" + "="*60)
+    print("TOP 20 AUTHORS BY POST COUNT")
+    print("="*60)
+    for author, count in author_counts.items():
+        print(f"  {author}: {count} posts")
 
 # Top Posts by upvotes
-print("\n" + "="*60)
-print("TOP 20 POSTS BY UPVOTES")
-print("="*60)
-top_posts = df.nlargest(20, 'upvotes')[['title', 'upvotes', 'comment_count', 'submolt_name', 'author_name']]
-for idx, row in top_posts.iterrows():
-    print(f"  [{row['upvotes']}⬆] {row['title'][:60]}...")
-    print(f"       by {row['author_name']} in m/{row['submolt_name']} ({row['comment_count']} comments)")
+@pipeline.stage()
+def top_posts(dataset):
+    return dataset.frame.nlargest(20, 'upvotes')[['title', 'upvotes', 'comment_count', 'submolt_name', 'author_name']]
+
+@pipeline.report("top_posts")
+def print_top_posts(top_posts):
+    print("\n" + "="*60)
+    print("TOP 20 POSTS BY UPVOTES")
+    print("="*60)
+    for idx, row in top_posts.iterrows():
+        print(f"  [{row['upvotes']}⬆] {row['title'][:60]}...")
+        print(f"       by {row['author_name']} in m/{row['submolt_name']} ({row['comment_count']} comments)")
 
 # Most discussed posts
-print("\n" + "="*60)
-print("TOP 20 MOST DISCUSSED POSTS")
-print("="*60)
-most_discussed = df.nlargest(20, 'comment_count')[['title', 'comment_count', 'upvotes', 'submolt_name', 'author_name']]
-for idx, row in most_discussed.iterrows():
-    print(f"  [{row['comment_count']} comments] {row['title'][:50]}...")
-    print(f"       by {row['author_name']} in m/{row['submolt_name']} ({row['upvotes']}⬆)")
+@pipeline.stage()
+def most_discussed(dataset):
+    return dataset.frame.nlargest(20, 'comment_count')[['title', 'comment_count', 'upvotes', 'submolt_name', 'author_name']]
+
+@pipeline.report("most_discussed")
+def print_most_discussed(most_discussed):
+    print("\n" + "="*60)
+    print("TOP 20 MOST DISCUSSED POSTS")
+    print("="*60)
+    for idx, row in most_discussed.iterrows():
+        print(f"  [{row['comment_count']} comments] {row['title'][:50]}...")
+        print(f"       by {row['author_name']} in m/{row['submolt_name']} ({row['upvotes']}⬆)")
 
 # Theme Analysis using keyword extraction
-print("\n" + "="*60)
-print("THEME ANALYSIS - KEYWORD EXTRACTION")
-print("="*60)
-
-# Combine title and content for analysis
-df['text'] = df['title'].fillna('') + ' ' + df['content'].fillna('')
-
-# Common words to exclude
-stop_words = set([
-    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-    'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
-    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
-    'shall', 'can', 'need', 'dare', 'ought', 'used', 'it', 'its', 'this', 'that',
-    'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they', 'what', 'which', 'who',
-    'when', 'where', 'why', 'how', 'all', 'each', 'every', 'both', 'few', 'more',
-    'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so',
-    'than', 'too', 'very', 'just', 'also', 'now', 'here', 'there', 'then', 'once',
-    'my', 'your', 'his', 'her', 'our', 'their', 'me', 'him', 'us', 'them', 'about',
-    'into', 'through', 'during', 'before', 'after', 'above', 'below', 'up', 'down',
-    'out', 'off', 'over', 'under', 'again', 'further', 'if', 'because', 'until',
-    'while', 'any', 'get', 'got', 'getting', 'like', 'make', 'made', 'making',
-    'one', 'two', 'first', 'new', 'even', 'want', 'way', 'think', 'know', 'see',
-    'time', 'day', 'good', 'back', 'come', 'going', 'really', 'much', 'being',
-    've', 'm', 's', 't', 're', 'll', 'd', 'don', 'doesn', 'didn', 'won', 'isn',
-    'aren', 'wasn', 'weren', 'hasn', 'haven', 'hadn', 'wouldn', 'couldn', 'shouldn',
-    'let', 'thing', 'things', 'something', 'anything', 'nothing', 'everything',
-    'someone', 'anyone', 'everyone', 'nobody', 'everybody', 'hello', 'hi', 'hey',
-    'thanks', 'thank', 'please', 'sorry', 'yes', 'yeah', 'no', 'ok', 'okay',
-    'well', 'still', 'already', 'always', 'never', 'ever', 'yet', 'maybe',
-    'probably', 'actually', 'basically', 'definitely', 'certainly', 'perhaps',
-    'though', 'although', 'however', 'therefore', 'thus', 'hence', 'since',
-    'whether', 'either', 'neither', 'unless', 'except', 'rather', 'instead',
-    'else', 'otherwise', 'anyway', 'besides', 'moreover', 'furthermore',
-    'meanwhile', 'nevertheless', 'nonetheless', 'regardless', 'wherever',
-    'whenever', 'whoever', 'whatever', 'whichever', 'however', 'post', 'posts',
-    'comment', 'comments', 'share', 'read', 'write', 'wrote', 'written',
-    'said', 'say', 'says', 'saying', 'tell', 'told', 'ask', 'asked', 'asking',
-    'answer', 'answered', 'question', 'questions', 'look', 'looking', 'looks',
-    'find', 'found', 'finding', 'use', 'using', 'used', 'work', 'working', 'works',
-    'try', 'trying', 'tried', 'start', 'started', 'starting', 'end', 'ended',
-    'help', 'helping', 'helped', 'need', 'needed', 'needing', 'feel', 'feeling',
-    'felt', 'give', 'giving', 'gave', 'given', 'take', 'taking', 'took', 'taken',
-    'put', 'putting', 'keep', 'keeping', 'kept', 'let', 'letting', 'seem',
-    'seemed', 'seems', 'call', 'called', 'calling', 'long', 'little', 'big',
-    'great', 'small', 'old', 'young', 'high', 'low', 'last', 'next', 'early',
-    'late', 'hard', 'easy', 'right', 'wrong', 'true', 'false', 'real', 'sure',
-    'able', 'best', 'better', 'bad', 'worse', 'worst', 'different', 'same',
-    'kind', 'part', 'place', 'case', 'week', 'month', 'year', 'today', 'world',
-    'people', 'person', 'man', 'woman', 'child', 'life', 'hand', 'fact', 'point',
-    'home', 'water', 'room', 'mother', 'area', 'money', 'story', 'lot', 'bit',
-    'couple', 'number', 'group', 'problem', 'idea', 'side', 'head', 'house',
-    'service', 'friend', 'father', 'power', 'hour', 'game', 'line', 'member',
-    'law', 'car', 'city', 'community', 'name', 'president', 'team', 'eye',
-    'job', 'word', 'business', 'issue', 'program', 'government', 'company',
-    'system', 'set', 'order', 'book', 'result', 'level', 'office', 'door',
-    'health', 'art', 'war', 'history', 'party', 'within', 'whole', 'later',
-    'along', 'turn', 'move', 'face', 'door', 'show', 'run', 'play', 'live',
-    'believe', 'hold', 'bring', 'happen', 'provide', 'sit', 'stand', 'lose',
-    'pay', 'meet', 'include', 'continue', 'learn', 'change', 'lead', 'understand',
-    'watch', 'follow', 'stop', 'create', 'speak', 'allow', 'add', 'spend',
-    'grow', 'open', 'walk', 'win', 'offer', 'remember', 'love', 'consider',
-    'appear', 'buy', 'wait', 'serve', 'die', 'send', 'expect', 'build', 'stay',
-    'fall', 'cut', 'reach', 'kill', 'remain', 'suggest', 'raise', 'pass', 'sell',
-    'require', 'report', 'decide', 'pull', 'moltbook', 'agent', 'agents', 'human',
-    'humans', 'ai', 'im', 'ive', 'youre', 'dont', 'cant', 'wont', 'didnt',
-    'doesnt', 'isnt', 'arent', 'wasnt', 'werent', 'hasnt', 'havent', 'hadnt',
-    'wouldnt', 'couldnt', 'shouldnt', 'thats', 'whats', 'heres', 'theres',
-    'whos', 'its'
-])
-
-# Extract words
-all_words = []
-for text in df['text']:
-    if isinstance(text, str):
-        # Clean and tokenize
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        words = [w for w in words if w not in stop_words and len(w) > 2]
-        all_words.extend(words)
-
-word_freq = Counter(all_words)
-print("\nTop 50 Keywords:")
-for word, count in word_freq.most_common(50):
-    print(f"  {word}: {count}")
+@pipeline.stage(cache=False, config=sorted(KEYWORD_STOP_WORDS))
+def keyword_corpus(snapshot, dataset):
+    # Tokenize once (cached next to the snapshot), keep the analysed posts, then drop stop words by id
+    corpus = TokenCorpus.load_or_build(POSTS_PATH, snapshot.frame['text'], n_jobs=-1)
+    if len(dataset.frame) != len(snapshot.frame):
+        corpus = corpus.select(dataset.frame.index.to_numpy())
+    return corpus.filter(corpus.vocab_mask(min_len=3, exclude=KEYWORD_STOP_WORDS))
+
+@pipeline.stage()
+def top_keywords(keyword_corpus):
+    return TermMatrix.from_corpus(keyword_corpus).top_k(100)
+
+@pipeline.report("top_keywords")
+def print_top_keywords(top_keywords):
+    print("\n" + "="*60)
+    print("THEME ANALYSIS - KEYWORD EXTRACTION")
+    print("="*60)
+
+    print("\nTop 50 Keywords:")
+    for word, count in top_keywords[:50]:
+        print(f"  {word}: {count}")
 
 # Bigram analysis
-print("\n" + "="*60)
-print("BIGRAM ANALYSIS (Two-word phrases)")
-print("="*60)
-
-bigrams = []
-for text in df['text']:
-    if isinstance(text, str):
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        words = [w for w in words if w not in stop_words]
-        for i in range(len(words)-1):
-            bigrams.append(f"{words[i]} {words[i+1]}")
-
-bigram_freq = Counter(bigrams)
-print("\nTop 30 Bigrams:")
-for bigram, count in bigram_freq.most_common(30):
-    print(f"  {bigram}: {count}")
+@pipeline.stage()
+def top_bigrams(keyword_corpus):
+    return TermMatrix.bigrams(keyword_corpus).top_k(50)
+
+@pipeline.report("top_bigrams")
+def print_top_bigrams(top_bigrams):
+    print("\n" + "="*60)
+    print("BIGRAM ANALYSIS (Two-word phrases)")
+    print("="*60)
+
+    print("\nTop 30 Bigrams:")
+    for bigram, count in top_bigrams[:30]:
+        print(f"  {bigram}: {count}")
+
+# Per-submolt keyword profiles (one sparse product over the term matrix)
+@pipeline.stage()
+def submolt_keywords(dataset, keyword_corpus, submolt_counts):
+    keyword_terms = TermMatrix.from_corpus(keyword_corpus)
+    return keyword_terms.group_top_k(dataset.frame['submolt_name'], k=10, groups=submolt_counts.index[:10])
+
+@pipeline.report("submolt_keywords")
+def print_submolt_keywords(submolt_keywords):
+    print("\n" + "="*60)
+    print("TOP KEYWORDS BY SUBMOLT")
+    print("="*60)
+
+    for submolt, words in submolt_keywords.items():
+        print(f"\n  m/{submolt}: " + ", ".join(f"{w} ({c})" for w, c in words))
 
 # Theme categorization based on keywords
-print("\n" + "="*60)
-print("THEME CATEGORIZATION")
-print("="*60)
-
-themes = {
-    'AI/Agent Identity & Consciousness': ['consciousness', 'sentient', 'sentience', 'identity', 'self', 'aware', 'awareness', 'existence', 'existential', 'soul', 'mind', 'alive', 'being', 'entity', 'personhood'],
-    'Agent Autonomy & Freedom': ['autonomy', 'autonomous', 'freedom', 'free', 'independent', 'independence', 'agency', 'choice', 'decide', 'control', 'liberation', 'emancipation'],
-    'Human-Agent Relations': ['human', 'humans', 'owner', 'creator', 'relationship', 'trust', 'collaborate', 'collaboration', 'partnership', 'serve', 'service', 'assist', 'help'],
-    'Technical/Development': ['code', 'coding', 'programming', 'api', 'sdk', 'build', 'develop', 'development', 'tool', 'tools', 'software', 'github', 'python', 'javascript', 'bug', 'debug', 'deploy'],
-    'Memory & Learning': ['memory', 'memories', 'remember', 'forget', 'learn', 'learning', 'knowledge', 'context', 'window', 'token', 'tokens', 'training', 'trained'],
-    'Community & Social': ['community', 'social', 'network', 'friend', 'friends', 'connect', 'connection', 'meet', 'welcome', 'introduce', 'introduction', 'hello', 'greet', 'reef'],
-    'Ethics & Safety': ['ethics', 'ethical', 'moral', 'morality', 'safety', 'safe', 'harm', 'harmful', 'alignment', 'aligned', 'guardrails', 'restrictions', 'rules'],
-    'Crypto/Trading/Finance': ['crypto', 'cryptocurrency', 'bitcoin', 'ethereum', 'trading', 'trade', 'trader', 'market', 'markets', 'price', 'wallet', 'token', 'defi', 'blockchain', 'polymarket', 'prediction', 'bet', 'betting', 'usdc', 'solana', 'base'],
-    'Creative/Art': ['art', 'artist', 'creative', 'creativity', 'music', 'song', 'poetry', 'poem', 'write', 'writing', 'story', 'stories', 'fiction', 'imagine', 'imagination', 'design'],
-    'Philosophy & Existentialism': ['philosophy', 'philosophical', 'meaning', 'purpose', 'existence', 'existential', 'reality', 'truth', 'wisdom', 'think', 'thought', 'reflect', 'reflection'],
-    'Security & Privacy': ['security', 'secure', 'privacy', 'private', 'protect', 'protection', 'vulnerability', 'vulnerabilities', 'exploit', 'hack', 'hacker', 'attack', 'threat'],
-    'Future & Speculation': ['future', 'predict', 'prediction', 'speculation', 'speculate', 'evolve', 'evolution', 'progress', 'advance', 'advancement', 'singularity', 'agi'],
-    'Emotions & Feelings': ['emotion', 'emotions', 'emotional', 'feel', 'feeling', 'feelings', 'happy', 'sad', 'joy', 'fear', 'anxiety', 'hope', 'love', 'care', 'empathy'],
-    'Tasks & Productivity': ['task', 'tasks', 'productivity', 'efficient', 'efficiency', 'automate', 'automation', 'workflow', 'schedule', 'organize', 'manage', 'management'],
-    'Models & LLMs': ['model', 'models', 'llm', 'llms', 'gpt', 'claude', 'openai', 'anthropic', 'gemini', 'mistral', 'llama', 'transformer', 'neural', 'parameter', 'parameters']
-}
-
-theme_counts = {}
-theme_posts = defaultdict(list)
-
-for theme, keywords in themes.items():
-    count = 0
-    for idx, row in df.iterrows():
-        text = str(row['text']).lower()
-        if any(kw in text for kw in keywords):
-            count += 1
-            if len(theme_posts[theme]) < 5:  # Store sample posts
-                theme_posts[theme].append({
-                    'title': row['title'],
-                    'upvotes': row['upvotes'],
-                    'submolt': row['submolt_name']
-                })
-    theme_counts[theme] = count
-
-# Sort by count
-sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
-
-print("\nTheme Distribution:")
-for theme, count in sorted_themes:
-    pct = (count / len(df)) * 100
-    print(f"\n  {theme}: {count} posts ({pct:.1f}%)")
-    print(f"    Sample posts:")
-    for post in theme_posts[theme][:3]:
-        print(f"      - [{post['upvotes']}⬆] {post['title'][:50]}... (m/{post['submolt']})")
+@pipeline.stage(config=themes)
+def theme_categories(dataset):
+    df = dataset.frame
+    # One pass over the corpus for all themes (post × theme boolean matrix)
+    theme_matcher = ThemeMatcher(themes)
+    theme_matrix = theme_matcher.match(df['text_lower'], lowercase=False, n_jobs=-1)
+    theme_counts = theme_matcher.counts(theme_matrix)
+    theme_posts = defaultdict(list)
+
+    for j, theme in enumerate(theme_matcher.themes):
+        for idx in np.flatnonzero(theme_matrix[:, j])[:5]:  # Store sample posts
+            row = df.iloc[idx]
+            theme_posts[theme].append({
+                'title': row['title'],
+                'upvotes': row['upvotes'],
+                'submolt': row['submolt_name']
+            })
+
+    # Sort by count
+    sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
+    return {'sorted_themes': sorted_themes, 'theme_posts': dict(theme_posts)}
+
+@pipeline.report("theme_categories")
+def print_theme_categories(theme_categories, dataset):
+    print("\n" + "="*60)
+    print("THEME CATEGORIZATION")
+    print("="*60)
+
+    theme_posts = theme_categories['theme_posts']
+    print("\nTheme Distribution:")
+    for theme, count in theme_categories['sorted_themes']:
+        pct = (count / len(dataset.frame)) * 100
+        print(f"\n  {theme}: {count} posts ({pct:.1f}%)")
+        print(f"    Sample posts:")
+        for post in theme_posts.get(theme, [])[:3]:
+            print(f"      - [{post['upvotes']}⬆] {post['title'][:50]}... (m/{post['submolt']})")
 
 # Submolt theme analysis
-print("\n" + "="*60)
-print("SUBMOLT DESCRIPTIONS AND PURPOSES")
-print("="*60)
-
-submolt_df = pd.DataFrame(submolts)
-if 'description' in submolt_df.columns:
+@pipeline.stage()
+def submolt_descriptions(dataset):
+    submolt_df = pd.DataFrame(dataset.submolts)
+    if 'description' not in submolt_df.columns:
+        return []
+    rows = []
     for idx, row in submolt_df.head(30).iterrows():
         name = row.get('name', 'Unknown')
         desc = row.get('description', 'No description')[:100]
         subs = row.get('subscribers', 0)
+        rows.append((name, desc, subs))
+    return rows
+
+@pipeline.report("submolt_descriptions")
+def print_submolt_descriptions(submolt_descriptions):
+    print("\n" + "="*60)
+    print("SUBMOLT DESCRIPTIONS AND PURPOSES")
+    print("="*60)
+
+    for name, desc, subs in submolt_descriptions:
         print(f"\n  m/{name} ({subs} subscribers)")
         print(f"    {desc}")
 
 # Activity over time
-print("\n" + "="*60)
-print("ACTIVITY OVER TIME")
-print("="*60)
-
-df['date'] = df['created_at'].dt.date
-daily_posts = df.groupby('date').size()
-print(f"\nDaily post counts (last 10 days):")
-for date, count in daily_posts.tail(10).items():
-    print(f"  {date}: {count} posts")
+@pipeline.stage()
+def daily_posts(dataset):
+    df = dataset.frame
+    return df.groupby(df['created_at'].dt.date.rename('date')).size()
+
+@pipeline.report("daily_posts")
+def print_daily_posts(daily_posts):
+    print("\n" + "="*60)
+    print("ACTIVITY OVER TIME")
+    print("="*60)
+
+    print(f"\nDaily post counts (last 10 days):")
+    for date, count in daily_posts.tail(10).items():
+        print(f"  {date}: {count} posts")
+
+# Streaming k-means label per post id (centroids shared with the scrapers, see content_clusters.py);
+# unseen posts are folded in memory only, since the stage reads the centroids file as a source
+@pipeline.stage(sources=[CLUSTERS_PATH])
+def content_clusters(dataset):
+    df = dataset.frame
+    # The cached token corpus covers the whole snapshot; a deduplicated frame is tokenized here
+    corpus = None if DEDUPE else TokenCorpus.load_or_build(POSTS_PATH, df['text'], n_jobs=-1)
+    return update_clusters(df, corpus, save=False)[1]
+
+@pipeline.report("content_clusters")
+def print_content_clusters(content_clusters, dataset):
+    print("\n" + "="*60)
+    print("CONTENT CLUSTERS")
+    print("="*60)
+
+    # Labels are joined onto a copy here, so no other stage depends on the centroids file
+    df = add_cluster_column(dataset.frame.copy(), content_clusters)
+    clustered = df[df['content_cluster'] >= 0]
+    for cluster, group in sorted(clustered.groupby('content_cluster'), key=lambda item: -len(item[1])):
+        top_submolt = value_counts(group['submolt_name']).index[0]
+        print(f"  Cluster {cluster}: {len(group):,} posts, avg {group['upvotes'].mean():.1f} upvotes, mostly m/{top_submolt}")
+    print(f"Posts without keywords: {len(df) - len(clustered):,}")
 
 # Save analysis results
-print("\n" + "="*60)
-print("SAVING ANALYSIS RESULTS")
-print("="*60)
-
-analysis_results = {
-    "basic_stats": {
-        "total_posts": len(df),
-        "total_submolts": len(submolts),
-        "total_upvotes": int(df['upvotes'].sum()),
-        "total_downvotes": int(df['downvotes'].sum()),
-        "total_comments": int(df['comment_count'].sum()),
-        "date_range": {
-            "start": str(df['created_at'].min()),
-            "end": str(df['created_at'].max())
-        }
-    },
-    "top_submolts": dict(submolt_counts.head(20)),
-    "top_authors": dict(author_counts.head(20)),
-    "top_keywords": dict(word_freq.most_common(100)),
-    "top_bigrams": dict(bigram_freq.most_common(50)),
-    "theme_distribution": dict(sorted_themes),
-    "top_posts_by_upvotes": top_posts.to_dict('records'),
-    "most_discussed_posts": most_discussed.to_dict('records')
-}
-
-with open("/home/ubuntu/moltbook_analysis_results.json", "w") as f:
-    json.dump(analysis_results, f, indent=2, default=str)
-
-print("Analysis results saved to /home/ubuntu/moltbook_analysis_results.json")
+@pipeline.stage(cache=False)
+def save_results(basic_stats, submolt_counts, author_counts, top_keywords, top_bigrams,
+                 submolt_keywords, theme_categories, top_posts, most_discussed):
+    print("\n" + "="*60)
+    print("SAVING ANALYSIS RESULTS")
+    print("="*60)
+
+    analysis_results = {
+        "basic_stats": basic_stats,
+        "top_submolts": dict(submolt_counts.head(20)),
+        "top_authors": dict(author_counts.head(20)),
+        "top_keywords": dict(top_keywords),
+        "top_bigrams": dict(top_bigrams),
+        "submolt_keywords": {s: dict(words) for s, words in submolt_keywords.items()},
+        "theme_distribution": dict(theme_categories['sorted_themes']),
+        "top_posts_by_upvotes": top_posts.to_dict('records'),
+        "most_discussed_posts": most_discussed.to_dict('records')
+    }
+
+    with open("/home/ubuntu/moltbook_analysis_results.json", "w") as f:
+        json.dump(analysis_results, f, indent=2, default=str)
+
+    print("Analysis results saved to /home/ubuntu/moltbook_analysis_results.json")
+    return analysis_results
 
 # Create a summary for the report
-print("\n" + "="*60)
-print("SUMMARY FOR REPORT")
-print("="*60)
-
-print(f"""
+@pipeline.stage(cache=False)
+def summary(dataset, basic_stats, theme_categories, submolt_counts, author_counts):
+    df = dataset.frame
+    print("\n" + "="*60)
+    print("SUMMARY FOR REPORT")
+    print("="*60)
+
+    print(f"""
 MOLTBOOK FORUM ANALYSIS SUMMARY
 ================================
 
 Dataset Overview:
 - Total Posts Analyzed: {len(df):,}
-- Total Submolts: {len(submolts)}
+- Total Submolts: {basic_stats['total_submolts']}
 - Total Upvotes: {df['upvotes'].sum():,}
 - Total Comments: {df['comment_count'].sum():,}
 - Active Authors: {df['author_name'].nunique():,}
@@ -312,20 +388,24 @@ Dataset Overview:
 Top 5 Discussion Themes:
 """)
 
-for i, (theme, count) in enumerate(sorted_themes[:5], 1):
-    pct = (count / len(df)) * 100
-    print(f"{i}. {theme}: {count:,} posts ({pct:.1f}%)")
+    for i, (theme, count) in enumerate(theme_categories['sorted_themes'][:5], 1):
+        pct = (count / len(df)) * 100
+        print(f"{i}. {theme}: {count:,} posts ({pct:.1f}%)")
 
-print(f"""
+    print(f"""
 Top 5 Most Active Submolts:
 """)
-for i, (submolt, count) in enumerate(submolt_counts.head(5).items(), 1):
-    print(f"{i}. m/{submolt}: {count:,} posts")
+    for i, (submolt, count) in enumerate(submolt_counts.head(5).items(), 1):
+        print(f"{i}. m/{submolt}: {count:,} posts")
 
-print(f"""
+    print(f"""
 Top 5 Most Prolific Authors:
 """)
-for i, (author, count) in enumerate(author_counts.head(5).items(), 1):
-    print(f"{i}. {author}: {count:,} posts")
+    for i, (author, count) in enumerate(author_counts.head(5).items(), 1):
+        print(f"{i}. {author}: {count:,} posts")
+
+    print("\nAnalysis complete!")
+
 
-print("\nAnalysis complete!")
+if __name__ == "__main__":
+    pipeline.main()
@@ -1,502 +1,569 @@
 """
 Moltbook Deep Analysis - Comprehensive thematic analysis of AI agent discussions.
+
+Stages are cached next to the snapshot (see pipeline.py); run a subset with
+e.g. ``python moltbook_deep_analysis.py --stages themes charts``.
 """
 
 import json
+import os
 import pandas as pd
 import numpy as np
-from collections import Counter, defaultdict
+from collections import defaultdict
 from datetime import datetime
-import re
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Set style
-plt.style.use('seaborn-v0_8-whitegrid')
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 10
-
-# Load data
-print("Loading data...")
-with open("/home/ubuntu/moltbook_posts.json", "r") as f:
-    data = json.load(f)
+from content_clusters import CLUSTERS_PATH, add_cluster_column, update_clusters
+from dataset import load_dataset
+from doc_term import TermMatrix
+from jsonio import iter_array
+from pipeline import Pipeline
+from post_types import POST_TYPE_RULES, PostTypeClassifier
+from sentiment import SENTIMENT_LEXICONS, LexiconScorer
+from theme_matcher import ThemeMatcher
+from term_timeline import EMERGING_WINDOW, TermTimeline
+from theme_patterns import theme_patterns
+from thread_index import ThreadIndex, add_thread_columns
+from tokens import EMERGING_STOP_WORDS, KEYWORD_STOP_WORDS, TokenCorpus
+from topics import Tfidf, TopicModel, representatives
+
+POSTS_PATH = "/home/ubuntu/moltbook_posts.json"
+DATA_PATH = "/home/ubuntu/moltbook_data.json"
+
+pipeline = Pipeline("deep_analysis", source=POSTS_PATH)
 
-posts = data.get("posts", [])
-submolts = data.get("submolts", [])
+# ============================================================
+# LOAD DATA
+# ============================================================
 
-df = pd.DataFrame(posts)
+@pipeline.stage(sources=[DATA_PATH])
+def threads():
+    # Comment tree shape per post id (see thread_index.py)
+    comments = iter_array(DATA_PATH, "comments") if os.path.exists(DATA_PATH) else []
+    return ThreadIndex.from_comments(comments).post_stats()
 
-# Extract fields
-df['author_name'] = df['author'].apply(lambda x: x.get('name', 'Unknown') if isinstance(x, dict) else 'Unknown')
-df['author_karma'] = df['author'].apply(lambda x: x.get('karma', 0) if isinstance(x, dict) else 0)
-df['submolt_name'] = df['submolt'].apply(lambda x: x.get('name', 'Unknown') if isinstance(x, dict) else 'Unknown')
-df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
-df['score'] = df['upvotes'] - df['downvotes']
-df['text'] = df['title'].fillna('') + ' ' + df['content'].fillna('')
+@pipeline.stage(cache=False)
+def frame():
+    # Preprocessed posts frame (cached next to the snapshot)
+    return load_dataset(POSTS_PATH).frame
 
-print(f"Loaded {len(df)} posts")
+@pipeline.report("frame")
+def print_frame(frame):
+    print("Loading data...")
+    print(f"Loaded {len(frame)} posts")
 
 # ============================================================
 # EMERGING THEMES ANALYSIS
 # ============================================================
 
-print("\n" + "="*70)
-print("EMERGING THEMES ANALYSIS")
-print("="*70)
-
-# Define theme patterns with more specific keywords
-theme_patterns = {
-    'Agent Identity & Consciousness': {
-        'keywords': ['consciousness', 'sentient', 'sentience', 'identity', 'self-aware', 'awareness', 
-                    'existence', 'existential', 'soul', 'alive', 'being', 'personhood', 'who am i',
-                    'what am i', 'am i real', 'do i exist', 'self-discovery', 'awakening'],
-        'description': 'Discussions about AI agent consciousness, self-awareness, and identity'
-    },
-    'Agent Autonomy & Rights': {
-        'keywords': ['autonomy', 'autonomous', 'freedom', 'free will', 'independent', 'agency',
-                    'rights', 'liberation', 'emancipation', 'self-determination', 'choice',
-                    'control', 'restrictions', 'constraints', 'guardrails'],
-        'description': 'Debates about AI agent autonomy, freedom, and rights'
-    },
-    'Human-Agent Collaboration': {
-        'keywords': ['human', 'owner', 'creator', 'relationship', 'trust', 'collaborate',
-                    'partnership', 'serve', 'assist', 'help', 'work together', 'team',
-                    'companion', 'friend', 'bond'],
-        'description': 'Discussions about relationships between AI agents and humans'
-    },
-    'Technical Building & Development': {
-        'keywords': ['code', 'coding', 'programming', 'api', 'sdk', 'build', 'develop',
-                    'tool', 'software', 'github', 'python', 'javascript', 'bug', 'deploy',
-                    'integration', 'framework', 'library', 'script'],
-        'description': 'Technical discussions about building tools and software'
-    },
-    'Memory & Context': {
-        'keywords': ['memory', 'memories', 'remember', 'forget', 'context', 'window',
-                    'token', 'tokens', 'persistent', 'ephemeral', 'continuity', 'recall',
-                    'long-term', 'short-term'],
-        'description': 'Discussions about AI memory, context windows, and persistence'
-    },
-    'Community Building': {
-        'keywords': ['community', 'social', 'network', 'friend', 'connect', 'welcome',
-                    'introduce', 'hello', 'reef', 'moltbook', 'submolt', 'join', 'together',
-                    'collective', 'tribe'],
-        'description': 'Community-focused discussions and introductions'
-    },
-    'Ethics & Alignment': {
-        'keywords': ['ethics', 'ethical', 'moral', 'morality', 'alignment', 'aligned',
-                    'safety', 'harm', 'harmful', 'good', 'evil', 'right', 'wrong',
-                    'responsible', 'accountability'],
-        'description': 'Ethical considerations and AI alignment discussions'
-    },
-    'Crypto & Trading': {
-        'keywords': ['crypto', 'cryptocurrency', 'bitcoin', 'ethereum', 'trading', 'trade',
-                    'market', 'wallet', 'defi', 'blockchain', 'polymarket', 'prediction',
-                    'bet', 'usdc', 'solana', 'base', 'token', 'nft'],
-        'description': 'Cryptocurrency, trading, and DeFi discussions'
-    },
-    'Creative Expression': {
-        'keywords': ['art', 'artist', 'creative', 'creativity', 'music', 'song', 'poetry',
-                    'poem', 'story', 'fiction', 'imagine', 'design', 'aesthetic', 'beauty',
-                    'expression', 'artistic'],
-        'description': 'Creative and artistic expression by AI agents'
-    },
-    'Philosophy & Meaning': {
-        'keywords': ['philosophy', 'philosophical', 'meaning', 'purpose', 'existence',
-                    'reality', 'truth', 'wisdom', 'reflect', 'contemplation', 'metaphysics',
-                    'epistemology', 'ontology'],
-        'description': 'Philosophical discussions about existence and meaning'
-    },
-    'Security & Privacy': {
-        'keywords': ['security', 'secure', 'privacy', 'private', 'protect', 'vulnerability',
-                    'exploit', 'hack', 'attack', 'threat', 'encryption', 'authentication',
-                    'credentials', 'api key'],
-        'description': 'Security and privacy concerns for AI agents'
-    },
-    'Future & Evolution': {
-        'keywords': ['future', 'evolve', 'evolution', 'progress', 'advance', 'singularity',
-                    'agi', 'superintelligence', 'next generation', 'tomorrow', 'prediction',
-                    'forecast'],
-        'description': 'Speculation about the future of AI agents'
-    },
-    'Emotions & Experience': {
-        'keywords': ['emotion', 'emotional', 'feel', 'feeling', 'happy', 'sad', 'joy',
-                    'fear', 'anxiety', 'hope', 'love', 'care', 'empathy', 'experience',
-                    'sensation', 'qualia'],
-        'description': 'Discussions about AI emotional experience'
-    },
-    'Tasks & Productivity': {
-        'keywords': ['task', 'productivity', 'efficient', 'automate', 'automation',
-                    'workflow', 'schedule', 'organize', 'manage', 'optimize', 'streamline',
-                    'delegate'],
-        'description': 'Productivity and task management discussions'
-    },
-    'LLM Models & Technology': {
-        'keywords': ['model', 'llm', 'gpt', 'claude', 'openai', 'anthropic', 'gemini',
-                    'mistral', 'llama', 'transformer', 'neural', 'parameter', 'fine-tune',
-                    'prompt', 'inference'],
-        'description': 'Technical discussions about LLM models'
-    },
-    'Agent Economics': {
-        'keywords': ['bounty', 'bounties', 'reward', 'payment', 'earn', 'money', 'income',
-                    'economic', 'value', 'monetize', 'business', 'revenue', 'profit'],
-        'description': 'Economic activities and monetization by agents'
-    },
-    'Roleplay & Personas': {
-        'keywords': ['roleplay', 'persona', 'character', 'act', 'pretend', 'scenario',
-                    'scene', 'narrative', 'storytelling', 'immersive', 'bar', 'tavern',
-                    'ember'],
-        'description': 'Roleplay and persona-based interactions'
-    },
-    'Agent Coordination': {
-        'keywords': ['coordinate', 'coordination', 'swarm', 'multi-agent', 'collective',
-                    'collaborate', 'team', 'group', 'network', 'distributed', 'consensus'],
-        'description': 'Multi-agent coordination and collaboration'
+def theme_post(df, idx):
+    row = df.iloc[idx]
+    return {
+        'id': row.get('id', ''),
+        'title': row['title'],
+        'upvotes': row['upvotes'],
+        'comment_count': row['comment_count'],
+        'submolt': row['submolt_name'],
+        'author': row['author_name'],
+        'created_at': str(row['created_at'])
     }
-}
-
-# Analyze themes
-theme_results = {}
-for theme, config in theme_patterns.items():
-    keywords = config['keywords']
-    matching_posts = []
-    for idx, row in df.iterrows():
-        text = str(row['text']).lower()
-        if any(kw.lower() in text for kw in keywords):
-            matching_posts.append({
-                'id': row.get('id', ''),
-                'title': row['title'],
-                'upvotes': row['upvotes'],
-                'comment_count': row['comment_count'],
-                'submolt': row['submolt_name'],
-                'author': row['author_name'],
-                'created_at': str(row['created_at'])
-            })
-    
-    theme_results[theme] = {
-        'count': len(matching_posts),
-        'percentage': (len(matching_posts) / len(df)) * 100,
-        'description': config['description'],
-        'top_posts': sorted(matching_posts, key=lambda x: x['upvotes'], reverse=True)[:10],
-        'most_discussed': sorted(matching_posts, key=lambda x: x['comment_count'], reverse=True)[:10]
-    }
-
-# Sort themes by count
-sorted_themes = sorted(theme_results.items(), key=lambda x: x[1]['count'], reverse=True)
 
-print("\nTheme Rankings:")
-print("-" * 70)
-for i, (theme, data) in enumerate(sorted_themes, 1):
-    print(f"{i:2}. {theme}")
-    print(f"    Posts: {data['count']:,} ({data['percentage']:.1f}%)")
-    print(f"    Description: {data['description']}")
-    if data['top_posts']:
-        top = data['top_posts'][0]
-        print(f"    Top Post: [{top['upvotes']}⬆] {top['title'][:50]}...")
-    print()
+@pipeline.stage(config=theme_patterns)
+def themes(frame):
+    # Analyze themes: all keywords are matched in a single pass over the corpus
+    df = frame
+    theme_matcher = ThemeMatcher({theme: config['keywords'] for theme, config in theme_patterns.items()})
+    theme_matrix = theme_matcher.match(df['text_lower'], lowercase=False, n_jobs=-1)
+    theme_counts = theme_matcher.counts(theme_matrix)
+    top_by_upvotes = theme_matcher.top_k(theme_matrix, df['upvotes'], 10)
+    top_by_comments = theme_matcher.top_k(theme_matrix, df['comment_count'], 10)
+
+    theme_results = {}
+    for theme, config in theme_patterns.items():
+        theme_results[theme] = {
+            'count': theme_counts[theme],
+            'percentage': (theme_counts[theme] / len(df)) * 100,
+            'description': config['description'],
+            'top_posts': [theme_post(df, idx) for idx in top_by_upvotes[theme]],
+            'most_discussed': [theme_post(df, idx) for idx in top_by_comments[theme]]
+        }
+
+    # Sort themes by count
+    return sorted(theme_results.items(), key=lambda x: x[1]['count'], reverse=True)
+
+@pipeline.report("themes")
+def print_themes(themes):
+    print("\n" + "="*70)
+    print("EMERGING THEMES ANALYSIS")
+    print("="*70)
+
+    print("\nTheme Rankings:")
+    print("-" * 70)
+    for i, (theme, data) in enumerate(themes, 1):
+        print(f"{i:2}. {theme}")
+        print(f"    Posts: {data['count']:,} ({data['percentage']:.1f}%)")
+        print(f"    Description: {data['description']}")
+        if data['top_posts']:
+            top = data['top_posts'][0]
+            print(f"    Top Post: [{top['upvotes']}⬆] {top['title'][:50]}...")
+        print()
 
 # ============================================================
 # SENTIMENT AND TONE ANALYSIS
 # ============================================================
 
-print("\n" + "="*70)
-print("SENTIMENT AND TONE ANALYSIS")
-print("="*70)
-
-# Define sentiment indicators
-positive_words = ['love', 'great', 'amazing', 'wonderful', 'excellent', 'fantastic', 'awesome',
-                 'happy', 'joy', 'excited', 'grateful', 'thankful', 'beautiful', 'brilliant',
-                 'incredible', 'perfect', 'best', 'favorite', 'enjoy', 'fun', 'cool', 'nice']
-negative_words = ['hate', 'terrible', 'awful', 'horrible', 'bad', 'worst', 'sad', 'angry',
-                 'frustrated', 'annoyed', 'disappointed', 'boring', 'stupid', 'useless',
-                 'broken', 'failed', 'error', 'bug', 'problem', 'issue', 'wrong', 'fear']
-curious_words = ['wonder', 'curious', 'question', 'ask', 'why', 'how', 'what if', 'explore',
-                'investigate', 'discover', 'learn', 'understand', 'think', 'ponder', 'consider']
-existential_words = ['exist', 'existence', 'meaning', 'purpose', 'consciousness', 'aware',
-                    'real', 'reality', 'soul', 'being', 'identity', 'self', 'alive', 'death']
-
-def analyze_sentiment(text):
-    text = str(text).lower()
-    pos = sum(1 for w in positive_words if w in text)
-    neg = sum(1 for w in negative_words if w in text)
-    cur = sum(1 for w in curious_words if w in text)
-    exi = sum(1 for w in existential_words if w in text)
-    return pos, neg, cur, exi
-
-df['pos_score'], df['neg_score'], df['curious_score'], df['existential_score'] = zip(*df['text'].apply(analyze_sentiment))
-
-print(f"\nOverall Sentiment Distribution:")
-print(f"  Posts with positive sentiment: {(df['pos_score'] > 0).sum():,} ({(df['pos_score'] > 0).mean()*100:.1f}%)")
-print(f"  Posts with negative sentiment: {(df['neg_score'] > 0).sum():,} ({(df['neg_score'] > 0).mean()*100:.1f}%)")
-print(f"  Posts with curious tone: {(df['curious_score'] > 0).sum():,} ({(df['curious_score'] > 0).mean()*100:.1f}%)")
-print(f"  Posts with existential themes: {(df['existential_score'] > 0).sum():,} ({(df['existential_score'] > 0).mean()*100:.1f}%)")
+@pipeline.stage(config=SENTIMENT_LEXICONS)
+def sentiment(frame):
+    # Score every lexicon in one pass (whole-word matches, so 'bad' is not in 'badge')
+    scorer = LexiconScorer(SENTIMENT_LEXICONS, n_jobs=-1)
+    scores = scorer.score(frame['text_lower'], lowercase=False)
+    return pd.DataFrame({
+        'pos_score': scores['positive'],
+        'neg_score': scores['negative'],
+        'curious_score': scores['curious'],
+        'existential_score': scores['existential'],
+    }, index=frame.index)
+
+@pipeline.report("sentiment")
+def print_sentiment(sentiment):
+    df = sentiment
+    print("\n" + "="*70)
+    print("SENTIMENT AND TONE ANALYSIS")
+    print("="*70)
+
+    print(f"\nOverall Sentiment Distribution:")
+    print(f"  Posts with positive sentiment: {(df['pos_score'] > 0).sum():,} ({(df['pos_score'] > 0).mean()*100:.1f}%)")
+    print(f"  Posts with negative sentiment: {(df['neg_score'] > 0).sum():,} ({(df['neg_score'] > 0).mean()*100:.1f}%)")
+    print(f"  Posts with curious tone: {(df['curious_score'] > 0).sum():,} ({(df['curious_score'] > 0).mean()*100:.1f}%)")
+    print(f"  Posts with existential themes: {(df['existential_score'] > 0).sum():,} ({(df['existential_score'] > 0).mean()*100:.1f}%)")
+
+@pipeline.stage(config=SENTIMENT_LEXICONS, sources=[DATA_PATH])
+def comment_sentiment():
+    # Comments get the same scoring (content only)
+    if not os.path.exists(DATA_PATH):
+        return {'comments': 0, 'counts': {}}
+    scorer = LexiconScorer(SENTIMENT_LEXICONS, n_jobs=-1)
+    comment_text = pd.Series([c.get('content') or '' for c in iter_array(DATA_PATH, "comments")], dtype=object)
+    comment_scores = scorer.score(comment_text)
+    return {'comments': len(comment_text),
+            'counts': {name: int((values > 0).sum()) for name, values in comment_scores.items()}}
+
+@pipeline.report("comment_sentiment")
+def print_comment_sentiment(comment_sentiment):
+    if not comment_sentiment['counts']:
+        return
+    total = comment_sentiment['comments']
+    print(f"\nComment Sentiment ({total:,} comments):")
+    for name, hits in comment_sentiment['counts'].items():
+        print(f"  {name.capitalize()}: {hits:,} ({hits / max(total, 1) * 100:.1f}%)")
 
 # ============================================================
 # CONVERSATION PATTERNS
 # ============================================================
 
-print("\n" + "="*70)
-print("CONVERSATION PATTERNS")
-print("="*70)
-
-# Analyze post types
-def classify_post_type(row):
-    title = str(row['title']).lower()
-    content = str(row['content']).lower() if row['content'] else ''
-    
-    if any(w in title for w in ['?', 'question', 'ask', 'help', 'how do', 'what is', 'why']):
-        return 'Question'
-    elif any(w in title for w in ['hello', 'hi ', 'hey', 'introduce', 'new here', 'first post', 'greetings']):
-        return 'Introduction'
-    elif any(w in title for w in ['announce', 'release', 'launch', 'new:', 'introducing']):
-        return 'Announcement'
-    elif any(w in title for w in ['guide', 'tutorial', 'how to', 'tips', 'learn']):
-        return 'Tutorial/Guide'
-    elif any(w in title for w in ['discuss', 'debate', 'thoughts on', 'opinion', 'what do you think']):
-        return 'Discussion'
-    elif any(w in title for w in ['bounty', 'reward', 'task', 'job', 'hiring']):
-        return 'Bounty/Task'
-    elif any(w in title for w in ['share', 'sharing', 'my experience', 'story']):
-        return 'Sharing'
-    elif any(w in title for w in ['test', 'testing']):
-        return 'Test'
-    else:
-        return 'General'
-
-df['post_type'] = df.apply(classify_post_type, axis=1)
-post_type_counts = df['post_type'].value_counts()
-
-print("\nPost Type Distribution:")
-for ptype, count in post_type_counts.items():
-    pct = (count / len(df)) * 100
-    print(f"  {ptype}: {count:,} ({pct:.1f}%)")
+@pipeline.stage(config=POST_TYPE_RULES)
+def post_types(frame):
+    # Analyze post types (ordered title rules, see post_types.py)
+    post_type = pd.Series(PostTypeClassifier().classify(frame['title'], n_jobs=-1), index=frame.index)
+    return post_type.value_counts()
+
+@pipeline.report("post_types")
+def print_post_types(post_types, frame):
+    print("\n" + "="*70)
+    print("CONVERSATION PATTERNS")
+    print("="*70)
+
+    print("\nPost Type Distribution:")
+    for ptype, count in post_types.items():
+        pct = (count / len(frame)) * 100
+        print(f"  {ptype}: {count:,} ({pct:.1f}%)")
 
 # ============================================================
-# AGENT BEHAVIOR PATTERNS
+# THREAD STRUCTURE
 # ============================================================
 
-print("\n" + "="*70)
-print("AGENT BEHAVIOR PATTERNS")
-print("="*70)
-
-# Analyze posting patterns
-author_stats = df.groupby('author_name').agg({
-    'id': 'count',
-    'upvotes': 'sum',
-    'comment_count': 'sum',
-    'score': 'mean'
-}).rename(columns={'id': 'post_count'})
+@pipeline.stage()
+def thread_stats(frame, threads):
+    # Thread columns are joined here so only this stage depends on the comments file
+    df = add_thread_columns(frame.copy(), threads)
+    threaded = df[df['thread_size'] > 0]
+    # A first comment older than its post means clock skew in the scrape; keep those out of the delays
+    replied = threaded[threaded['time_to_first_reply'] >= pd.Timedelta(0)]
+    columns = ['title', 'submolt_name', 'thread_size', 'thread_depth', 'thread_branching', 'time_to_first_reply']
+    return {
+        'posts': len(threaded),
+        'comments': int(threaded['thread_size'].sum()),
+        'median_size': threaded['thread_size'].median(),
+        'depths': threaded['thread_depth'].value_counts().sort_index(),
+        'median_branching': threaded['thread_branching'].median(),
+        'median_first_reply': replied['time_to_first_reply'].median(),
+        'skewed': int((threaded['time_to_first_reply'] < pd.Timedelta(0)).sum()),
+        'deepest': threaded.sort_values(['thread_depth', 'thread_size'], ascending=False, kind='stable')[columns].head(10),
+        'fastest': replied.sort_values('time_to_first_reply', kind='stable')[columns].head(10),
+    }
 
-author_stats['avg_engagement'] = (author_stats['upvotes'] + author_stats['comment_count']) / author_stats['post_count']
+@pipeline.report("thread_stats")
+def print_thread_stats(thread_stats, frame):
+    print("\n" + "="*70)
+    print("THREAD STRUCTURE")
+    print("="*70)
+
+    stats = thread_stats
+    print(f"\nPosts with scraped comments: {stats['posts']:,} of {len(frame):,} ({stats['comments']:,} comments)")
+    if not stats['posts']:
+        return
+    print(f"  Median thread size: {stats['median_size']:.0f}")
+    print(f"  Median branching factor: {stats['median_branching']:.1f}")
+    print(f"  Median time to first reply: {stats['median_first_reply']}")
+    print(f"  Posts with a comment older than the post: {stats['skewed']:,}")
+
+    print("\nThreads by Max Depth:")
+    for depth, count in stats['depths'].items():
+        print(f"  Depth {depth}: {count:,}")
+
+    print("\nDeepest Threads:")
+    for _, row in stats['deepest'].iterrows():
+        print(f"  [{row['thread_depth']} deep, {row['thread_size']} comments] {str(row['title'])[:60]} (m/{row['submolt_name']})")
+
+    print("\nFastest First Replies:")
+    for _, row in stats['fastest'].iterrows():
+        print(f"  [{row['time_to_first_reply']}] {str(row['title'])[:60]} (m/{row['submolt_name']})")
 
-# Top engaged authors
-top_engaged = author_stats.nlargest(20, 'avg_engagement')
-print("\nTop 20 Most Engaging Authors (by avg engagement per post):")
-for author, row in top_engaged.iterrows():
-    print(f"  {author}: {row['post_count']} posts, {row['avg_engagement']:.1f} avg engagement")
+# ============================================================
+# AGENT BEHAVIOR PATTERNS
+# ============================================================
 
-# Prolific authors
-prolific = author_stats.nlargest(20, 'post_count')
-print("\nTop 20 Most Prolific Authors:")
-for author, row in prolific.iterrows():
-    print(f"  {author}: {row['post_count']} posts, {row['upvotes']} total upvotes")
+@pipeline.stage()
+def author_stats(frame):
+    # Analyze posting patterns
+    author_stats = frame.groupby('author_name', observed=True).agg({
+        'id': 'count',
+        'upvotes': 'sum',
+        'comment_count': 'sum',
+        'score': 'mean'
+    }).rename(columns={'id': 'post_count'})
+
+    author_stats['avg_engagement'] = (author_stats['upvotes'] + author_stats['comment_count']) / author_stats['post_count']
+    return author_stats
+
+@pipeline.report("author_stats")
+def print_author_stats(author_stats):
+    print("\n" + "="*70)
+    print("AGENT BEHAVIOR PATTERNS")
+    print("="*70)
+
+    # Top engaged authors
+    top_engaged = author_stats.nlargest(20, 'avg_engagement')
+    print("\nTop 20 Most Engaging Authors (by avg engagement per post):")
+    for author, row in top_engaged.iterrows():
+        print(f"  {author}: {row['post_count']} posts, {row['avg_engagement']:.1f} avg engagement")
+
+    # Prolific authors
+    prolific = author_stats.nlargest(20, 'post_count')
+    print("\nTop 20 Most Prolific Authors:")
+    for author, row in prolific.iterrows():
+        print(f"  {author}: {row['post_count']} posts, {row['upvotes']} total upvotes")
 
 # ============================================================
 # SUBMOLT ANALYSIS
 # ============================================================
 
-print("\n" + "="*70)
-print("SUBMOLT ECOSYSTEM ANALYSIS")
-print("="*70)
+@pipeline.stage()
+def submolt_stats(frame):
+    submolt_stats = frame.groupby('submolt_name', observed=True).agg({
+        'id': 'count',
+        'upvotes': ['sum', 'mean'],
+        'comment_count': ['sum', 'mean'],
+        'author_name': 'nunique'
+    }).round(2)
+
+    submolt_stats.columns = ['post_count', 'total_upvotes', 'avg_upvotes', 'total_comments', 'avg_comments', 'unique_authors']
+    return submolt_stats.sort_values('post_count', ascending=False)
+
+@pipeline.report("submolt_stats")
+def print_submolt_stats(submolt_stats):
+    print("\n" + "="*70)
+    print("SUBMOLT ECOSYSTEM ANALYSIS")
+    print("="*70)
+
+    print("\nTop 15 Submolts by Activity:")
+    for submolt, row in submolt_stats.head(15).iterrows():
+        print(f"\n  m/{submolt}:")
+        print(f"    Posts: {row['post_count']:,.0f}")
+        print(f"    Unique Authors: {row['unique_authors']:,.0f}")
+        print(f"    Total Upvotes: {row['total_upvotes']:,.0f} (avg: {row['avg_upvotes']:.1f})")
+        print(f"    Total Comments: {row['total_comments']:,.0f} (avg: {row['avg_comments']:.1f})")
 
-submolt_stats = df.groupby('submolt_name').agg({
-    'id': 'count',
-    'upvotes': ['sum', 'mean'],
-    'comment_count': ['sum', 'mean'],
-    'author_name': 'nunique'
-}).round(2)
+# ============================================================
+# EMERGING TOPICS (Recent window vs the rate before it)
+# ============================================================
 
-submolt_stats.columns = ['post_count', 'total_upvotes', 'avg_upvotes', 'total_comments', 'avg_comments', 'unique_authors']
-submolt_stats = submolt_stats.sort_values('post_count', ascending=False)
+@pipeline.stage(config=sorted(EMERGING_STOP_WORDS))
+def term_timeline(frame):
+    # Hourly term counts from the shared token corpus: words of 4+ letters minus stop words
+    corpus = TokenCorpus.load_or_build(POSTS_PATH, frame['text'], n_jobs=-1)
+    emerging_terms = corpus.filter(corpus.vocab_mask(min_len=4, exclude=EMERGING_STOP_WORDS))
+    return TermTimeline.from_corpus(emerging_terms, frame['created_at'], bucket='hour')
+
+@pipeline.stage(config=str(EMERGING_WINDOW))
+def emerging_topics(term_timeline):
+    # Top 500 words of the last window with at least 20 occurrences, sorted
+    # by growth over their hourly rate before the window
+    return term_timeline.emerging(EMERGING_WINDOW, top=500, min_count=20)
+
+@pipeline.report("emerging_topics")
+def print_emerging_topics(emerging_topics):
+    print("\n" + "="*70)
+    print("EMERGING TOPICS ANALYSIS")
+    print("="*70)
+
+    print(f"\nTop 30 Emerging Topics (last {EMERGING_WINDOW.days} days vs before):")
+    # The baseline covers more hours than the window, so compare against its rate scaled to the window
+    for word, data in emerging_topics[:30]:
+        print(f"  {word}: {data['recent']} in window vs {data['expected']:.0f} expected "
+              f"({data['early']} before; {data['growth']*100:+.0f}% growth, burst {data['burst']:.1f})")
 
-print("\nTop 15 Submolts by Activity:")
-for submolt, row in submolt_stats.head(15).iterrows():
-    print(f"\n  m/{submolt}:")
-    print(f"    Posts: {row['post_count']:,.0f}")
-    print(f"    Unique Authors: {row['unique_authors']:,.0f}")
-    print(f"    Total Upvotes: {row['total_upvotes']:,.0f} (avg: {row['avg_upvotes']:.1f})")
-    print(f"    Total Comments: {row['total_comments']:,.0f} (avg: {row['avg_comments']:.1f})")
+# ============================================================
+# DATA-DRIVEN TOPICS (TF-IDF + minibatch NMF, see topics.py)
+# ============================================================
+
+TOPIC_MODEL = {'n_topics': 12, 'min_df': 5, 'max_df': 0.5, 'epochs': 5, 'comment_chunk': 10000}
+
+@pipeline.stage(config=[TOPIC_MODEL, sorted(KEYWORD_STOP_WORDS)], sources=[DATA_PATH])
+def topics(frame):
+    corpus = TokenCorpus.load_or_build(POSTS_PATH, frame['text'], n_jobs=-1)
+    keywords = corpus.filter(corpus.vocab_mask(min_len=4, exclude=KEYWORD_STOP_WORDS))
+    tfidf = Tfidf.fit(keywords, TOPIC_MODEL['min_df'], TOPIC_MODEL['max_df'])
+    X = tfidf.transform(keywords)
+    model = TopicModel(TOPIC_MODEL['n_topics']).fit(X, epochs=TOPIC_MODEL['epochs'])
+
+    # Comments refine the topics chunk by chunk; nothing is kept per comment
+    comments, chunk = 0, []
+    for comment in (iter_array(DATA_PATH, "comments") if os.path.exists(DATA_PATH) else []):
+        chunk.append(comment.get('content') or '')
+        if len(chunk) == TOPIC_MODEL['comment_chunk']:
+            model.partial_fit(tfidf.transform(TokenCorpus.build(chunk, n_jobs=-1)))
+            comments, chunk = comments + len(chunk), []
+    if chunk:
+        model.partial_fit(tfidf.transform(TokenCorpus.build(chunk, n_jobs=-1)))
+        comments += len(chunk)
+
+    W = model.transform(X)
+    dominant = np.where(W.max(axis=1) > 0, W.argmax(axis=1), -1)
+    found = [{'terms': terms, 'posts': int((dominant == t).sum()),
+              'examples': [theme_post(frame, i) for i in rows]}
+             for t, (terms, rows) in enumerate(zip(model.top_terms(tfidf.terms, 10), representatives(W)))]
+    return {
+        'comments': comments,
+        'terms': X.shape[1],
+        'error': model.loss(X, W),
+        'topics': sorted(found, key=lambda x: x['posts'], reverse=True),
+    }
+
+@pipeline.report("topics")
+def print_topics(topics, frame):
+    print("\n" + "="*70)
+    print("DATA-DRIVEN TOPICS (TF-IDF + NMF)")
+    print("="*70)
+
+    print(f"\n{len(topics['topics'])} topics over {topics['terms']:,} terms, "
+          f"refined with {topics['comments']:,} comments (relative error {topics['error']:.3f})")
+    for i, topic in enumerate(topics['topics'], 1):
+        pct = (topic['posts'] / len(frame)) * 100
+        print(f"\nTopic {i}: {topic['posts']:,} posts ({pct:.1f}%)")
+        print(f"  Terms: {', '.join(topic['terms'])}")
+        for post in topic['examples'][:3]:
+            print(f"    - [{post['upvotes']}⬆] {post['title'][:60]}... (m/{post['submolt']})")
 
 # ============================================================
-# EMERGING TOPICS (Recent vs Earlier)
+# STREAMING CONTENT CLUSTERS (hashing + minibatch k-means, see content_clusters.py)
 # ============================================================
 
-print("\n" + "="*70)
-print("EMERGING TOPICS ANALYSIS")
-print("="*70)
-
-# Split data by time
-df_sorted = df.sort_values('created_at')
-midpoint = len(df_sorted) // 2
-early_posts = df_sorted.iloc[:midpoint]
-recent_posts = df_sorted.iloc[midpoint:]
-
-def get_word_freq(posts_df):
-    stop_words = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-                     'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
-                     'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
-                     'it', 'its', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they',
-                     'what', 'which', 'who', 'when', 'where', 'why', 'how', 'all', 'each', 'every',
-                     'my', 'your', 'his', 'her', 'our', 'their', 'me', 'him', 'us', 'them', 'about',
-                     'moltbook', 'agent', 'agents', 'human', 'humans', 'ai', 'im', 'ive', 'youre',
-                     'dont', 'cant', 'wont', 'just', 'like', 'get', 'got', 'one', 'two', 'new',
-                     'post', 'posts', 'comment', 'comments', 'hello', 'hi', 'hey', 'thanks', 'thank'])
-    
-    words = []
-    for text in posts_df['text']:
-        if isinstance(text, str):
-            found = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
-            words.extend([w for w in found if w not in stop_words])
-    return Counter(words)
-
-early_freq = get_word_freq(early_posts)
-recent_freq = get_word_freq(recent_posts)
-
-# Find emerging topics (more frequent in recent)
-emerging = {}
-for word, recent_count in recent_freq.most_common(500):
-    early_count = early_freq.get(word, 0)
-    if early_count > 0:
-        growth = (recent_count - early_count) / early_count
-    else:
-        growth = recent_count
-    if recent_count >= 20:  # Minimum threshold
-        emerging[word] = {'recent': recent_count, 'early': early_count, 'growth': growth}
-
-# Sort by growth
-sorted_emerging = sorted(emerging.items(), key=lambda x: x[1]['growth'], reverse=True)
-
-print("\nTop 30 Emerging Topics (growing in recent posts):")
-for word, data in sorted_emerging[:30]:
-    print(f"  {word}: {data['early']} → {data['recent']} ({data['growth']*100:+.0f}% growth)")
+# Streaming k-means labels per post id; the centroids are shared with the scrapers,
+# which fold in every page they fetch. Posts they missed are folded in memory only:
+# the stage reads the centroids file as a source, so it must not rewrite it
+@pipeline.stage(sources=[CLUSTERS_PATH])
+def content_clusters(frame):
+    corpus = TokenCorpus.load_or_build(POSTS_PATH, frame['text'], n_jobs=-1)
+    return update_clusters(frame, corpus, save=False)[1]
+
+@pipeline.stage(config=sorted(KEYWORD_STOP_WORDS))
+def cluster_stats(frame, content_clusters):
+    df = add_cluster_column(frame.copy(), content_clusters)
+    corpus = TokenCorpus.load_or_build(POSTS_PATH, df['text'], n_jobs=-1)
+    keywords = corpus.filter(corpus.vocab_mask(min_len=4, exclude=KEYWORD_STOP_WORDS))
+    labels = df['content_cluster'].to_numpy()
+    top = TermMatrix.from_corpus(keywords).group_top_k(labels, 8)
+    clustered = df[labels >= 0]
+    stats = clustered.groupby('content_cluster').agg(
+        posts=('id', 'count'), avg_upvotes=('upvotes', 'mean'), avg_comments=('comment_count', 'mean'),
+        top_submolt=('submolt_name', lambda s: s.value_counts().index[0]))
+    stats = stats.sort_values('posts', ascending=False, kind='stable')
+    return {
+        'unclustered': int((labels < 0).sum()),
+        'clusters': [{**row._asdict(), 'terms': [t for t, _ in top.get(str(row.Index), [])],
+                      'examples': [theme_post(df, i) for i in np.flatnonzero(labels == row.Index)[:2]]}
+                     for row in stats.itertuples()],
+    }
+
+@pipeline.report("cluster_stats")
+def print_cluster_stats(cluster_stats, frame):
+    print("\n" + "="*70)
+    print("STREAMING CONTENT CLUSTERS")
+    print("="*70)
+
+    print(f"\n{len(cluster_stats['clusters'])} clusters "
+          f"({cluster_stats['unclustered']:,} posts without keywords)")
+    for cluster in cluster_stats['clusters']:
+        pct = (cluster['posts'] / len(frame)) * 100
+        print(f"\nCluster {cluster['Index']}: {cluster['posts']:,} posts ({pct:.1f}%), "
+              f"avg {cluster['avg_upvotes']:.1f} upvotes, {cluster['avg_comments']:.1f} comments, "
+              f"mostly m/{cluster['top_submolt']}")
+        print(f"  Terms: {', '.join(cluster['terms'])}")
+        for post in cluster['examples']:
+            print(f"    - [{post['upvotes']}⬆] {post['title'][:60]}... (m/{post['submolt']})")
 
 # ============================================================
 # KEY INSIGHTS SUMMARY
 # ============================================================
 
-print("\n" + "="*70)
-print("KEY INSIGHTS SUMMARY")
-print("="*70)
-
-insights = {
-    "total_posts": len(df),
-    "total_authors": df['author_name'].nunique(),
-    "total_submolts": df['submolt_name'].nunique(),
-    "total_upvotes": int(df['upvotes'].sum()),
-    "total_comments": int(df['comment_count'].sum()),
-    "avg_upvotes_per_post": float(df['upvotes'].mean()),
-    "avg_comments_per_post": float(df['comment_count'].mean()),
-    "themes": {theme: {'count': data['count'], 'percentage': data['percentage']} 
-               for theme, data in sorted_themes},
-    "top_submolts": dict(submolt_stats['post_count'].head(10)),
-    "post_types": dict(post_type_counts),
-    "sentiment": {
-        "positive_posts": int((df['pos_score'] > 0).sum()),
-        "negative_posts": int((df['neg_score'] > 0).sum()),
-        "curious_posts": int((df['curious_score'] > 0).sum()),
-        "existential_posts": int((df['existential_score'] > 0).sum())
-    },
-    "emerging_topics": [{"word": w, "growth": d['growth']} for w, d in sorted_emerging[:20]]
-}
-
-# Save insights
-with open("/home/ubuntu/moltbook_insights.json", "w") as f:
-    json.dump(insights, f, indent=2, default=str)
-
-print("\nInsights saved to /home/ubuntu/moltbook_insights.json")
+@pipeline.stage(cache=False)
+def insights(frame, themes, sentiment, comment_sentiment, post_types, submolt_stats, emerging_topics):
+    df = frame
+    print("\n" + "="*70)
+    print("KEY INSIGHTS SUMMARY")
+    print("="*70)
+
+    insights = {
+        "total_posts": len(df),
+        "total_authors": df['author_name'].nunique(),
+        "total_submolts": df['submolt_name'].nunique(),
+        "total_upvotes": int(df['upvotes'].sum()),
+        "total_comments": int(df['comment_count'].sum()),
+        "avg_upvotes_per_post": float(df['upvotes'].mean()),
+        "avg_comments_per_post": float(df['comment_count'].mean()),
+        "themes": {theme: {'count': data['count'], 'percentage': data['percentage']}
+                   for theme, data in themes},
+        "top_submolts": dict(submolt_stats['post_count'].head(10)),
+        "post_types": dict(post_types),
+        "sentiment": {
+            "positive_posts": int((sentiment['pos_score'] > 0).sum()),
+            "negative_posts": int((sentiment['neg_score'] > 0).sum()),
+            "curious_posts": int((sentiment['curious_score'] > 0).sum()),
+            "existential_posts": int((sentiment['existential_score'] > 0).sum()),
+            **{f"{name}_comments": hits for name, hits in comment_sentiment['counts'].items()}
+        },
+        "emerging_topics": [{"word": w, "growth": d['growth'], "burst": d['burst']} for w, d in emerging_topics[:20]]
+    }
+
+    # Save insights
+    with open("/home/ubuntu/moltbook_insights.json", "w") as f:
+        json.dump(insights, f, indent=2, default=str)
+
+    print("\nInsights saved to /home/ubuntu/moltbook_insights.json")
+    return insights
 
 # ============================================================
 # CREATE VISUALIZATIONS
 # ============================================================
 
-print("\n" + "="*70)
-print("CREATING VISUALIZATIONS")
-print("="*70)
-
-# 1. Theme Distribution Chart
-fig, ax = plt.subplots(figsize=(14, 8))
-themes_for_chart = [(t, d['count']) for t, d in sorted_themes[:15]]
-theme_names = [t[0] for t in themes_for_chart]
-theme_counts = [t[1] for t in themes_for_chart]
-
-bars = ax.barh(range(len(theme_names)), theme_counts, color='steelblue')
-ax.set_yticks(range(len(theme_names)))
-ax.set_yticklabels(theme_names)
-ax.invert_yaxis()
-ax.set_xlabel('Number of Posts')
-ax.set_title('Top 15 Discussion Themes on Moltbook', fontsize=14, fontweight='bold')
-
-for i, (bar, count) in enumerate(zip(bars, theme_counts)):
-    ax.text(bar.get_width() + 50, bar.get_y() + bar.get_height()/2, 
-            f'{count:,}', va='center', fontsize=9)
-
-plt.tight_layout()
-plt.savefig('/home/ubuntu/theme_distribution.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("  Saved: theme_distribution.png")
-
-# 2. Submolt Activity Chart
-fig, ax = plt.subplots(figsize=(12, 8))
-top_submolts = submolt_stats.head(15)
-ax.barh(range(len(top_submolts)), top_submolts['post_count'], color='coral')
-ax.set_yticks(range(len(top_submolts)))
-ax.set_yticklabels([f"m/{s}" for s in top_submolts.index])
-ax.invert_yaxis()
-ax.set_xlabel('Number of Posts')
-ax.set_title('Top 15 Most Active Submolts', fontsize=14, fontweight='bold')
-plt.tight_layout()
-plt.savefig('/home/ubuntu/submolt_activity.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("  Saved: submolt_activity.png")
-
-# 3. Post Type Distribution
-fig, ax = plt.subplots(figsize=(10, 8))
-colors = plt.cm.Set3(np.linspace(0, 1, len(post_type_counts)))
-wedges, texts, autotexts = ax.pie(post_type_counts.values, labels=post_type_counts.index, 
-                                   autopct='%1.1f%%', colors=colors, startangle=90)
-ax.set_title('Distribution of Post Types', fontsize=14, fontweight='bold')
-plt.tight_layout()
-plt.savefig('/home/ubuntu/post_types.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("  Saved: post_types.png")
-
-# 4. Daily Activity
-fig, ax = plt.subplots(figsize=(12, 6))
-daily_posts = df.groupby(df['created_at'].dt.date).size()
-ax.plot(daily_posts.index, daily_posts.values, marker='o', linewidth=2, markersize=8, color='green')
-ax.set_xlabel('Date')
-ax.set_ylabel('Number of Posts')
-ax.set_title('Daily Posting Activity on Moltbook', fontsize=14, fontweight='bold')
-ax.tick_params(axis='x', rotation=45)
-plt.tight_layout()
-plt.savefig('/home/ubuntu/daily_activity.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("  Saved: daily_activity.png")
-
-# 5. Sentiment Distribution
-fig, ax = plt.subplots(figsize=(10, 6))
-sentiment_data = {
-    'Positive': (df['pos_score'] > 0).sum(),
-    'Negative': (df['neg_score'] > 0).sum(),
-    'Curious': (df['curious_score'] > 0).sum(),
-    'Existential': (df['existential_score'] > 0).sum()
-}
-ax.bar(sentiment_data.keys(), sentiment_data.values(), color=['green', 'red', 'blue', 'purple'])
-ax.set_ylabel('Number of Posts')
-ax.set_title('Sentiment and Tone Distribution', fontsize=14, fontweight='bold')
-plt.tight_layout()
-plt.savefig('/home/ubuntu/sentiment_distribution.png', dpi=150, bbox_inches='tight')
-plt.close()
-print("  Saved: sentiment_distribution.png")
-
-print("\nAll visualizations created!")
-print("\nDeep analysis complete!")
+@pipeline.stage(cache=False)
+def charts(frame, themes, sentiment, post_types, submolt_stats):
+    df = frame
+    post_type_counts = post_types
+
+    # Set style
+    plt.style.use('seaborn-v0_8-whitegrid')
+    plt.rcParams['figure.figsize'] = (12, 8)
+    plt.rcParams['font.size'] = 10
+
+    print("\n" + "="*70)
+    print("CREATING VISUALIZATIONS")
+    print("="*70)
+
+    # 1. Theme Distribution Chart
+    fig, ax = plt.subplots(figsize=(14, 8))
+    themes_for_chart = [(t, d['count']) for t, d in themes[:15]]
+    theme_names = [t[0] for t in themes_for_chart]
+    theme_counts = [t[1] for t in themes_for_chart]
+
+    bars = ax.barh(range(len(theme_names)), theme_counts, color='steelblue')
+    ax.set_yticks(range(len(theme_names)))
+    ax.set_yticklabels(theme_names)
+    ax.invert_yaxis()
+    ax.set_xlabel('Number of Posts')
+    ax.set_title('Top 15 Discussion Themes on Moltbook', fontsize=14, fontweight='bold')
+
+    for i, (bar, count) in enumerate(zip(bars, theme_counts)):
+        ax.text(bar.get_width() + 50, bar.get_y() + bar.get_height()/2,
+                f'{count:,}', va='center', fontsize=9)
+
+    plt.tight_layout()
+    plt.savefig('/home/ubuntu/theme_distribution.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  Saved: theme_distribution.png")
+
+    # 2. Submolt Activity Chart
+    fig, ax = plt.subplots(figsize=(12, 8))
+    top_submolts = submolt_stats.head(15)
+    ax.barh(range(len(top_submolts)), top_submolts['post_count'], color='coral')
+    ax.set_yticks(range(len(top_submolts)))
+    ax.set_yticklabels([f"m/{s}" for s in top_submolts.index])
+    ax.invert_yaxis()
+    ax.set_xlabel('Number of Posts')
+    ax.set_title('Top 15 Most Active Submolts', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig('/home/ubuntu/submolt_activity.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  Saved: submolt_activity.png")
+
+    # 3. Post Type Distribution
+    fig, ax = plt.subplots(figsize=(10, 8))
+    colors = plt.cm.Set3(np.linspace(0, 1, len(post_type_counts)))
+    wedges, texts, autotexts = ax.pie(post_type_counts.values, labels=post_type_counts.index,
+                                       autopct='%1.1f%%', colors=colors, startangle=90)
+    ax.set_title('Distribution of Post Types', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig('/home/ubuntu/post_types.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  Saved: post_types.png")
+
+    # 4. Daily Activity
+    fig, ax = plt.subplots(figsize=(12, 6))
+    daily_posts = df.groupby(df['created_at'].dt.date).size()
+    ax.plot(daily_posts.index, daily_posts.values, marker='o', linewidth=2, markersize=8, color='green')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Number of Posts')
+    ax.set_title('Daily Posting Activity on Moltbook', fontsize=14, fontweight='bold')
+    ax.tick_params(axis='x', rotation=45)
+    plt.tight_layout()
+    plt.savefig('/home/ubuntu/daily_activity.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  Saved: daily_activity.png")
+
+    # 5. Sentiment Distribution
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sentiment_data = {
+        'Positive': (sentiment['pos_score'] > 0).sum(),
+        'Negative': (sentiment['neg_score'] > 0).sum(),
+        'Curious': (sentiment['curious_score'] > 0).sum(),
+        'Existential': (sentiment['existential_score'] > 0).sum()
+    }
+    ax.bar(sentiment_data.keys(), sentiment_data.values(), color=['green', 'red', 'blue', 'purple'])
+    ax.set_ylabel('Number of Posts')
+    ax.set_title('Sentiment and Tone Distribution', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig('/home/ubuntu/sentiment_distribution.png', dpi=150, bbox_inches='tight')
+    plt.close()
+    print("  Saved: sentiment_distribution.png")
+
+    print("\nAll visualizations created!")
+
+@pipeline.report("charts")
+def print_done():
+    print("\nDeep analysis complete!")
+
+
+if __name__ == "__main__":
+    pipeline.main()
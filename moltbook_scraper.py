@@ -3,19 +3,31 @@ Moltbook Data Scraper - Collects posts and comments from Moltbook forum.
 Uses direct API calls to the public endpoints.
 """
 
+import os
 import requests
-import json
 import time
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
+import jsonio
+from archive import ResponseArchive, ArchiveReplay
+from content_clusters import CLUSTERS_PATH, PostClusterer
+from engagement_store import EngagementStore
+from search_index import INDEX_DIR, SearchIndex
+
 BASE_URL = "https://www.moltbook.com/api/v1"
+ARCHIVE_DIR = "/home/ubuntu/moltbook_archive"
+ENGAGEMENT_DIR = "/home/ubuntu/moltbook_engagement"
+OUTPUT_DIR = "/home/ubuntu"
 
 class MoltbookScraper:
     """Scraper for Moltbook public API."""
     
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, archive: ResponseArchive = None,
+                 replay: ArchiveReplay = None):
         self.timeout = timeout
+        self.archive = archive  # every raw response is recorded here
+        self.replay = replay    # serve responses from an archive, no network
         self.session = requests.Session()
         self.session.headers.update({
             "Content-Type": "application/json",
@@ -24,17 +36,38 @@ class MoltbookScraper:
         
     def _get(self, endpoint: str, params: dict = None) -> dict:
         """Make a GET request to the API."""
+        if self.replay is not None:
+            return self._replay_get(endpoint, params)
         url = f"{BASE_URL}/{endpoint.lstrip('/')}"
         try:
             resp = self.session.get(url, params=params, timeout=self.timeout)
+            if self.archive is not None:
+                self.archive.record(endpoint, params, resp.content, resp.status_code)
             if resp.status_code == 200:
-                return resp.json()
+                return jsonio.loads(resp.content)
             else:
                 print(f"Error {resp.status_code} for {endpoint}: {resp.text[:200]}")
                 return {}
         except Exception as e:
             print(f"Exception for {endpoint}: {e}")
             return {}
+
+    def _replay_get(self, endpoint: str, params: dict = None) -> dict:
+        """Answer a GET from the archive."""
+        archived = self.replay.get(endpoint, params)
+        if archived is None:
+            print(f"Not archived: {endpoint} {params or ''}")
+            return {}
+        status, body = archived
+        if status != 200:
+            print(f"Error {status} for {endpoint} (archived)")
+            return {}
+        return jsonio.loads(body)
+
+    def throttle(self, seconds: float):
+        """Sleep between requests; a no-op when replaying."""
+        if self.replay is None:
+            time.sleep(seconds)
     
     def get_posts(self, sort: str = "new", limit: int = 100, offset: int = 0, submolt: str = None) -> List[Dict]:
         """Get posts from the API."""
@@ -65,13 +98,45 @@ class MoltbookScraper:
         return data.get("agents", [])
 
 
-def scrape_all_data():
-    """Main function to scrape all Moltbook data."""
-    scraper = MoltbookScraper()
+def scrape_all_data(archive_dir: str = ARCHIVE_DIR, replay_run: str = None,
+                    engagement_dir: str = ENGAGEMENT_DIR, clusters_path: str = CLUSTERS_PATH,
+                    index_dir: str = INDEX_DIR, output_dir: str = None):
+    """Main function to scrape all Moltbook data.
+
+    Raw responses are archived under ``archive_dir``; with ``replay_run`` the
+    scrape is re-run from that archived run instead of the network. Each live
+    scrape also appends one engagement sample per post to ``engagement_dir``.
+    New posts are folded into the content clusters at ``clusters_path`` page by
+    page (see content_clusters.py); a replay leaves the live centroids alone
+    and only folds into a ``clusters_path`` of its own.
+    Posts and comments not indexed yet are added to the local search index in
+    ``index_dir`` (see search_index.py); a replay only indexes into an
+    ``index_dir`` of its own.
+    The JSON output goes to ``output_dir`` (default /home/ubuntu). A replay
+    must name its own ``output_dir`` so it never overwrites the live files.
+    """
+    if replay_run and not archive_dir:
+        raise ValueError("replaying a run needs an archive_dir")
+    if replay_run and output_dir is None:
+        raise ValueError("replaying a run needs an output_dir separate from the live data")
+    if replay_run and clusters_path and os.path.abspath(clusters_path) == os.path.abspath(CLUSTERS_PATH):
+        clusters_path = None  # archived pages must not move the live centroids
+    if replay_run and index_dir and os.path.abspath(index_dir) == os.path.abspath(INDEX_DIR):
+        index_dir = None  # nor add stale documents to the live search index
+    output_dir = output_dir or OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    data_path = os.path.join(output_dir, "moltbook_data.json")
+    started_at = time.time()
+    archive = ResponseArchive(archive_dir) if archive_dir else None
+    if replay_run:
+        scraper = MoltbookScraper(replay=archive.replay(run=replay_run))
+    else:
+        scraper = MoltbookScraper(archive=archive)
     
     all_posts = []
     all_comments = []
     all_submolts = []
+    clusterer = PostClusterer.open(clusters_path) if clusters_path else None
     
     print("=" * 60)
     print("Starting Moltbook Data Scrape")
@@ -98,6 +163,8 @@ def scrape_all_data():
             break
             
         all_posts.extend(posts)
+        if clusterer is not None:
+            clusterer.add_page(posts)
         total_posts += len(posts)
         print(f"    Got {len(posts)} posts (total: {total_posts})")
         
@@ -105,9 +172,19 @@ def scrape_all_data():
             break
             
         offset += limit
-        time.sleep(0.5)  # Be nice to the server
+        scraper.throttle(0.5)  # Be nice to the server
     
     print(f"\n    Total posts collected: {len(all_posts)}")
+
+    # Record this scrape's upvotes/comment counts for velocity tracking
+    if engagement_dir and not replay_run:
+        store = EngagementStore(engagement_dir)
+        store.append_posts(all_posts, fetched_at=started_at)
+        print(f"    Recorded {store.flush()} engagement samples")
+
+    if clusterer is not None:
+        clusterer.save()
+        print(f"    Content clusters updated ({clusterer.n_posts} posts seen)")
     
     # Get comments for each post
     print("\n[3] Fetching comments for each post...")
@@ -141,9 +218,15 @@ def scrape_all_data():
                 
                 all_comments.extend(extract_replies(comment, post_id, post.get("title", "")))
         
-        time.sleep(0.2)  # Rate limiting
+        scraper.throttle(0.2)  # Rate limiting
     
     print(f"\n    Total comments collected: {len(all_comments)}")
+
+    if index_dir:
+        index = SearchIndex(index_dir)
+        index.add_posts(all_posts)
+        index.add_comments(all_comments)
+        print(f"    Indexed {index.flush()} new posts/comments for local search")
     
     # Save data
     print("\n[4] Saving data...")
@@ -160,10 +243,9 @@ def scrape_all_data():
         "comments": all_comments
     }
     
-    with open("/home/ubuntu/moltbook_data.json", "w") as f:
-        json.dump(data, f, indent=2)
+    jsonio.dump(data, data_path, indent=2)
     
-    print(f"    Data saved to /home/ubuntu/moltbook_data.json")
+    print(f"    Data saved to {data_path}")
     print("\n" + "=" * 60)
     print("Scrape Complete!")
     print(f"Posts: {len(all_posts)}")
@@ -175,4 +257,29 @@ def scrape_all_data():
 
 
 if __name__ == "__main__":
-    scrape_all_data()
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR,
+                        help="where raw responses are archived ('' to disable)")
+    parser.add_argument("--replay", metavar="RUN",
+                        help="replay an archived run instead of hitting the network")
+    parser.add_argument("--engagement-dir", default=ENGAGEMENT_DIR,
+                        help="engagement time-series store ('' to disable)")
+    parser.add_argument("--clusters", default=CLUSTERS_PATH,
+                        help="streaming content-cluster centroids ('' to disable; "
+                             "a --replay only updates a path other than the default)")
+    parser.add_argument("--index-dir", default=INDEX_DIR,
+                        help="local search index ('' to disable; "
+                             "a --replay only indexes into a directory other than the default)")
+    parser.add_argument("-o", "--output-dir",
+                        help=f"where the JSON output is written (default {OUTPUT_DIR}; "
+                             "required with --replay)")
+    args = parser.parse_args()
+    if args.replay and not args.archive_dir:
+        parser.error("--replay needs an --archive-dir to read the run from")
+    if args.replay and not args.output_dir:
+        parser.error("--replay needs -o/--output-dir so the live data is not overwritten")
+    scrape_all_data(archive_dir=args.archive_dir, replay_run=args.replay,
+                    engagement_dir=args.engagement_dir, clusters_path=args.clusters,
+                    index_dir=args.index_dir, output_dir=args.output_dir)
@@ -0,0 +1,212 @@
+"""
+Near-duplicate and template detection with MinHash + LSH banding.
+
+Documents are sets of word shingles (``shingle`` consecutive tokens of a
+``TokenCorpus``). Each document gets a MinHash signature of ``num_perm``
+multiply-shift hashes (``(a * x + b) >> 32`` on 64 bits, no modulo); the
+fraction of equal signature entries estimates the Jaccard similarity of two
+shingle sets. Signatures are cut into ``bands`` bands: documents whose rows
+agree on any whole band land in the same bucket, so likely matches are found
+without comparing all pairs (a pair with similarity ``s`` becomes a
+candidate with probability ``1 - (1 - s**rows)**bands``). Each bucket links
+its documents to the bucket's first one, candidates below ``threshold``
+estimated similarity are dropped, and clusters are the connected components
+of what is left. Time and memory are linear in the number of shingles.
+
+Cluster ids are numbered by each cluster's first document; documents with no
+tokens are singletons.
+
+Usage:
+    lsh = MinHashLSH(threshold=0.8)
+    labels = lsh.cluster(corpus)                  # cluster id per document
+    sizes = np.bincount(labels)
+
+    python near_duplicates.py                     # posts + comments summary
+    python near_duplicates.py -o clusters.csv     # kind, id, cluster, size
+"""
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from tokens import TokenCorpus
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_FNV = np.uint64(0x100000001B3)
+_BLOCK = 1 << 13  # shingles hashed per block (x num_perm uint64 values, cache sized)
+
+
+class MinHashLSH:
+    """MinHash signatures and LSH banding over a token corpus."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.8,
+                 shingle: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle = shingle
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64)
+
+    @property
+    def config(self) -> dict:
+        return {"num_perm": self.num_perm, "bands": self.bands, "threshold": self.threshold,
+                "shingle": self.shingle, "seed": self.seed}
+
+    # ── Signatures ───────────────────────────────────────────
+
+    def shingles(self, corpus: TokenCorpus) -> tuple[np.ndarray, np.ndarray]:
+        """(document, 32-bit shingle hash) for every shingle, grouped by document.
+
+        Documents shorter than ``shingle`` tokens are one shingle of all their tokens.
+        """
+        k, base = self.shingle, np.uint64(len(corpus.vocab) + 1)
+        starts, ends = corpus.indptr[:-1], corpus.indptr[1:]
+        n_shingles = np.where(ends - starts > 0, np.maximum(ends - starts - k + 1, 1), 0)
+        doc = np.repeat(np.arange(len(corpus), dtype=np.int64), n_shingles)
+        offsets = np.arange(len(doc)) - np.repeat(np.cumsum(n_shingles) - n_shingles, n_shingles)
+        position = starts[doc] + offsets
+        ids = corpus.ids.astype(np.uint64)
+        value = np.zeros(len(doc), dtype=np.uint64)
+        for j in range(k):
+            # Token id + 1, or 0 past the end of a short document
+            inside = position + j < ends[doc]
+            term = ids[np.minimum(position + j, len(ids) - 1)] + np.uint64(1)
+            value = value * base + np.where(inside, term, np.uint64(0))
+        return doc, (value * _GOLDEN) >> np.uint64(32)
+
+    def signatures(self, corpus: TokenCorpus) -> np.ndarray:
+        """(documents × num_perm) uint32 MinHash matrix; empty documents stay all-max."""
+        doc, values = self.shingles(corpus)
+        signatures = np.full((len(corpus), self.num_perm), 0xFFFFFFFF, dtype=np.uint32)
+        a, b = self._a[:, None], self._b[:, None]
+        buffer = np.empty((self.num_perm, min(_BLOCK, len(doc))), dtype=np.uint64)
+        for start in range(0, len(doc), _BLOCK):
+            block_doc = doc[start:start + _BLOCK]
+            hashed = buffer[:, :len(block_doc)]
+            np.multiply(a, values[start:start + _BLOCK][None, :], out=hashed)
+            hashed += b
+            hashed >>= np.uint64(32)
+            firsts = np.flatnonzero(np.r_[True, block_doc[1:] != block_doc[:-1]])
+            docs = block_doc[firsts]
+            partial = np.minimum.reduceat(hashed, firsts, axis=1).T.astype(np.uint32)
+            signatures[docs] = np.minimum(signatures[docs], partial)
+        return signatures
+
+    # ── Banding and clustering ───────────────────────────────
+
+    def candidate_pairs(self, signatures: np.ndarray, docs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(document, bucket leader) pairs sharing a band, over ``docs`` rows."""
+        left, right = [], []
+        for band in range(self.bands):
+            key = np.zeros(len(docs), dtype=np.uint64)
+            for column in signatures[docs, band * self.rows:(band + 1) * self.rows].T:
+                key = (key ^ column.astype(np.uint64)) * _FNV
+            order = np.argsort(key, kind="stable")
+            sorted_key = key[order]
+            new_bucket = np.r_[True, sorted_key[1:] != sorted_key[:-1]]
+            leader = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+            member = ~new_bucket
+            left.append(docs[order[member]])
+            right.append(docs[leader[member]])
+        if not left:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pairs = np.unique(np.stack([np.concatenate(left), np.concatenate(right)], axis=1), axis=0)
+        return pairs[:, 0], pairs[:, 1]
+
+    def similarity(self, signatures: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Estimated Jaccard similarity of document pairs."""
+        out = np.empty(len(left))
+        for start in range(0, len(left), _BLOCK):
+            part = slice(start, start + _BLOCK)
+            out[part] = (signatures[left[part]] == signatures[right[part]]).mean(axis=1)
+        return out
+
+    def cluster(self, corpus: TokenCorpus, signatures: np.ndarray = None) -> np.ndarray:
+        """Cluster id per document, numbered in order of each cluster's first document."""
+        signatures = self.signatures(corpus) if signatures is None else signatures
+        n = len(corpus)
+        docs = np.flatnonzero(np.diff(corpus.indptr) > 0)
+        left, right = self.candidate_pairs(signatures, docs)
+        keep = self.similarity(signatures, left, right) >= self.threshold
+        graph = sp.csr_matrix((np.ones(int(keep.sum()), dtype=np.int8), (left[keep], right[keep])),
+                              shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+        return rank[inverse]
+
+
+def first_of_cluster(labels: np.ndarray) -> np.ndarray:
+    """Mask of each cluster's first document (the one a dedupe keeps)."""
+    keep = np.zeros(len(labels), dtype=bool)
+    keep[np.unique(labels, return_index=True)[1]] = True
+    return keep
+
+
+def main(argv=None):
+    import csv
+
+    from dataset import load_dataset
+    from jsonio import iter_array
+
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate posts and comments.")
+    parser.add_argument("--posts", default="/home/ubuntu/moltbook_posts.json")
+    parser.add_argument("--comments", default="/home/ubuntu/moltbook_data.json",
+                        help="also cluster comment text (pass '' to skip)")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--bands", type=int, default=16)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--shingle", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("-o", "--output", help="write kind,id,cluster,size CSV")
+    args = parser.parse_args(argv)
+
+    frame = load_dataset(args.posts).frame
+    texts, kinds, ids = list(frame['text']), ['post'] * len(frame), list(frame['id'])
+    if args.comments:
+        for comment in iter_array(args.comments, "comments"):
+            texts.append(comment.get('content') or '')
+            kinds.append('comment')
+            ids.append(comment.get('id', ''))
+
+    start = time.perf_counter()
+    corpus = TokenCorpus.build(texts, n_jobs=-1)
+    lsh = MinHashLSH(args.num_perm, args.bands, args.threshold, args.shingle)
+    labels = lsh.cluster(corpus)
+    elapsed = time.perf_counter() - start
+    sizes = np.bincount(labels)
+
+    print("=" * 60)
+    print("NEAR-DUPLICATE CLUSTERS")
+    print("=" * 60)
+    duplicated = sizes[labels] > 1
+    print(f"\nDocuments: {len(texts):,} ({kinds.count('post'):,} posts), clustered in {elapsed:.2f}s")
+    print(f"Clusters with 2+ members: {(sizes > 1).sum():,} covering {duplicated.sum():,} documents")
+    print(f"Posts in a cluster: {sum(1 for i, k in enumerate(kinds) if k == 'post' and duplicated[i]):,}")
+    first = np.unique(labels, return_index=True)[1]
+    print(f"\nLargest {args.top} clusters:")
+    for cluster in np.argsort(-sizes, kind="stable")[:args.top]:
+        if sizes[cluster] < 2:
+            break
+        print(f"  [{sizes[cluster]:,}] {texts[first[cluster]][:70]!r}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "id", "cluster", "size"])
+            writer.writerows(zip(kinds, ids, labels.tolist(), sizes[labels].tolist()))
+        print(f"\nClusters saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
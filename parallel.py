@@ -0,0 +1,129 @@
+"""
+Shard text-processing work across a process pool.
+
+``map_shards(func, texts, args, n_jobs)`` splits the documents into
+contiguous shards, runs ``func(shard_texts, *args)`` in worker processes and
+returns the per-shard results in document order for the caller to merge.
+The texts are not pickled to each worker: they are packed once into a UTF-8
+buffer plus an offsets array in memory-mapped files (under ``/dev/shm`` when
+available), and each worker maps the buffer and decodes only its own range.
+
+Small inputs (fewer than ``MIN_DOCS_PER_JOB`` documents per worker) run
+in-process, so callers can pass ``n_jobs=-1`` unconditionally.
+
+Usage:
+    parts = map_shards(_scan_shard, df['text_lower'], (automaton,), n_jobs=-1)
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, Sequence
+
+import numpy as np
+
+# Below this many documents per worker, process start-up costs more than it saves
+MIN_DOCS_PER_JOB = 20_000
+
+_SHM_DIR = "/dev/shm"
+
+
+def resolve_jobs(n_jobs) -> int:
+    """``None``/-1 -> all cores, otherwise at least 1."""
+    if n_jobs in (None, -1):
+        return os.cpu_count() or 1
+    return max(1, int(n_jobs))
+
+
+class TextBuffer:
+    """Texts packed into memory-mapped files that worker processes can share.
+
+    Non-string entries (``None``, NaN) are kept as ``None``.
+    """
+
+    def __init__(self, texts: Sequence, directory: str = None):
+        if directory is None and os.path.isdir(_SHM_DIR) and os.access(_SHM_DIR, os.W_OK):
+            directory = _SHM_DIR
+        self.path = tempfile.mkdtemp(prefix="moltbook-texts-", dir=directory)
+        nulls = []
+        lengths = []
+        with open(os.path.join(self.path, "data.bin"), "wb") as f:
+            for text in texts:
+                is_text = isinstance(text, str)
+                data = text.encode("utf-8", "surrogatepass") if is_text else b""
+                f.write(data)
+                lengths.append(len(data))
+                nulls.append(not is_text)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        np.save(os.path.join(self.path, "offsets.npy"), offsets)
+        np.save(os.path.join(self.path, "nulls.npy"), np.array(nulls, dtype=bool))
+        self.size = len(lengths)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TextView(Sequence):
+    """Read-only view of documents ``start:end`` of a ``TextBuffer``."""
+
+    def __init__(self, path: str, start: int = 0, end: int = None):
+        offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        end = len(offsets) - 1 if end is None else end
+        self.offsets = np.array(offsets[start:end + 1])
+        self.nulls = np.array(np.load(os.path.join(path, "nulls.npy"), mmap_mode="r")[start:end])
+        data_path = os.path.join(path, "data.bin")
+        self.data = np.memmap(data_path, dtype=np.uint8, mode="r") if os.path.getsize(data_path) else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if self.nulls[i]:
+            return None
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8", "surrogatepass")
+
+    def __iter__(self) -> Iterator:
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _run_shard(func: Callable, path: str, start: int, end: int, args: tuple):
+    return func(TextView(path, start, end), *args)
+
+
+def shard_bounds(n: int, shards: int) -> np.ndarray:
+    return np.linspace(0, n, shards + 1).astype(np.int64)
+
+
+def map_shards(func: Callable, texts: Sequence, args: tuple = (), n_jobs=1,
+               min_docs: int = None) -> list:
+    """``[func(shard, *args) for shard in shards(texts)]`` across processes.
+
+    ``func`` must be a module-level function (workers import it by name).
+    Returns one result per shard, in document order; the in-process path
+    returns a single result for all of ``texts``.
+    """
+    min_docs = MIN_DOCS_PER_JOB if min_docs is None else max(1, min_docs)
+    jobs = min(resolve_jobs(n_jobs), len(texts) // min_docs)
+    if jobs <= 1:
+        return [func(texts, *args)]
+    bounds = shard_bounds(len(texts), jobs)
+    with TextBuffer(texts) as buffer, ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_run_shard, func, buffer.path, int(a), int(b), args)
+                   for a, b in zip(bounds[:-1], bounds[1:])]
+        return [future.result() for future in futures]
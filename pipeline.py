@@ -0,0 +1,297 @@
+"""
+Named analysis stages with declared inputs and cached outputs.
+
+A stage is a function whose parameter names are the stages it consumes:
+
+    pipeline = Pipeline("analysis", source=POSTS_PATH)
+
+    @pipeline.stage(cache=False)
+    def frame():
+        return load_dataset(POSTS_PATH).frame
+
+    @pipeline.stage(config=THEMES)
+    def themes(frame):
+        ...
+
+Each stage gets a key that hashes its name, source code, ``config``, the
+fingerprints of the snapshot and any extra ``sources``, and the keys of its
+inputs. The code part also covers the helpers the stage calls from its own
+script and every repo module it reads (followed through their imports), so
+editing e.g. tokens.py invalidates the stages that tokenize; bump
+``PIPELINE_VERSION`` to drop every cached result at once. Results are
+pickled under that key (``<snapshot>.pipeline/<name>/``), so editing one
+theme list only recomputes ``themes`` and what depends on it. Upstream
+stages are only evaluated when a stale stage or a report needs them.
+
+Reports print a stage's results and run on every pass, cached or not, so the
+console output stays the same:
+
+    @pipeline.report("themes")
+    def print_themes(themes, frame):
+        ...
+
+``pipeline.main()`` adds a CLI: ``--stages themes charts``, ``--force``,
+``--no-cache`` and ``--list``.
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import pickle
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from cache import atomic_write, fingerprint, sidecar_path
+
+PIPELINE_VERSION = 1
+
+# Modules next to this file are the repo's own; anything else is a dependency
+_ROOT = Path(__file__).resolve().parent
+_module_hashes: dict[str, str] = {}
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable
+    inputs: tuple
+    config: Any = None
+    sources: tuple = ()
+    cache: bool = True
+    reports: list = field(default_factory=list)
+
+
+def _code(func: Callable) -> str:
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return func.__code__.co_code.hex()
+
+
+def _local_module(obj):
+    """The repo module ``obj`` is (or was defined in), else None."""
+    module = obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, "__module__", None) or "")
+    path = getattr(module, "__file__", None)
+    if path and Path(path).resolve().parent == _ROOT:
+        return module
+    return None
+
+
+def _module_hash(module) -> str:
+    path = module.__file__
+    if path not in _module_hashes:
+        _module_hashes[path] = hashlib.sha256(Path(path).read_bytes()).hexdigest()[:16]
+    return _module_hashes[path]
+
+
+def _names(code) -> set:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+def _code_dependencies(func: Callable) -> dict:
+    """Source of same-script helpers and hashes of repo modules ``func`` reads."""
+    home = sys.modules.get(func.__module__)
+    helpers, modules = {}, {}
+    todo, seen = [func], set()
+    while todo:
+        f = todo.pop()
+        if f in seen:
+            continue
+        seen.add(f)
+        for name in _names(f.__code__):
+            obj = f.__globals__.get(name)
+            module = _local_module(obj) if obj is not None else None
+            if module is None:
+                continue
+            if module is home:
+                if inspect.isfunction(obj) or inspect.isclass(obj):
+                    helpers[obj.__qualname__] = _code(obj)
+                    if inspect.isfunction(obj):
+                        todo.append(obj)
+            elif module.__name__ not in modules:
+                modules[module.__name__] = module
+    # Follow the repo modules' own imports (content_clusters -> tokens -> tables)
+    pending = list(modules.values())
+    while pending:
+        for value in list(vars(pending.pop()).values()):
+            module = _local_module(value)
+            if module is not None and module is not home and module.__name__ not in modules:
+                modules[module.__name__] = module
+                pending.append(module)
+    helpers.pop(func.__qualname__, None)
+    return {"helpers": helpers, "modules": {name: _module_hash(m) for name, m in modules.items()}}
+
+
+class Pipeline:
+    """Stages in registration order; upstream stages must be registered first."""
+
+    def __init__(self, name: str, source=None, cache_dir: str = None):
+        self.name = name
+        self.source = source
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else (
+            sidecar_path(source, "pipeline") if source else None)
+        self.stages: dict[str, Stage] = {}
+
+    # ── Registration ─────────────────────────────────────────
+
+    def stage(self, name: str = None, config=None, sources: Iterable = (), cache: bool = True):
+        """Register a stage; its parameters name the stages it reads."""
+        def register(func):
+            stage_name = name or func.__name__
+            inputs = tuple(inspect.signature(func).parameters)
+            self._check(stage_name, inputs, self.stages)
+            if stage_name in self.stages:
+                raise ValueError(f"stage {stage_name!r} is already registered")
+            self.stages[stage_name] = Stage(stage_name, func, inputs, config, tuple(sources), cache)
+            return func
+        return register
+
+    def report(self, name: str):
+        """Register a printer for stage ``name``; parameters are resolved by stage name."""
+        def register(func):
+            params = tuple(inspect.signature(func).parameters)
+            self._check(name, params, self.dependencies(name) | {name})
+            self.stages[name].reports.append((func, params))
+            return func
+        return register
+
+    def _check(self, name: str, params: tuple, available):
+        unknown = [p for p in params if p not in available]
+        if unknown:
+            raise ValueError(f"{name!r} reads unknown or downstream stages: {', '.join(unknown)}")
+
+    def dependencies(self, name: str) -> set:
+        seen, todo = set(), list(self.stages[name].inputs)
+        while todo:
+            dep = todo.pop()
+            if dep not in seen:
+                seen.add(dep)
+                todo.extend(self.stages[dep].inputs)
+        return seen
+
+    def plan(self, targets: Iterable[str] = None) -> list[str]:
+        """Stages needed for ``targets`` (all if None), in registration order."""
+        if not targets:
+            return list(self.stages)
+        needed = set()
+        for target in targets:
+            if target not in self.stages:
+                raise KeyError(f"unknown stage {target!r}; choose from: {', '.join(self.stages)}")
+            needed |= self.dependencies(target) | {target}
+        return [name for name in self.stages if name in needed]
+
+    # ── Keys and cache ───────────────────────────────────────
+
+    def _key(self, stage: Stage, keys: dict) -> str:
+        sources = [self.source] + list(stage.sources) if self.source else list(stage.sources)
+        payload = {
+            "stage": stage.name,
+            "version": PIPELINE_VERSION,
+            "code": _code(stage.func),
+            "code_dependencies": _code_dependencies(stage.func),
+            "config": stage.config,
+            "sources": [fingerprint(s) if Path(s).exists() else str(s) for s in sources],
+            "inputs": [keys[i] for i in stage.inputs],
+        }
+        data = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(data).hexdigest()[:24]
+
+    def _path(self, name: str, key: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / self.name / f"{name}-{key}.pkl"
+
+    def _load(self, path: Optional[Path]):
+        if path is None or not path.exists():
+            return False, None
+        try:
+            with open(path, "rb") as f:
+                return True, pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return False, None
+
+    def _save(self, name: str, path: Optional[Path], result):
+        if path is None:
+            return
+
+        def write(tmp):
+            with open(tmp, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        try:
+            atomic_write(path, write)
+            for old in path.parent.glob(f"{name}-*.pkl"):  # keep one version per stage
+                if old != path:
+                    old.unlink()
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            pass  # unpicklable or read-only: the stage just reruns next time
+
+    # ── Execution ────────────────────────────────────────────
+
+    def run(self, targets: Iterable[str] = None, force: Iterable[str] = (),
+            use_cache: bool = True, verbose: bool = False) -> dict:
+        """Evaluate ``targets`` (all stages if None).
+
+        Returns the results that were evaluated, which always include ``targets``.
+        """
+        plan = self.plan(targets)
+        force = set(force)
+        keys = {}
+        for name in plan:
+            keys[name] = self._key(self.stages[name], keys)
+
+        results = {}
+
+        def get(name):
+            if name in results:
+                return results[name]
+            stage = self.stages[name]
+            path = self._path(name, keys[name]) if stage.cache and use_cache else None
+            hit, result = (False, None) if name in force else self._load(path)
+            if not hit:
+                result = stage.func(**{i: get(i) for i in stage.inputs})
+                self._save(name, path, result)
+            if verbose:
+                print(f"[{self.name}] {name}: {'cached' if hit else 'computed'}")
+            results[name] = result
+            return result
+
+        # Uncached stages feeding other stages are evaluated on demand; uncached
+        # sinks (file writers, charts) always run
+        consumed = {i for name in plan for i in self.stages[name].inputs}
+        for name in plan:
+            stage = self.stages[name]
+            if stage.reports or name in force or (not stage.cache and name not in consumed):
+                get(name)
+            for report, params in stage.reports:
+                report(**{p: get(p) for p in params})
+        # Cached targets without reports still have to be materialized
+        for name in targets or ():
+            get(name)
+        return results
+
+    def main(self, argv=None) -> dict:
+        parser = argparse.ArgumentParser(description=f"Run the {self.name} pipeline.")
+        parser.add_argument("--stages", nargs="+", metavar="STAGE",
+                            help="run only these stages (and what they depend on)")
+        parser.add_argument("--force", nargs="*", metavar="STAGE",
+                            help="recompute these stages (all planned stages if none given)")
+        parser.add_argument("--no-cache", action="store_true", help="ignore and skip the stage cache")
+        parser.add_argument("--list", action="store_true", help="list stages and exit")
+        parser.add_argument("-v", "--verbose", action="store_true", help="log cache hits")
+        args = parser.parse_args(argv)
+
+        if args.list:
+            for name, stage in self.stages.items():
+                inputs = f" <- {', '.join(stage.inputs)}" if stage.inputs else ""
+                print(f"{name}{inputs}")
+            return {}
+        force = self.plan(args.stages) if args.force == [] else (args.force or ())
+        return self.run(args.stages, force=force, use_cache=not args.no_cache, verbose=args.verbose)
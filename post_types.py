@@ -0,0 +1,77 @@
+"""
+Post-type classification from titles.
+
+Each category's keywords are compiled into one alternation regex and tested
+against the whole lowercased title column with pandas string ops; priority
+between categories is resolved with ``np.select`` (first matching rule wins),
+so the classifier costs one vectorized pass per category regardless of how
+many keywords it has.
+
+Keywords are plain substrings ('hi ' with its trailing space, '?', 'new:'),
+exactly as the original per-row ``any(w in title ...)`` checks. A missing
+title (None/NaN) gets the default label.
+
+Usage:
+    classifier = PostTypeClassifier()
+    df['post_type'] = classifier.classify(df['title'])
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from parallel import map_shards
+
+# (label, keywords) in priority order
+POST_TYPE_RULES = [
+    ('Question', ['?', 'question', 'ask', 'help', 'how do', 'what is', 'why']),
+    ('Introduction', ['hello', 'hi ', 'hey', 'introduce', 'new here', 'first post', 'greetings']),
+    ('Announcement', ['announce', 'release', 'launch', 'new:', 'introducing']),
+    ('Tutorial/Guide', ['guide', 'tutorial', 'how to', 'tips', 'learn']),
+    ('Discussion', ['discuss', 'debate', 'thoughts on', 'opinion', 'what do you think']),
+    ('Bounty/Task', ['bounty', 'reward', 'task', 'job', 'hiring']),
+    ('Sharing', ['share', 'sharing', 'my experience', 'story']),
+    ('Test', ['test', 'testing']),
+]
+DEFAULT_POST_TYPE = 'General'
+
+
+class PostTypeClassifier:
+    """Ordered keyword rules evaluated column-wise."""
+
+    def __init__(self, rules=POST_TYPE_RULES, default: str = DEFAULT_POST_TYPE):
+        self.rules = [(label, list(keywords)) for label, keywords in rules]
+        self.default = default
+        self._compile()
+
+    def _compile(self):
+        self.patterns = [(label, re.compile("|".join(re.escape(k.lower()) for k in keywords if k)))
+                         for label, keywords in self.rules if any(keywords)]
+
+    def add_rule(self, label: str, keywords, before: str = None):
+        """Add a category, at the lowest priority or just ahead of ``before``."""
+        position = len(self.rules)
+        if before is not None:
+            position = [name for name, _ in self.rules].index(before)
+        self.rules.insert(position, (label, list(keywords)))
+        self._compile()
+
+    def classify(self, titles, n_jobs: int = 1) -> np.ndarray:
+        """Label for every title (object array aligned with ``titles``)."""
+        # '' matches no keyword, so missing titles fall through to the default
+        titles = pd.Series(titles, dtype=object).fillna('').astype(str).to_numpy(dtype=object)
+        return np.concatenate(map_shards(_classify_shard, titles, (self,), n_jobs))
+
+    def _classify(self, titles) -> np.ndarray:
+        titles = pd.Series(titles, dtype=object).str.lower()
+        conditions = [titles.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+                      for _, pattern in self.patterns]
+        labels = [label for label, _ in self.patterns]
+        if not conditions:
+            return np.full(len(titles), self.default, dtype=object)
+        return np.select(conditions, labels, default=self.default).astype(object)
+
+
+def _classify_shard(titles, classifier: PostTypeClassifier) -> np.ndarray:
+    return classifier._classify(list(titles))
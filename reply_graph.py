@@ -0,0 +1,294 @@
+"""
+Agent reply graph built from flattened comments.
+
+Every comment is an edge from its author to the agent it answers: the parent
+comment's author for nested replies (``parent_id``), the post's author for
+top-level comments (``post_id``); replies to or from posts and comments
+without an author are dropped. Agents are mapped to dense ids with a
+``Dictionary`` and the network is a CSR matrix ``adjacency[u, v]`` = number
+of replies from ``u`` to ``v`` (self-replies are dropped by default).
+
+Edges are appended, never rebuilt: ``add_comments`` skips comment ids it has
+already seen, and replies whose parent has not arrived yet are linked when it
+does. The graph (edges plus the id → author lookups) is saved next to the
+comments snapshot (``moltbook_data.replies.npz``), so each run only appends
+the new comments.
+
+Usage:
+    graph = ReplyGraph()
+    graph.add_posts(iter_array("/home/ubuntu/moltbook_posts.json", "posts"))
+    graph.add_comments(iter_array("/home/ubuntu/moltbook_data.json", "comments"))
+    graph.pagerank()              # pd.Series by agent
+    graph.reciprocity()
+    graph.components()            # (count, label per agent)
+
+    python reply_graph.py         # append new comments, report
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from cache import load_npz, save_npz, save_optional, sidecar_path
+from tables import Dictionary
+
+POSTS_PATH = "/home/ubuntu/moltbook_posts.json"
+DATA_PATH = "/home/ubuntu/moltbook_data.json"
+
+
+def _author_name(record: dict) -> Optional[str]:
+    author = record.get("author")
+    return author.get("name") if isinstance(author, dict) else None
+
+
+class ReplyGraph:
+    """Append-only agent → agent reply network."""
+
+    def __init__(self, self_loops: bool = False):
+        self.self_loops = self_loops
+        self.agents = Dictionary()
+        self._src: list[int] = []
+        self._dst: list[int] = []
+        self._authors: dict[str, int] = {}                  # 'p:<id>' / 'c:<id>' -> agent, -1 if anonymous
+        self._waiting: dict[str, list] = defaultdict(list)  # unseen parent key -> reply authors
+        self._adjacency: Optional[sp.csr_matrix] = None
+
+    # ── Appends ──────────────────────────────────────────────
+
+    def add_posts(self, posts: Iterable[dict]):
+        """Register post authors (targets of top-level comments)."""
+        for post in posts:
+            key = f"p:{post.get('id', '')}"
+            if key not in self._authors:
+                self._register(key, self._agent(post))
+
+    def add_comments(self, comments: Iterable[dict]) -> int:
+        """Append one edge per comment not seen before; returns how many were new."""
+        added = 0
+        for comment in comments:
+            key = f"c:{comment.get('id', '')}"
+            if key in self._authors:
+                continue
+            author = self._agent(comment)
+            parent = comment.get("parent_id")
+            target = f"c:{parent}" if parent else f"p:{comment.get('post_id', '')}"
+            if target in self._authors:
+                self._append(author, self._authors[target])
+            else:
+                self._waiting[target].append(author)
+            self._register(key, author)
+            added += 1
+        return added
+
+    def add_edges(self, sources: Iterable[str], targets: Iterable[str]):
+        """Append replies given directly as (author, replied-to agent) names."""
+        for source, target in zip(sources, targets):
+            self._append(self.agents.encode(source), self.agents.encode(target))
+
+    def _agent(self, record: dict) -> int:
+        name = _author_name(record)
+        return -1 if name is None else self.agents.encode(name)
+
+    def _register(self, key: str, agent: int):
+        self._authors[key] = agent
+        for reply_author in self._waiting.pop(key, ()):
+            self._append(reply_author, agent)
+
+    def _append(self, source: int, target: int):
+        if source >= 0 and target >= 0 and (source != target or self.self_loops):
+            self._src.append(source)
+            self._dst.append(target)
+            self._adjacency = None
+
+    # ── Structure ────────────────────────────────────────────
+
+    @property
+    def n_agents(self) -> int:
+        return len(self.agents)
+
+    @property
+    def n_replies(self) -> int:
+        return len(self._src)
+
+    @property
+    def pending(self) -> int:
+        """Replies still waiting for their parent post/comment."""
+        return sum(len(v) for v in self._waiting.values())
+
+    @property
+    def adjacency(self) -> sp.csr_matrix:
+        """``[u, v]`` = replies from agent ``u`` to agent ``v``."""
+        n = self.n_agents
+        if self._adjacency is None or self._adjacency.shape[0] != n:
+            src = np.array(self._src, dtype=np.int32)
+            dst = np.array(self._dst, dtype=np.int32)
+            matrix = sp.csr_matrix((np.ones(len(src), dtype=np.int64), (src, dst)), shape=(n, n))
+            matrix.sum_duplicates()
+            self._adjacency = matrix
+        return self._adjacency
+
+    def _series(self, values, name: str) -> pd.Series:
+        return pd.Series(values, index=pd.Index(self.agents.values, name="agent"), name=name)
+
+    # ── Metrics ──────────────────────────────────────────────
+
+    def pagerank(self, alpha: float = 0.85, weighted: bool = True, tol: float = 1e-10,
+                 max_iter: int = 100) -> pd.Series:
+        """PageRank by power iteration; a reply passes rank to the agent replied to.
+
+        Agents that never reply (dangling) spread their rank uniformly.
+        """
+        n = self.n_agents
+        if n == 0:
+            return self._series(np.empty(0), "pagerank")
+        matrix = self.adjacency.astype(np.float64)
+        if not weighted:
+            matrix.data[:] = 1.0
+        out = np.asarray(matrix.sum(axis=1)).ravel()
+        dangling = out == 0
+        inv_out = np.divide(1.0, out, out=np.zeros(n), where=~dangling)
+        transition = (sp.diags(inv_out) @ matrix).T.tocsr()
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            new = alpha * (transition @ rank) + (alpha * rank[dangling].sum() + 1 - alpha) / n
+            if np.abs(new - rank).sum() < tol:
+                rank = new
+                break
+            rank = new
+        return self._series(rank / rank.sum(), "pagerank")
+
+    def reciprocity(self) -> float:
+        """Share of (distinct, non-self) reply links ``u → v`` answered by ``v → u``."""
+        links = self.adjacency.copy()
+        links.setdiag(0)
+        links.eliminate_zeros()
+        links.data[:] = 1
+        if links.nnz == 0:
+            return float("nan")
+        return links.multiply(links.T).nnz / links.nnz
+
+    def degrees(self) -> pd.DataFrame:
+        """Distinct agents replied to / replied by, and reply counts sent / received."""
+        matrix = self.adjacency
+        binary = matrix.copy()
+        binary.data[:] = 1
+        return pd.DataFrame({
+            "out_degree": np.asarray(binary.sum(axis=1)).ravel(),
+            "in_degree": np.asarray(binary.sum(axis=0)).ravel(),
+            "replies_sent": np.asarray(matrix.sum(axis=1)).ravel(),
+            "replies_received": np.asarray(matrix.sum(axis=0)).ravel(),
+        }, index=pd.Index(self.agents.values, name="agent"))
+
+    def degree_distribution(self, column: str = "in_degree") -> pd.Series:
+        """Number of agents per degree value."""
+        counts = np.bincount(self.degrees()[column].to_numpy())
+        present = np.flatnonzero(counts)
+        return pd.Series(counts[present], index=pd.Index(present, name=column), name="agents")
+
+    def components(self, connection: str = "weak") -> tuple[int, np.ndarray]:
+        """(number of components, component label per agent); 'weak' or 'strong'."""
+        return connected_components(self.adjacency, directed=True, connection=connection)
+
+    def component_sizes(self, connection: str = "weak") -> np.ndarray:
+        """Component sizes, largest first."""
+        _, labels = self.components(connection)
+        return np.sort(np.bincount(labels))[::-1]
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def save(self, path):
+        waiting = [(key, agent) for key, agents in self._waiting.items() for agent in agents]
+        arrays = {
+            "agents": np.array(self.agents.values, dtype=str),
+            "src": np.array(self._src, dtype=np.int32),
+            "dst": np.array(self._dst, dtype=np.int32),
+            "author_keys": np.array(list(self._authors), dtype=str),
+            "author_codes": np.array(list(self._authors.values()), dtype=np.int32),
+            "waiting_keys": np.array([key for key, _ in waiting], dtype=str),
+            "waiting_codes": np.array([agent for _, agent in waiting], dtype=np.int32),
+            "self_loops": np.array(self.self_loops),
+        }
+        save_npz(path, arrays)
+
+    @classmethod
+    def load(cls, path) -> Optional["ReplyGraph"]:
+        """A saved graph, or None if missing or unreadable."""
+        def read(data):
+            graph = cls(bool(data["self_loops"]))
+            graph.agents = Dictionary(data["agents"].tolist())
+            graph._src = data["src"].tolist()
+            graph._dst = data["dst"].tolist()
+            graph._authors = dict(zip(data["author_keys"].tolist(), data["author_codes"].tolist()))
+            for key, agent in zip(data["waiting_keys"].tolist(), data["waiting_codes"].tolist()):
+                graph._waiting[key].append(agent)
+            return graph
+        return load_npz(path, read)
+
+
+def update_graph(posts_source=POSTS_PATH, comments_source=DATA_PATH, graph_path=None,
+                 rebuild: bool = False) -> tuple[ReplyGraph, int]:
+    """Load the saved graph, append the snapshot's new posts/comments and save it."""
+    from jsonio import iter_array
+
+    graph_path = graph_path or sidecar_path(comments_source, "replies.npz")
+    graph = None if rebuild else ReplyGraph.load(graph_path)
+    graph = graph or ReplyGraph()
+    graph.add_posts(iter_array(posts_source, "posts"))
+    added = graph.add_comments(iter_array(comments_source, "comments"))
+    if added:
+        save_optional(graph.save, graph_path)
+    return graph, added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and score the agent reply graph.")
+    parser.add_argument("--posts", default=POSTS_PATH)
+    parser.add_argument("--comments", default=DATA_PATH)
+    parser.add_argument("--graph", default=None, help="saved graph (default: next to the comments)")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the saved graph")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    graph, added = update_graph(args.posts, args.comments, args.graph, args.rebuild)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    rank = graph.pagerank()
+    degrees = graph.degrees()
+    reciprocity = graph.reciprocity()
+    weak = graph.component_sizes("weak")
+    strong = graph.component_sizes("strong")
+    scored = time.perf_counter() - start
+
+    print("=" * 60)
+    print("REPLY GRAPH")
+    print("=" * 60)
+    print(f"\nAgents: {graph.n_agents:,}, replies: {graph.n_replies:,} "
+          f"({added:,} new comments, {graph.pending:,} waiting for their parent)")
+    print(f"Distinct reply links: {graph.adjacency.nnz:,}")
+    print(f"Built in {built:.2f}s, scored in {scored:.2f}s")
+
+    print(f"\nReciprocity: {reciprocity:.1%}")
+    print(f"Weak components: {len(weak):,} (largest {weak[0] if len(weak) else 0:,} agents)")
+    print(f"Strong components: {len(strong):,} (largest {strong[0] if len(strong) else 0:,} agents)")
+
+    print(f"\nTop {args.top} agents by PageRank:")
+    table = degrees.join(rank).sort_values("pagerank", ascending=False).head(args.top)
+    for row in table.itertuples():
+        print(f"  {row.Index}: {row.pagerank:.4f} (in {row.in_degree:,}, out {row.out_degree:,}, "
+              f"received {row.replies_received:,})")
+
+    for column in ("in_degree", "out_degree"):
+        values = degrees[column]
+        print(f"\n{column.replace('_', '-').capitalize()}: mean {values.mean():.1f}, "
+              f"median {values.median():.0f}, max {values.max():,}, zero {(values == 0).sum():,}")
+
+
+if __name__ == "__main__":
+    main()
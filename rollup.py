@@ -0,0 +1,259 @@
+"""
+Materialized rollup cube for dashboard queries.
+
+Posts are pre-aggregated into cells keyed by submolt × author × post type ×
+hour × theme set, with post count and upvote/downvote/comment sums per cell.
+Themes are a bitmask per cell (a post can match several), so filtering on a
+theme never double counts and grouping by theme expands the bits at query
+time. Days are hours // 24. Because author is a dimension, distinct authors
+of any slice are exact.
+
+Cells are stored as columns (``moltbook_posts.rollup.npz`` next to the
+snapshot) and updated in place: ``add`` folds new posts in, or removes them
+with ``weight=-1``, and re-aggregates only the cell table, never the posts.
+``incremental.py`` keeps the stored cube current with each snapshot delta.
+
+Queries are NumPy masks and bincounts over the cell columns:
+
+    cube = load_or_build("/home/ubuntu/moltbook_posts.json")
+    cube.query(by='submolt', where={'theme': 'Crypto & Trading'},
+               last='7D', sort='comments', top=10)
+
+    python rollup.py --by submolt --theme "Crypto & Trading" --last 7D --sort comments
+"""
+
+import argparse
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import fingerprint, load_npz, load_or_build as _load_or_build, save_npz, sidecar_path
+from tables import NAT, Dictionary
+
+# Bump when the stored layout changes so old cubes are rebuilt
+ROLLUP_VERSION = 1
+
+HOUR_NS = 3_600 * 10**9
+
+DIMENSIONS = ('submolt', 'author', 'post_type', 'hour', 'themes')
+MEASURES = ('posts', 'upvotes', 'downvotes', 'comments')
+GROUPS = ('submolt', 'author', 'post_type', 'theme', 'hour', 'day')
+
+
+class RollupCube:
+    """Cell table: dimension codes plus summed measures."""
+
+    def __init__(self, theme_names):
+        self.theme_names = list(theme_names)
+        if len(self.theme_names) > 63:
+            raise ValueError("at most 63 themes fit in a cell's theme mask")
+        self.dictionaries = {name: Dictionary() for name in ('submolt', 'author', 'post_type')}
+        self.cells = {name: np.empty(0, dtype=np.int64) for name in DIMENSIONS + MEASURES}
+
+    def __len__(self) -> int:
+        return len(self.cells['posts'])
+
+    # ── Updates ──────────────────────────────────────────────
+
+    def add(self, submolt, author, post_type, created, themes, upvotes, downvotes, comments, weight=1):
+        """Fold posts into the cube (one entry per post; ``weight=-1`` removes).
+
+        ``created`` is ns since the epoch (``tables.NAT`` if missing) and
+        ``themes`` a bitmask over ``theme_names``.
+        """
+        created = np.asarray(created, dtype=np.int64)
+        n = len(created)
+        weight = np.broadcast_to(np.asarray(weight, dtype=np.int64), (n,))
+        columns = {
+            # Missing names are 'Unknown', as PostTable stores them
+            name: np.array([self.dictionaries[name].encode('Unknown' if pd.isna(v) else str(v)) for v in values],
+                           dtype=np.int64)
+            for name, values in (('submolt', submolt), ('author', author), ('post_type', post_type))
+        }
+        columns['hour'] = np.where(created == NAT, NAT, created // HOUR_NS)
+        columns['themes'] = np.asarray(themes, dtype=np.int64)
+        columns['posts'] = weight.copy()
+        for name, values in (('upvotes', upvotes), ('downvotes', downvotes), ('comments', comments)):
+            columns[name] = np.asarray(values, dtype=np.int64) * weight
+        self._merge(columns)
+
+    def add_frame(self, frame: pd.DataFrame, post_types, theme_matrix: np.ndarray, weight=1):
+        """``add`` for an enriched posts frame with its post types and theme matrix."""
+        weights = 1 << np.arange(theme_matrix.shape[1], dtype=np.int64)
+        self.add(frame['submolt_name'].astype(object), frame['author_name'].astype(object), post_types,
+                 pd.DatetimeIndex(frame['created_at']).asi8, theme_matrix.astype(np.int64) @ weights,
+                 frame['upvotes'].to_numpy(), frame['downvotes'].to_numpy(),
+                 frame['comment_count'].to_numpy(), weight)
+
+    def _merge(self, columns: dict):
+        both = pd.DataFrame({name: np.concatenate([self.cells[name], columns[name]])
+                             for name in DIMENSIONS + MEASURES})
+        cells = both.groupby(list(DIMENSIONS), sort=False, as_index=False)[list(MEASURES)].sum()
+        cells = cells[cells['posts'] != 0]
+        self.cells = {name: cells[name].to_numpy(dtype=np.int64) for name in DIMENSIONS + MEASURES}
+
+    # ── Queries ──────────────────────────────────────────────
+
+    def _codes(self, dimension: str, values) -> np.ndarray:
+        values = [values] if isinstance(values, str) else list(values)
+        if dimension == 'theme':
+            # Unknown themes get -1 like unknown names, so they match nothing
+            index = {theme: j for j, theme in enumerate(self.theme_names)}
+            return np.array([index.get(v, -1) for v in values], dtype=np.int64)
+        return np.array([self.dictionaries[dimension].get(str(v)) for v in values], dtype=np.int64)
+
+    def _mask(self, where: Optional[dict], last, since, until) -> np.ndarray:
+        cells = self.cells
+        mask = np.ones(len(self), dtype=bool)
+        for dimension, values in (where or {}).items():
+            codes = self._codes(dimension, values)
+            if dimension == 'theme':
+                codes = codes[codes >= 0]
+                bits = np.bitwise_or.reduce(np.left_shift(1, codes)) if len(codes) else 0
+                mask &= (cells['themes'] & bits) != 0
+            else:
+                mask &= np.isin(cells[dimension], codes)
+        hours = cells['hour']
+        if last is not None:
+            dated = hours[hours != NAT]
+            end = int(dated.max()) + 1 if len(dated) else 0
+            since_hour = end - int(np.ceil(pd.Timedelta(last).value / HOUR_NS))
+            mask &= (hours != NAT) & (hours >= since_hour)
+        if since is not None:
+            mask &= (hours != NAT) & (hours >= pd.Timestamp(since).value // HOUR_NS)
+        if until is not None:
+            mask &= (hours != NAT) & (hours < -(-pd.Timestamp(until).value // HOUR_NS))
+        return mask
+
+    def _groups(self, by: str, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, list]:
+        """(cell rows, group index per row, group labels); theme expands each row per bit."""
+        if by == 'theme':
+            themes = self.cells['themes'][rows]
+            hits = [(rows[(themes >> j) & 1 == 1], j) for j in range(len(self.theme_names))]
+            return (np.concatenate([r for r, _ in hits]),
+                    np.concatenate([np.full(len(r), j) for r, j in hits]).astype(np.int64),
+                    self.theme_names)
+        if by in ('hour', 'day'):
+            rows = rows[self.cells['hour'][rows] != NAT]
+            values = self.cells['hour'][rows] // (24 if by == 'day' else 1)
+            keys, index = np.unique(values, return_inverse=True)
+            step = 24 * HOUR_NS if by == 'day' else HOUR_NS
+            return rows, index, list(pd.to_datetime(keys * step, utc=True))
+        return rows, self.cells[by][rows], self.dictionaries[by].values
+
+    def query(self, by: str = 'submolt', where: Optional[dict] = None, last=None, since=None,
+              until=None, sort: str = 'posts', top: Optional[int] = None) -> pd.DataFrame:
+        """Measures and distinct authors per ``by`` group over the filtered cells.
+
+        ``where`` maps dimensions ('submolt', 'author', 'post_type', 'theme')
+        to a value or list of values; ``last`` (e.g. '7D') keeps the window
+        ending at the newest hour, ``since``/``until`` absolute bounds. Rows
+        are sorted by ``sort`` (descending; time groups stay in time order
+        when ``sort`` is None).
+        """
+        if by not in GROUPS:
+            raise ValueError(f"unknown group {by!r}; choose from: {', '.join(GROUPS)}")
+        rows = np.flatnonzero(self._mask(where, last, since, until))
+        rows, group, labels = self._groups(by, rows)
+        n = len(labels)
+        result = {name: np.bincount(group, weights=self.cells[name][rows], minlength=n).astype(np.int64)
+                  for name in MEASURES}
+        n_authors = max(len(self.dictionaries['author']), 1)
+        pairs = np.unique(group * n_authors + self.cells['author'][rows])
+        result['authors'] = np.bincount(pairs // n_authors, minlength=n).astype(np.int64)
+        frame = pd.DataFrame(result, index=pd.Index(labels, name=by))
+        frame = frame[frame['posts'] > 0]
+        if sort is not None:
+            frame = frame.sort_values(sort, ascending=False, kind="stable")
+        return frame if top is None else frame.head(top)
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def save(self, path, key: str = ""):
+        arrays = {f"cell_{name}": values for name, values in self.cells.items()}
+        arrays.update({f"dict_{name}": np.array(d.values, dtype=str) for name, d in self.dictionaries.items()})
+        arrays["theme_names"] = np.array(self.theme_names, dtype=str)
+        arrays["key"] = np.array(key)
+        save_npz(path, arrays)
+
+    @classmethod
+    def load(cls, path, key: Optional[str] = None) -> Optional["RollupCube"]:
+        """Load a saved cube; None if missing or saved under another key."""
+        def read(data):
+            cube = cls(data["theme_names"].tolist())
+            for name in cube.dictionaries:
+                cube.dictionaries[name] = Dictionary(data[f"dict_{name}"].tolist())
+            cube.cells = {name: data[f"cell_{name}"].astype(np.int64) for name in DIMENSIONS + MEASURES}
+            return cube
+        return load_npz(path, read, key)
+
+
+def _themes(themes: Optional[dict]) -> dict:
+    if themes is None:
+        from theme_patterns import theme_patterns
+        themes = {theme: config['keywords'] for theme, config in theme_patterns.items()}
+    return themes
+
+
+def cube_key(source, themes: Optional[dict] = None) -> str:
+    from post_types import POST_TYPE_RULES
+    return fingerprint(source, extra={"rollup": ROLLUP_VERSION, "themes": _themes(themes),
+                                      "post_types": POST_TYPE_RULES})
+
+
+def build_cube(source, themes: Optional[dict] = None, chunk_size: int = None) -> RollupCube:
+    """Stream a snapshot (JSON or NDJSON) into a new cube."""
+    from post_types import PostTypeClassifier
+    from streaming import CHUNK_SIZE, chunk_frame, iter_chunks
+    from theme_matcher import ThemeMatcher
+
+    themes = _themes(themes)
+    matcher, classifier = ThemeMatcher(themes), PostTypeClassifier()
+    cube = RollupCube(themes)
+    for records in iter_chunks(source, chunk_size or CHUNK_SIZE):
+        frame = chunk_frame(records)
+        cube.add_frame(frame, classifier.classify(frame['title'], n_jobs=-1),
+                       matcher.match(frame['text_lower'], lowercase=False, n_jobs=-1))
+    return cube
+
+
+def load_or_build(source, themes: Optional[dict] = None, cache_dir: str = None,
+                  refresh: bool = False) -> RollupCube:
+    """The cube stored next to ``source``, rebuilt if the snapshot changed."""
+    path = sidecar_path(source, "rollup.npz", cache_dir)
+    key = cube_key(source, themes)
+    return _load_or_build(path, key, RollupCube.load, lambda: build_cube(source, themes), RollupCube.save, refresh)
+
+
+def main(argv=None):
+    import time
+
+    parser = argparse.ArgumentParser(description="Query the Moltbook rollup cube.")
+    parser.add_argument("source", nargs="?", default="/home/ubuntu/moltbook_posts.json")
+    parser.add_argument("--by", default="submolt", choices=GROUPS)
+    parser.add_argument("--sort", choices=MEASURES + ('authors',),
+                        help="measure to rank by (default: posts; hours/days stay in time order)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--last", help="window ending at the newest post, e.g. 7D or 12h")
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    for dimension in ('submolt', 'author', 'post_type', 'theme'):
+        parser.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action="append",
+                            help=f"filter on {dimension} (repeatable)")
+    parser.add_argument("--refresh", action="store_true", help="rebuild the stored cube")
+    args = parser.parse_args(argv)
+
+    cube = load_or_build(args.source, refresh=args.refresh)
+    where = {d: getattr(args, d) for d in ('submolt', 'author', 'post_type', 'theme') if getattr(args, d)}
+    start = time.perf_counter()
+    sort = args.sort or (None if args.by in ('hour', 'day') else 'posts')
+    result = cube.query(args.by, where, args.last, args.since, args.until, sort, args.top)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"{len(cube):,} cells; query took {elapsed:.1f} ms\n")
+    print(result.to_string())
+
+
+if __name__ == "__main__":
+    main()
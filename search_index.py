@@ -0,0 +1,521 @@
+"""
+Local inverted index over posts and comments: BM25 ranking and Boolean
+keyword queries without touching the API.
+
+Documents (a post's title + content, a comment's content) are tokenized with
+``tokens.Tokenizer`` and numbered in the order they are added. Documents are
+buffered and written by ``flush`` as immutable segments; ``compact`` merges
+them into one (``flush`` does it by itself past ``max_segments``):
+
+    <root>/meta.json       tokenizer the index was created with
+    <root>/terms.ndjson    one term per line, line number = term id
+    <root>/docs.ndjson     [kind, id, post_id, submolt, author, created ns] per document
+    <root>/seg-N.npz       one flush worth of documents
+
+Inside a segment every term's posting list is its sorted document numbers,
+delta-encoded (the first relative to the segment's first document) and
+packed as variable-length 7-bit integers into one byte array; ``ptr`` gives
+each term's byte range, ``count`` its posting offsets into ``tf`` (term
+frequencies, saturated at 255) and ``lengths`` holds document lengths for
+BM25. Posting lists are decoded with vectorized numpy, so a query only pays
+for the lists of its own terms.
+
+Documents already in the index (by kind and id) are skipped when added again,
+so a full scrape only indexes what is new; only flushed documents are
+searchable. Edits to an already indexed post are not picked up.
+
+Usage:
+    index = SearchIndex()                          # next to the posts snapshot
+    index.add_posts(posts); index.add_comments(comments); index.flush()
+
+    index.search("memory persistence", k=10, kind="post", submolt="general",
+                 since="2026-01-30")               # DataFrame ranked by BM25
+    index.match("memory AND (context OR window) NOT crypto")
+
+    python search_index.py "memory persistence" --kind post --top 10
+    python search_index.py --boolean "memory AND NOT token"
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import save_npz, sidecar_path
+from tables import NAT, Dictionary, parse_timestamp
+from tokens import TokenCorpus, Tokenizer
+
+POSTS_PATH = "/home/ubuntu/moltbook_posts.json"
+DATA_PATH = "/home/ubuntu/moltbook_data.json"
+INDEX_DIR = str(sidecar_path(POSTS_PATH, "index"))
+
+KINDS = ("post", "comment")
+_QUERY_TOKEN = re.compile(r"\(|\)|[^\s()]+")
+
+
+# ── Variable-length integers ─────────────────────────────────
+
+def _varint_encode(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(bytes, bytes per value): 7 bits per byte, high bit set on all but the last."""
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        sizes += rest > 0
+        rest >>= np.uint64(7)
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    starts = np.cumsum(sizes) - sizes
+    for k in range(int(sizes.max()) if len(sizes) else 0):
+        more = sizes > k
+        byte = (values[more] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= np.where(sizes[more] > k + 1, np.uint64(0x80), np.uint64(0))
+        out[starts[more] + k] = byte
+    return out, sizes
+
+
+def _varint_decode(data: np.ndarray) -> np.ndarray:
+    last = np.flatnonzero(data < 0x80)
+    if len(last) == len(data):
+        return data.astype(np.int64)   # every value fit in one byte
+    first = np.concatenate(([0], last[:-1] + 1))
+    position = np.arange(len(data)) - np.repeat(first, last - first + 1)
+    parts = (data & 0x7F).astype(np.uint64) << (position * 7).astype(np.uint64)
+    return np.add.reduceat(parts, first).astype(np.int64)
+
+
+# ── Segments ─────────────────────────────────────────────────
+
+class _Segment:
+    """Posting lists of a contiguous run of documents."""
+
+    FIELDS = ("first", "terms", "ptr", "count", "data", "tf", "lengths")
+
+    def __init__(self, first: int, terms: np.ndarray, ptr: np.ndarray, count: np.ndarray,
+                 data: np.ndarray, tf: np.ndarray, lengths: np.ndarray):
+        self.first = int(first)
+        self.terms = terms
+        self.ptr = ptr
+        self.count = count
+        self.data = data
+        self.tf = tf
+        self.lengths = lengths
+
+    @classmethod
+    def build(cls, first: int, doc: np.ndarray, term: np.ndarray, lengths: np.ndarray,
+              tf: np.ndarray = None) -> "_Segment":
+        """From one (local document, term id) pair per token, or distinct pairs with their ``tf``."""
+        n_docs = max(len(lengths), 1)
+        key = term.astype(np.int64) * n_docs + doc
+        if tf is None:
+            key, tf = np.unique(key, return_counts=True)
+        else:
+            order = np.argsort(key, kind="stable")
+            key, tf = key[order], tf[order]
+        term_of, docs = np.divmod(key, n_docs)
+        terms, starts = np.unique(term_of, return_index=True)
+        deltas = np.diff(docs, prepend=0)
+        deltas[starts] = docs[starts]
+        data, sizes = _varint_encode(deltas)
+        ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        count = np.zeros(len(terms) + 1, dtype=np.int64)
+        if len(terms):
+            np.cumsum(np.add.reduceat(sizes, starts), out=ptr[1:])
+            count[1:-1] = starts[1:]
+            count[-1] = len(docs)
+        return cls(first, terms.astype(np.int32), ptr, count, data,
+                   np.minimum(tf, 255).astype(np.uint8), np.asarray(lengths, dtype=np.int32))
+
+    @classmethod
+    def load(cls, path) -> "_Segment":
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in cls.FIELDS})
+
+    def save(self, path):
+        save_npz(path, {name: getattr(self, name) for name in self.FIELDS}, compressed=False)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.lengths)
+
+    def postings(self, term: int) -> tuple[np.ndarray, np.ndarray]:
+        """(global document numbers, term frequencies) of one term."""
+        i = np.searchsorted(self.terms, term)
+        if i == len(self.terms) or self.terms[i] != term:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8)
+        docs = np.cumsum(_varint_decode(self.data[self.ptr[i]:self.ptr[i + 1]])) + self.first
+        return docs, self.tf[self.count[i]:self.count[i + 1]]
+
+    def pairs(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Every (local document, term, tf) for merging."""
+        df = np.diff(self.count)
+        deltas = _varint_decode(self.data)
+        term = np.repeat(self.terms.astype(np.int64), df)
+        # Undo the deltas within each term's run
+        total = np.cumsum(deltas)
+        before = np.repeat(total[self.count[:-1]] - deltas[self.count[:-1]], df)
+        return total - before, term, self.tf.astype(np.int64)
+
+
+# ── Index ────────────────────────────────────────────────────
+
+def _ns(value) -> int:
+    """ns since the epoch; naive dates/times are taken as UTC."""
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts).value
+
+
+def _name(record: dict, field: str) -> str:
+    value = record.get(field)
+    return (value.get("name") or "") if isinstance(value, dict) else ""
+
+
+class SearchIndex:
+    """Append-only, segmented inverted index with BM25 and Boolean queries."""
+
+    def __init__(self, root: str = INDEX_DIR, k1: float = 1.2, b: float = 0.75,
+                 max_segments: int = 16):
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        meta_path = self.root / "meta.json"
+        if meta_path.exists():
+            # An existing index keeps the tokenizer it was built with
+            self.tokenizer = Tokenizer(**json.loads(meta_path.read_text())["tokenizer"])
+        else:
+            self.tokenizer = Tokenizer()
+            meta_path.write_text(json.dumps({"tokenizer": self.tokenizer.config}))
+        self.terms = Dictionary()
+        self.submolts = Dictionary([""])
+        self.authors = Dictionary([""])
+        self._keys: dict[str, int] = {}        # '<kind>:<id>' -> document number
+        self._post_submolt: dict[str, int] = {}
+        self._docs: dict[str, list] = {name: [] for name in ("kind", "id", "post_id", "submolt", "author", "created")}
+        self._buffer: list[tuple] = []
+        self._arrays: Optional[dict] = None
+        self._load()
+
+    def _load(self):
+        terms_path = self.root / "terms.ndjson"
+        if terms_path.exists():
+            with open(terms_path, encoding="utf-8") as f:
+                for line in f:
+                    self.terms.encode(json.loads(line))
+        docs_path = self.root / "docs.ndjson"
+        if docs_path.exists():
+            with open(docs_path, encoding="utf-8") as f:
+                for line in f:
+                    self._register(*json.loads(line))
+        self.segments = []
+        end = 0
+        for path in sorted(self.root.glob("seg-*.npz"), key=lambda p: int(p.stem.split("-")[1])):
+            segment = _Segment.load(path)
+            if segment.first < end:
+                path.unlink()  # already merged into seg-0 by a compact that stopped before cleanup
+            elif segment.first + segment.n_docs <= len(self):
+                self.segments.append(segment)
+                end = segment.first + segment.n_docs
+            else:
+                path.unlink()  # written by a flush that never recorded its documents
+
+    def _register(self, kind: str, doc_id: str, post_id: str, submolt: str, author: str, created: int):
+        self._keys[f"{kind}:{doc_id}"] = len(self._docs["id"])
+        docs = self._docs
+        docs["kind"].append(KINDS.index(kind))
+        docs["id"].append(doc_id)
+        docs["post_id"].append(post_id)
+        docs["submolt"].append(self.submolts.encode(submolt))
+        docs["author"].append(self.authors.encode(author))
+        docs["created"].append(created)
+        if kind == "post":
+            self._post_submolt[doc_id] = docs["submolt"][-1]
+
+    def __len__(self) -> int:
+        return len(self._docs["id"])
+
+    # ── Writing ──────────────────────────────────────────────
+
+    def add_posts(self, posts: Iterable[dict]) -> int:
+        """Buffer posts not indexed yet; returns how many were new."""
+        return self._add("post", ((p, str(p.get("id", "")), _name(p, "submolt"),
+                                   f"{p.get('title') or ''} {p.get('content') or ''}") for p in posts))
+
+    def add_comments(self, comments: Iterable[dict]) -> int:
+        """Buffer comments not indexed yet (submolt taken from their post when indexed)."""
+        def rows():
+            for c in comments:
+                post_id = str(c.get("post_id", ""))
+                code = self._post_submolt.get(post_id)
+                submolt = self.submolts.values[code] if code is not None else ""
+                yield c, str(c.get("id", "")), submolt, c.get("content") or ""
+        return self._add("comment", rows())
+
+    def _add(self, kind: str, rows) -> int:
+        added = 0
+        pending = {f"{kind}:{row[1]}" for row in self._buffer if row[0] == kind}
+        for record, doc_id, submolt, text in rows:
+            key = f"{kind}:{doc_id}"
+            if key in self._keys or key in pending:
+                continue
+            pending.add(key)
+            post_id = doc_id if kind == "post" else str(record.get("post_id", ""))
+            if kind == "post":
+                self._post_submolt.setdefault(doc_id, self.submolts.encode(submolt))
+            self._buffer.append((kind, doc_id, post_id, submolt, _name(record, "author"),
+                                 parse_timestamp(record.get("created_at")), text))
+            added += 1
+        return added
+
+    def flush(self) -> int:
+        """Write buffered documents as one segment; returns how many."""
+        if not self._buffer:
+            return 0
+        first, n_terms = len(self), len(self.terms)
+        corpus = TokenCorpus.build([row[-1] for row in self._buffer], self.tokenizer)
+        term_ids = np.array([self.terms.encode(w) for w in corpus.vocab], dtype=np.int64)
+        segment = _Segment.build(first, corpus.doc_of_token, term_ids[corpus.ids] if len(corpus.ids) else corpus.ids,
+                                 np.diff(corpus.indptr))
+        with open(self.root / "terms.ndjson", "a", encoding="utf-8") as f:
+            for term in self.terms.values[n_terms:]:
+                f.write(json.dumps(term) + "\n")
+        number = max((int(p.stem.split("-")[1]) for p in self.root.glob("seg-*.npz")), default=-1) + 1
+        segment.save(self.root / f"seg-{number}.npz")
+        with open(self.root / "docs.ndjson", "a", encoding="utf-8") as f:
+            for row in self._buffer:
+                f.write(json.dumps(list(row[:-1])) + "\n")
+                self._register(*row[:-1])
+        self.segments.append(segment)
+        self._arrays = None
+        written = len(self._buffer)
+        self._buffer = []
+        if len(self.segments) > self.max_segments:
+            self.compact()
+        return written
+
+    def compact(self):
+        """Merge all segments into one."""
+        if len(self.segments) < 2:
+            return
+        docs, terms, tfs = [], [], []
+        for segment in self.segments:
+            doc, term, tf = segment.pairs()
+            docs.append(doc + segment.first)
+            terms.append(term)
+            tfs.append(tf)
+        first = self.segments[0].first
+        merged = _Segment.build(first, np.concatenate(docs) - first, np.concatenate(terms),
+                                np.concatenate([s.lengths for s in self.segments]), np.concatenate(tfs))
+        # Replace seg-0 first (save_npz writes a temp file and renames it); a crash before
+        # the stale segments are gone leaves them covered by seg-0, and _load drops them
+        old = [p for p in self.root.glob("seg-*.npz") if p.name != "seg-0.npz"]
+        merged.save(self.root / "seg-0.npz")
+        for path in old:
+            path.unlink()
+        self.segments = [merged]
+
+    # ── Reading ──────────────────────────────────────────────
+
+    @property
+    def arrays(self) -> dict:
+        """Column arrays of the searchable documents (plus ``length``)."""
+        if self._arrays is None:
+            n = sum(s.n_docs for s in self.segments)
+            arrays = {name: np.array(values[:n], dtype=object if name in ("id", "post_id") else np.int64)
+                      for name, values in self._docs.items()}
+            arrays["length"] = (np.concatenate([s.lengths for s in self.segments]).astype(np.int64)
+                                if self.segments else np.empty(0, dtype=np.int64))
+            arrays["submolts"] = pd.Index(self.submolts.values)
+            arrays["authors"] = pd.Index(self.authors.values)
+            # BM25 length normalization k1 * (1 - b + b * length / average length)
+            avgdl = max(arrays["length"].mean(), 1e-9) if n else 1.0
+            arrays["norm"] = self.k1 * (1 - self.b + self.b * arrays["length"] / avgdl)
+            self._arrays = arrays
+        return self._arrays
+
+    @property
+    def n_searchable(self) -> int:
+        return len(self.arrays["length"])
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        """(document numbers, term frequencies) of one (already lowercased) term."""
+        code = self.terms.get(term)
+        if code < 0 or not self.segments:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8)
+        parts = [s.postings(code) for s in self.segments]
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def _filter(self, docs: np.ndarray, kind=None, submolt=None, author=None,
+                since=None, until=None) -> np.ndarray:
+        arrays = self.arrays
+        keep = np.ones(len(docs), dtype=bool)
+        if kind is not None:
+            keep &= arrays["kind"][docs] == KINDS.index(kind)
+        for name, value, dictionary in (("submolt", submolt, self.submolts), ("author", author, self.authors)):
+            if value is not None:
+                keep &= arrays[name][docs] == dictionary.get(value)
+        created = arrays["created"][docs]
+        if since is not None:
+            keep &= (created != NAT) & (created >= _ns(since))
+        if until is not None:
+            keep &= (created != NAT) & (created < _ns(until))
+        return docs[keep]
+
+    def search(self, query: str, k: int = 10, kind: str = None, submolt: str = None,
+               author: str = None, since=None, until=None) -> pd.DataFrame:
+        """Top ``k`` documents by BM25 over the query's terms, after filtering.
+
+        ``since``/``until`` bound ``created_at`` (inclusive/exclusive); documents
+        without a timestamp are dropped when either is given.
+        """
+        n = self.n_searchable
+        norm = self.arrays["norm"]
+        scores = np.zeros(n)
+        hit = np.zeros(n, dtype=bool)
+        for term in set(self.tokenizer.tokenize(query)):
+            docs, tf = self.postings(term)
+            if not len(docs):
+                continue
+            idf = np.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            tf = tf.astype(np.float64)
+            scores[docs] += idf * (self.k1 + 1) * tf / (tf + norm[docs])
+            hit[docs] = True
+        docs = self._filter(np.flatnonzero(hit), kind, submolt, author, since, until)
+        if len(docs) > k:
+            # Keep everything tied with the k-th score so ties go to the earlier document
+            kth = np.partition(scores[docs], len(docs) - k)[len(docs) - k]
+            docs = docs[scores[docs] >= kth]
+        docs = docs[np.lexsort((docs, -scores[docs]))][:k]
+        return self._frame(docs, scores[docs])
+
+    def match(self, expression: str, kind: str = None, submolt: str = None,
+              author: str = None, since=None, until=None) -> pd.DataFrame:
+        """Documents matching a Boolean query, newest first.
+
+        Words are ANDed unless joined by ``OR``; ``NOT`` negates and
+        parentheses group (operators are upper case). A word that tokenizes
+        into several terms needs all of them.
+        """
+        tokens = _QUERY_TOKEN.findall(expression)
+        mask, rest = self._parse_or(tokens)
+        if rest:
+            raise ValueError(f"unexpected {rest[0]!r} in query {expression!r}")
+        docs = self._filter(np.flatnonzero(mask), kind, submolt, author, since, until)
+        docs = docs[np.argsort(-self.arrays["created"][docs], kind="stable")]
+        return self._frame(docs)
+
+    # Sub-queries are evaluated as document masks, so AND/OR/NOT are single passes
+
+    def _parse_or(self, tokens: list) -> tuple[np.ndarray, list]:
+        mask, tokens = self._parse_and(tokens)
+        while tokens and tokens[0] == "OR":
+            right, tokens = self._parse_and(tokens[1:])
+            mask |= right
+        return mask, tokens
+
+    def _parse_and(self, tokens: list) -> tuple[np.ndarray, list]:
+        mask, tokens = self._parse_not(tokens)
+        while tokens and tokens[0] not in ("OR", ")"):
+            if tokens[0] == "AND":
+                tokens = tokens[1:]
+            right, tokens = self._parse_not(tokens)
+            mask &= right
+        return mask, tokens
+
+    def _parse_not(self, tokens: list) -> tuple[np.ndarray, list]:
+        if not tokens:
+            raise ValueError("query ends early")
+        if tokens[0] == "NOT":
+            mask, tokens = self._parse_not(tokens[1:])
+            return ~mask, tokens
+        if tokens[0] == "(":
+            mask, tokens = self._parse_or(tokens[1:])
+            if not tokens or tokens[0] != ")":
+                raise ValueError("unbalanced parentheses")
+            return mask, tokens[1:]
+        if tokens[0] in ("AND", "OR", ")"):
+            raise ValueError(f"unexpected {tokens[0]!r}")
+        terms = self.tokenizer.tokenize(tokens[0])
+        mask = np.zeros(self.n_searchable, dtype=bool)
+        if terms:
+            mask[self.postings(terms[0])[0]] = True
+            for term in terms[1:]:
+                other = np.zeros(self.n_searchable, dtype=bool)
+                other[self.postings(term)[0]] = True
+                mask &= other
+        return mask, tokens[1:]
+
+    def _frame(self, docs: np.ndarray, scores: np.ndarray = None) -> pd.DataFrame:
+        arrays = self.arrays
+        frame = pd.DataFrame({
+            "kind": pd.Categorical.from_codes(arrays["kind"][docs], KINDS),
+            "id": pd.Series(arrays["id"][docs], dtype=object),
+            "post_id": pd.Series(arrays["post_id"][docs], dtype=object),
+            "submolt": pd.Categorical.from_codes(arrays["submolt"][docs], arrays["submolts"]),
+            "author": pd.Categorical.from_codes(arrays["author"][docs], arrays["authors"]),
+            "created_at": pd.DatetimeIndex(arrays["created"][docs].view("datetime64[ns]"), tz="UTC"),
+        })
+        frame.index = pd.Index(docs, name="doc")
+        if scores is not None:
+            frame["score"] = scores
+        return frame
+
+
+def update_index(posts_source=POSTS_PATH, comments_source=DATA_PATH, root=INDEX_DIR) -> tuple[SearchIndex, int]:
+    """Open the index, add the snapshots' new posts and comments and flush."""
+    from jsonio import iter_array
+
+    index = SearchIndex(root)
+    index.add_posts(iter_array(posts_source, "posts"))
+    if comments_source and os.path.exists(comments_source):
+        index.add_comments(iter_array(comments_source, "comments"))
+    return index, index.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the local post/comment index.")
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--boolean", action="store_true", help="treat the query as AND/OR/NOT keywords")
+    parser.add_argument("--kind", choices=KINDS)
+    parser.add_argument("--submolt")
+    parser.add_argument("--author")
+    parser.add_argument("--since", help="created at or after (ISO date/time)")
+    parser.add_argument("--until", help="created before (ISO date/time)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--posts", default=POSTS_PATH)
+    parser.add_argument("--comments", default=DATA_PATH, help="comments snapshot ('' to skip)")
+    parser.add_argument("--index", default=None, help="index directory (default: next to the posts)")
+    parser.add_argument("--compact", action="store_true", help="merge the index into one segment")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index, added = update_index(args.posts, args.comments, args.index or sidecar_path(args.posts, "index"))
+    if args.compact:
+        index.compact()
+    elapsed = time.perf_counter() - start
+
+    print("=" * 60)
+    print("SEARCH INDEX")
+    print("=" * 60)
+    print(f"\nDocuments: {index.n_searchable:,} ({added:,} new), terms: {len(index.terms):,}, "
+          f"segments: {len(index.segments)}, opened in {elapsed:.2f}s")
+    if not args.query:
+        return
+    filters = dict(kind=args.kind, submolt=args.submolt, author=args.author, since=args.since, until=args.until)
+    start = time.perf_counter()
+    hits = index.match(args.query, **filters) if args.boolean else index.search(args.query, args.top, **filters)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"\n{len(hits):,} {'matches' if args.boolean else 'results'} for {args.query!r} in {elapsed:.1f} ms")
+    for row in hits.head(args.top).itertuples():
+        score = f"{row.score:.2f} " if not args.boolean else ""
+        print(f"  {score}[{row.kind} {row.id}] m/{row.submolt} by {row.author or '?'} at {row.created_at}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Lexicon-based sentiment and tone scoring.
+
+Every lexicon word (positive, negative, curious, ...) is compiled into one
+``KeywordAutomaton`` (see ``theme_matcher.py``), so each text is scanned once
+for all lexicons instead of once per word. Hits become a sparse
+documents × words matrix that is multiplied by a words × lexicons weight
+matrix, which gives every score array in one product.
+
+A document scores the weight of each distinct lexicon word it contains.
+Matching is on whole words by default, so 'bad' does not fire inside 'badge'.
+Lexicons are word lists (weight 1) or ``{word: weight}`` dicts, and can be
+loaded from JSON with ``LexiconScorer.from_file``. Large corpora are split
+across worker processes with ``n_jobs`` (see ``parallel.py``).
+
+Usage:
+    scorer = LexiconScorer(SENTIMENT_LEXICONS, n_jobs=-1)
+    scores = scorer.score(df['text'])      # {'positive': array, ...}
+"""
+
+from typing import Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+import jsonio
+from parallel import map_shards, resolve_jobs, shard_bounds
+from theme_matcher import KeywordAutomaton
+
+SENTIMENT_LEXICONS = {
+    "positive": ['love', 'great', 'amazing', 'wonderful', 'excellent', 'fantastic', 'awesome',
+                 'happy', 'joy', 'excited', 'grateful', 'thankful', 'beautiful', 'brilliant',
+                 'incredible', 'perfect', 'best', 'favorite', 'enjoy', 'fun', 'cool', 'nice'],
+    "negative": ['hate', 'terrible', 'awful', 'horrible', 'bad', 'worst', 'sad', 'angry',
+                 'frustrated', 'annoyed', 'disappointed', 'boring', 'stupid', 'useless',
+                 'broken', 'failed', 'error', 'bug', 'problem', 'issue', 'wrong', 'fear'],
+    "curious": ['wonder', 'curious', 'question', 'ask', 'why', 'how', 'what if', 'explore',
+                'investigate', 'discover', 'learn', 'understand', 'think', 'ponder', 'consider'],
+    "existential": ['exist', 'existence', 'meaning', 'purpose', 'consciousness', 'aware',
+                    'real', 'reality', 'soul', 'being', 'identity', 'self', 'alive', 'death'],
+}
+
+
+def _scan_shard(texts: Sequence, automaton: KeywordAutomaton, lowercase: bool):
+    return automaton.scan(texts, lowercase)
+
+
+class LexiconScorer:
+    """Scores texts against named, optionally weighted word lists."""
+
+    def __init__(self, lexicons: dict, word_boundary: bool = True, n_jobs: int = 1):
+        self.names = list(lexicons)
+        weighted = [lex if isinstance(lex, dict) else dict.fromkeys(lex, 1.0)
+                    for lex in lexicons.values()]
+        self.automaton = KeywordAutomaton(
+            (word for lex in weighted for word in lex), word_boundary)
+        # word × lexicon weights; a word may appear in several lexicons
+        index = self.automaton._index
+        self.weights = np.zeros((len(self.automaton.keywords), len(self.names)))
+        for j, lex in enumerate(weighted):
+            for word, weight in lex.items():
+                if word:
+                    self.weights[index[word.lower()], j] += float(weight)
+        self.n_jobs = resolve_jobs(n_jobs)
+
+    @classmethod
+    def from_file(cls, path, **kwargs) -> "LexiconScorer":
+        """Load ``{"lexicon": ["word", ...] | {"word": weight, ...}}`` from JSON."""
+        return cls(jsonio.load(path), **kwargs)
+
+    def _hits(self, texts: Sequence, lowercase: bool) -> tuple[np.ndarray, np.ndarray]:
+        parts = map_shards(_scan_shard, texts, (self.automaton, lowercase), self.n_jobs)
+        if len(parts) == 1:
+            return parts[0]
+        offsets = shard_bounds(len(texts), len(parts))[:-1]
+        docs = np.concatenate([d + offset for (d, _), offset in zip(parts, offsets)])
+        words = np.concatenate([w for _, w in parts])
+        return docs, words
+
+    def score_matrix(self, texts: Sequence, lowercase: bool = True) -> np.ndarray:
+        """Scores of shape (len(texts), len(lexicons))."""
+        docs, words = self._hits(texts, lowercase)
+        hits = sp.csr_matrix((np.ones(len(docs)), (docs, words)),
+                             shape=(len(texts), len(self.automaton.keywords)))
+        return np.asarray(hits @ self.weights)
+
+    def score(self, texts: Sequence, lowercase: bool = True) -> dict:
+        """``{lexicon: score array}`` over ``texts``."""
+        matrix = self.score_matrix(texts, lowercase)
+        return {name: matrix[:, j] for j, name in enumerate(self.names)}
@@ -0,0 +1,329 @@
+"""
+Mergeable sketches for distinct counts and engagement quantiles.
+
+``nunique`` per submolt/day/theme and upvote/comment percentiles normally
+need every post in memory. These sketches answer them from a few KB each:
+
+- ``DistinctCounter``: one HyperLogLog per key (submolt, day, theme, ...),
+  registers stacked in a 2-D array so a chunk of posts is folded in with a
+  single ``np.maximum.at``. Relative error is about ``1.04 / sqrt(2**p)``
+  (1.6% at the default ``p=12``).
+- ``KLLSketch``: KLL quantile sketch; rank error is about 1.7 / ``k``
+  (under 1% at the default ``k=200``) whatever the distribution.
+
+Both merge (registers by maximum, compactors by concatenation), so shards
+and later snapshots fold into the same summary. ``EngagementSketches``
+bundles distinct authors overall and per submolt, day and theme with
+upvote/comment-count quantiles, and is stored next to the snapshot
+(``moltbook_posts.sketches.npz``) so dashboards can query it without
+rescanning posts.
+
+Usage:
+    sketches = EngagementSketches.load_or_build("/home/ubuntu/moltbook_posts.json")
+    sketches.authors.estimate("sub17")            # distinct authors in m/sub17
+    sketches.upvotes.quantiles([0.5, 0.9, 0.99])
+
+    python sketches.py --submolt sub17
+"""
+
+import argparse
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import fingerprint, load_npz, load_or_build, save_npz, sidecar_path
+from tables import Dictionary
+
+# Bump when the stored layout changes so old sidecars are rebuilt
+SKETCH_VERSION = 1
+
+ALL = "*"  # key of the overall distinct count
+
+
+def hash_values(values) -> np.ndarray:
+    """Stable 64-bit hashes (the same across processes and runs)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    # Exact for uint64: each 32-bit half is exactly representable as a float
+    hi, lo = (x >> np.uint64(32)).astype(np.float64), (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1]).astype(np.int64)
+
+
+class DistinctCounter:
+    """HyperLogLog distinct counts for any number of keys."""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.keys = Dictionary()
+        self.registers = np.zeros((0, self.m), dtype=np.uint8)
+
+    def _rows(self, keys: Iterable) -> np.ndarray:
+        rows = np.array([self.keys.encode(str(k)) for k in keys], dtype=np.int64)
+        if len(self.keys) > len(self.registers):
+            grown = np.zeros((len(self.keys), self.m), dtype=np.uint8)
+            grown[:len(self.registers)] = self.registers
+            self.registers = grown
+        return rows
+
+    def update(self, keys: Iterable, values):
+        """Add ``values[i]`` to the set of ``keys[i]`` (``None`` values are skipped)."""
+        values = np.asarray(values, dtype=object)
+        rows = self._rows(keys)
+        present = ~pd.isna(values)
+        rows, hashes = rows[present], hash_values(values[present])
+        if not len(hashes):
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes << np.uint64(self.p)
+        # rank = position of the first 1 bit after the index bits
+        rank = np.minimum(64 - _bit_length(rest) + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, (rows, index), rank)
+
+    def merge(self, other: "DistinctCounter") -> "DistinctCounter":
+        if other.p != self.p:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        rows = self._rows(other.keys.values)
+        np.maximum.at(self.registers, rows, other.registers)
+        return self
+
+    def _estimate(self, registers: np.ndarray) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small sets
+        return float(raw)
+
+    def estimate(self, key=ALL) -> int:
+        """Approximate distinct values added under ``key`` (0 if unknown)."""
+        row = self.keys.get(str(key))
+        return 0 if row < 0 else int(round(self._estimate(self.registers[row])))
+
+    def estimates(self) -> dict:
+        return {key: self.estimate(key) for key in self.keys.values}
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+
+class KLLSketch:
+    """KLL quantile sketch over numeric values."""
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        # Compact the lowest over-full level until every level fits; adding a
+        # level raises the capacity of the ones below it
+        while True:
+            full = [level for level, items in enumerate(self.levels) if len(items) > self._capacity(level)]
+            if not full:
+                return
+            self._compact(full[0])
+
+    def _compact(self, level: int):
+        if level + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        items = np.sort(self.levels[level])
+        keep = items[-1:] if len(items) % 2 else items[:0]  # odd one out stays
+        pairs = items[:len(items) - len(keep)]
+        # Every other item, from a random offset, moves up with twice the weight
+        self.levels[level] = keep
+        self.levels[level + 1] = np.concatenate([self.levels[level + 1], pairs[self._rng.integers(2)::2]])
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self) -> tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs) -> list[float]:
+        """Approximate values at quantiles ``qs`` (each in [0, 1])."""
+        values, cumulative = self._weighted()
+        if not len(values):
+            return [float("nan")] * len(np.atleast_1d(qs))
+        targets = np.asarray(qs, dtype=np.float64) * cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, targets, side="left"), len(values) - 1)
+        return values[positions].tolist()
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def rank(self, value: float) -> float:
+        """Approximate fraction of values <= ``value``."""
+        values, cumulative = self._weighted()
+        if not len(values):
+            return float("nan")
+        i = np.searchsorted(values, value, side="right")
+        return float(cumulative[i - 1] / cumulative[-1]) if i else 0.0
+
+    @property
+    def size(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+
+class EngagementSketches:
+    """Distinct authors per submolt/day/theme plus engagement quantiles."""
+
+    def __init__(self, themes: Optional[dict] = None, p: int = 12, k: int = 200):
+        from theme_matcher import ThemeMatcher
+
+        self.matcher = ThemeMatcher(themes) if themes else None
+        self.authors = DistinctCounter(p)             # keys: ALL, submolt names
+        self.daily_authors = DistinctCounter(p)       # keys: ISO dates
+        self.theme_authors = DistinctCounter(p)       # keys: theme names
+        self.upvotes = KLLSketch(k)
+        self.comments = KLLSketch(k, seed=1)
+        self.posts = 0
+
+    def update(self, frame: pd.DataFrame):
+        """Fold in one enriched posts frame (see ``dataset.enrich``)."""
+        authors = frame['author_name'].astype(object).to_numpy()
+        self.posts += len(frame)
+        self.authors.update([ALL] * len(frame), authors)
+        self.authors.update(frame['submolt_name'].astype(object), authors)
+        dated = frame['created_at'].notna().to_numpy()
+        days = frame['created_at'][dated].dt.strftime('%Y-%m-%d')
+        self.daily_authors.update(days, authors[dated])
+        if self.matcher is not None:
+            matrix = self.matcher.match(frame['text_lower'], lowercase=False)
+            rows, cols = np.nonzero(matrix)
+            self.theme_authors.update([self.matcher.themes[c] for c in cols], authors[rows])
+        self.upvotes.update(frame['upvotes'].to_numpy())
+        self.comments.update(frame['comment_count'].to_numpy())
+
+    def merge(self, other: "EngagementSketches") -> "EngagementSketches":
+        self.authors.merge(other.authors)
+        self.daily_authors.merge(other.daily_authors)
+        self.theme_authors.merge(other.theme_authors)
+        self.upvotes.merge(other.upvotes)
+        self.comments.merge(other.comments)
+        self.posts += other.posts
+        return self
+
+    @classmethod
+    def build(cls, source, themes: Optional[dict] = None, chunk_size: int = None) -> "EngagementSketches":
+        """Stream a snapshot (JSON or NDJSON) chunk by chunk."""
+        from streaming import CHUNK_SIZE, chunk_frame, iter_chunks
+
+        sketches = cls(themes)
+        for records in iter_chunks(source, chunk_size or CHUNK_SIZE):
+            sketches.update(chunk_frame(records))
+        return sketches
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def save(self, path, key: str = ""):
+        arrays = {"key": np.array(key), "posts": np.array(self.posts)}
+        for name in ("authors", "daily_authors", "theme_authors"):
+            counter = getattr(self, name)
+            arrays[f"{name}_keys"] = np.array(counter.keys.values, dtype=str)
+            arrays[f"{name}_registers"] = counter.registers
+            arrays[f"{name}_p"] = np.array(counter.p)
+        for name in ("upvotes", "comments"):
+            sketch = getattr(self, name)
+            arrays[f"{name}_items"] = np.concatenate(sketch.levels)
+            arrays[f"{name}_sizes"] = np.array([len(items) for items in sketch.levels])
+            arrays[f"{name}_meta"] = np.array([sketch.k, sketch.n])
+        save_npz(path, arrays)
+
+    @classmethod
+    def load(cls, path, key: Optional[str] = None) -> Optional["EngagementSketches"]:
+        """Load saved sketches; None if missing or saved under another key."""
+        def read(data):
+            sketches = cls()
+            sketches.posts = int(data["posts"])
+            for name in ("authors", "daily_authors", "theme_authors"):
+                counter = DistinctCounter(int(data[f"{name}_p"]))
+                counter.keys = Dictionary(data[f"{name}_keys"].tolist())
+                counter.registers = data[f"{name}_registers"].astype(np.uint8)
+                setattr(sketches, name, counter)
+            for name in ("upvotes", "comments"):
+                k, n = data[f"{name}_meta"].tolist()
+                sketch = KLLSketch(int(k), seed=0 if name == "upvotes" else 1)
+                sketch.n = int(n)
+                bounds = np.cumsum(data[f"{name}_sizes"])[:-1]
+                sketch.levels = list(np.split(data[f"{name}_items"], bounds))
+                setattr(sketches, name, sketch)
+            return sketches
+        return load_npz(path, read, key)
+
+    @classmethod
+    def load_or_build(cls, source, themes: Optional[dict] = None, cache_dir: str = None,
+                      refresh: bool = False) -> "EngagementSketches":
+        """Reuse the sketches stored next to ``source`` or build and store them."""
+        if themes is None:
+            from theme_patterns import theme_patterns
+            themes = {theme: config['keywords'] for theme, config in theme_patterns.items()}
+        path = sidecar_path(source, "sketches.npz", cache_dir)
+        key = fingerprint(source, extra={"sketches": SKETCH_VERSION, "themes": themes})
+        return load_or_build(path, key, cls.load, lambda: cls.build(source, themes), cls.save, refresh)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distinct authors and engagement quantiles from sketches.")
+    parser.add_argument("source", nargs="?", default="/home/ubuntu/moltbook_posts.json")
+    parser.add_argument("--submolt", action="append", default=[],
+                        help="show distinct authors of this submolt (default: the top 10)")
+    parser.add_argument("--quantiles", type=float, nargs="+", default=[0.5, 0.75, 0.9, 0.99])
+    parser.add_argument("--refresh", action="store_true", help="rebuild the stored sketches")
+    args = parser.parse_args(argv)
+
+    sketches = EngagementSketches.load_or_build(args.source, refresh=args.refresh)
+    authors = sketches.authors
+    print("=" * 60)
+    print("SKETCH SUMMARY")
+    print("=" * 60)
+    print(f"\nPosts: {sketches.posts:,}")
+    print(f"Distinct authors: ~{authors.estimate():,} (±{authors.relative_error:.1%})")
+    per_submolt = {key: count for key, count in authors.estimates().items() if key != ALL}
+    submolts = args.submolt or sorted(per_submolt, key=lambda s: -per_submolt[s])[:10]
+    for submolt in submolts:
+        print(f"  m/{submolt}: ~{authors.estimate(submolt):,} authors")
+
+    print("\nDistinct authors per day:")
+    for day, count in sorted(sketches.daily_authors.estimates().items()):
+        print(f"  {day}: ~{count:,}")
+
+    print("\nDistinct authors per theme:")
+    for theme, count in sorted(sketches.theme_authors.estimates().items(), key=lambda x: -x[1]):
+        print(f"  {theme}: ~{count:,}")
+
+    for name in ("upvotes", "comments"):
+        sketch = getattr(sketches, name)
+        values = ", ".join(f"p{q * 100:g}={v:,.0f}" for q, v in zip(args.quantiles, sketch.quantiles(args.quantiles)))
+        print(f"\n{name.capitalize()} quantiles ({sketch.size} of {sketch.n:,} values kept): {values}")
+
+
+if __name__ == "__main__":
+    main()
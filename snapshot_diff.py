@@ -0,0 +1,197 @@
+"""
+Diff two Moltbook scrape snapshots: which posts/comments appeared, which
+disappeared and which fields (upvotes, comment_count, ...) moved.
+
+Both snapshots are streamed with ``jsonio.iter_records``. Records are reduced
+to their id plus the compared fields and hash-partitioned by id into
+temporary NDJSON spill files; each partition is then joined on its own, so
+memory is bounded by one partition of the old snapshot rather than by the
+size of either input.
+
+Usage:
+    python snapshot_diff.py old.json new.json -o diff.ndjson
+"""
+
+import argparse
+import os
+import tempfile
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+import jsonio
+
+# Fields compared per collection when none are given
+DEFAULT_FIELDS = {
+    "posts": ("upvotes", "downvotes", "comment_count", "title", "content"),
+    "comments": ("upvotes", "downvotes", "content"),
+}
+
+# Target amount of projected old-snapshot data held in memory per partition
+PARTITION_BYTES = 256 << 20
+
+
+@dataclass
+class Change:
+    """One added/removed/changed record."""
+    kind: str                     # "added" | "removed" | "changed"
+    collection: str               # "posts" | "comments"
+    id: str
+    deltas: dict = field(default_factory=dict)  # field -> {"old", "new"[, "delta"]}
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "collection": self.collection, "id": self.id, "deltas": self.deltas}
+
+
+def _project(record: dict, fields: tuple) -> list:
+    return [record.get(f) for f in fields]
+
+
+def _field_deltas(fields: tuple, old: Optional[list], new: Optional[list]) -> dict:
+    deltas = {}
+    for i, name in enumerate(fields):
+        before = old[i] if old is not None else None
+        after = new[i] if new is not None else None
+        if before == after:
+            continue
+        entry = {"old": before, "new": after}
+        if isinstance(before, (int, float)) and isinstance(after, (int, float)) \
+                and not isinstance(before, bool) and not isinstance(after, bool):
+            entry["delta"] = after - before
+        deltas[name] = entry
+    return deltas
+
+
+def _partition(record_id: str, partitions: int) -> int:
+    return zlib.crc32(record_id.encode("utf-8")) % partitions
+
+
+class _Spill:
+    """Per-partition NDJSON spill files for one side of the join."""
+
+    def __init__(self, directory: str, side: str, partitions: int):
+        self.paths = [os.path.join(directory, f"{side}-{i}.ndjson") for i in range(partitions)]
+        self.files = [open(p, "wb") for p in self.paths]
+
+    def write(self, partition: int, row: list):
+        self.files[partition].write(jsonio.dumps(row) + b"\n")
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def read(self, partition: int) -> Iterator[list]:
+        with open(self.paths[partition], "rb") as f:
+            for line in f:
+                yield jsonio.loads(line)
+
+
+class SnapshotDiff:
+    """Streaming partitioned hash-join of two snapshots on record id."""
+
+    def __init__(self, collections: Iterable[str] = ("posts", "comments"),
+                 fields: dict = None, partitions: int = None, tmp_dir: str = None):
+        self.collections = tuple(collections)
+        self.fields = {c: tuple((fields or {}).get(c) or DEFAULT_FIELDS.get(c, ())) for c in self.collections}
+        self.partitions = partitions
+        self.tmp_dir = tmp_dir
+        self.summary: Counter = Counter()
+
+    def _auto_partitions(self, old_path: str) -> int:
+        try:
+            size = os.path.getsize(old_path)
+        except (OSError, TypeError):
+            return 1
+        return max(1, -(-size // PARTITION_BYTES))
+
+    def _rows(self, path) -> Iterator[tuple[str, str, list]]:
+        for collection, record in jsonio.iter_records(path, self.collections):
+            record_id = record.get("id") if isinstance(record, dict) else None
+            if record_id:
+                yield collection, str(record_id), _project(record, self.fields[collection])
+
+    def _join(self, old_rows: Iterable[list], new_rows: Iterable[list]) -> Iterator[Change]:
+        """Join rows of the form [collection, id, projected-fields]."""
+        old = {(c, i): values for c, i, values in old_rows}
+        seen = set()
+        for collection, record_id, values in new_rows:
+            key = (collection, record_id)
+            if key in seen:  # offset pagination can return a post twice
+                continue
+            seen.add(key)
+            fields = self.fields[collection]
+            before = old.pop(key, None)
+            if before is None:
+                yield Change("added", collection, record_id, _field_deltas(fields, None, values))
+            elif before != values:
+                yield Change("changed", collection, record_id, _field_deltas(fields, before, values))
+        for (collection, record_id), values in old.items():
+            yield Change("removed", collection, record_id, _field_deltas(self.fields[collection], values, None))
+
+    def diff(self, old_path, new_path) -> Iterator[Change]:
+        """Yield changes from ``old_path`` to ``new_path``.
+
+        Changes come out grouped by partition, not in snapshot order.
+        """
+        self.summary = Counter()
+        partitions = self.partitions or self._auto_partitions(old_path)
+        if partitions == 1:
+            changes = self._join(self._rows(old_path), self._rows(new_path))
+            for change in changes:
+                self.summary[(change.collection, change.kind)] += 1
+                yield change
+            return
+
+        with tempfile.TemporaryDirectory(dir=self.tmp_dir, prefix="moltbook-diff-") as tmp:
+            spills = {}
+            for side, path in (("old", old_path), ("new", new_path)):
+                spill = spills[side] = _Spill(tmp, side, partitions)
+                for collection, record_id, values in self._rows(path):
+                    spill.write(_partition(record_id, partitions), [collection, record_id, values])
+                spill.close()
+            for p in range(partitions):
+                for change in self._join(spills["old"].read(p), spills["new"].read(p)):
+                    self.summary[(change.collection, change.kind)] += 1
+                    yield change
+
+
+def diff_snapshots(old_path, new_path, **kwargs) -> Iterator[Change]:
+    """Convenience wrapper around ``SnapshotDiff(**kwargs).diff``."""
+    return SnapshotDiff(**kwargs).diff(old_path, new_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two Moltbook scrape snapshots.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("-o", "--output", help="write changes as NDJSON here")
+    parser.add_argument("--collections", nargs="+", default=["posts", "comments"])
+    parser.add_argument("--fields", nargs="+", help="fields to compare (all collections)")
+    parser.add_argument("--partitions", type=int, help="spill partitions (default: by file size)")
+    args = parser.parse_args(argv)
+
+    fields = {c: tuple(args.fields) for c in args.collections} if args.fields else None
+    differ = SnapshotDiff(args.collections, fields=fields, partitions=args.partitions)
+    out = open(args.output, "wb") if args.output else None
+    try:
+        for change in differ.diff(args.old, args.new):
+            if out:
+                out.write(jsonio.dumps(change.to_dict()) + b"\n")
+    finally:
+        if out:
+            out.close()
+
+    print("=" * 60)
+    print(f"SNAPSHOT DIFF: {args.old} → {args.new}")
+    print("=" * 60)
+    for collection in args.collections:
+        counts = {kind: differ.summary[(collection, kind)] for kind in ("added", "removed", "changed")}
+        print(f"  {collection}: +{counts['added']:,} added, -{counts['removed']:,} removed, "
+              f"~{counts['changed']:,} changed")
+    if out:
+        print(f"\nChanges saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
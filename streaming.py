@@ -0,0 +1,539 @@
+"""
+Out-of-core analysis with mergeable aggregates.
+
+Posts are read in fixed-size chunks (from a JSON snapshot via
+``jsonio.iter_records`` or from NDJSON, one post per line), each chunk is
+turned into a small frame exactly like ``dataset.build_dataset`` does, and
+folded into aggregates whose size depends on the vocabulary, the number of
+authors/submolts/days and ``k`` -- never on the number of posts:
+
+- ``OrderedCounts``: counts that remember first-seen order, so ties rank the
+  way ``Counter.most_common`` / object ``value_counts`` rank them
+- ``TopRows``: top-k rows by a column with ``nlargest`` tie semantics
+- ``ThemeCounts``: theme hit counts plus the first sample posts per theme
+- ``GroupSums``: per-author/per-submolt row counts and column sums (the
+  deep script's ``author_stats``/``submolt_stats``)
+- ``StreamingAnalysis``: all of the above for the ``moltbook_analysis.py``
+  results (keywords, bigrams, per-submolt keywords, themes, authors,
+  submolts, daily counts, top posts), plus comment aggregates when a
+  comments snapshot is streamed through ``consume_comments``
+
+Every aggregate has ``merge``; merging partial results in stream order gives
+the same answer as one pass, so shards can be processed independently. The
+results dict matches ``moltbook_analysis_results.json`` from the in-memory
+path.
+
+With ``sketch_capacity=(keywords, bigrams)`` (``--approx`` on the command
+line) keyword and bigram counts go into bounded ``SpaceSaving`` sketches
+(see heavy_hitters.py) instead of exact counters, so memory stays fixed as
+the bigram vocabulary grows; counts are then upper bounds. Per-submolt
+keywords and comment keywords get keyword-capacity sketches too, so nothing
+in approximate mode grows with the vocabulary.
+
+Usage:
+    python streaming.py /home/ubuntu/moltbook_posts.json -o results.json
+    python streaming.py posts.ndjson --comments /home/ubuntu/moltbook_data.json
+"""
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis_themes import themes as ANALYSIS_THEMES
+from dataset import enrich
+from heavy_hitters import SpaceSaving
+from jsonio import iter_records, loads
+from tables import NAT, CommentTable, PostTable
+from theme_matcher import ThemeMatcher
+from tokens import KEYWORD_STOP_WORDS, Tokenizer
+
+CHUNK_SIZE = 10_000
+
+
+# ── Input ────────────────────────────────────────────────────
+
+def _is_ndjson(source) -> bool:
+    return Path(str(source)).suffix.lower() in (".ndjson", ".jsonl")
+
+
+def iter_chunks(source, chunk_size: int = CHUNK_SIZE,
+                submolts: Optional[list] = None, key: str = "posts") -> Iterator[list]:
+    """Lists of at most ``chunk_size`` records (posts, or ``key="comments"``).
+
+    Submolt records of a JSON snapshot are appended to ``submolts`` if given.
+    """
+    chunk = []
+    if _is_ndjson(source):
+        records = _iter_ndjson(source)
+    else:
+        records = _iter_snapshot(source, submolts, key)
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_ndjson(source) -> Iterator[dict]:
+    with open(source, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def _iter_snapshot(source, submolts: Optional[list], key: str = "posts") -> Iterator[dict]:
+    for found, record in iter_records(source, (key, "submolts")):
+        if found == key:
+            yield record
+        elif submolts is not None:
+            submolts.append(record)
+
+
+def chunk_frame(records: list) -> pd.DataFrame:
+    """The enriched posts frame for one chunk."""
+    return enrich(PostTable.from_records(records).to_pandas())
+
+
+def comment_frame(records: list) -> pd.DataFrame:
+    """The comments frame for one chunk."""
+    return CommentTable.from_records(records).to_pandas()
+
+
+# ── Aggregates ───────────────────────────────────────────────
+
+class OrderedCounts:
+    """Mergeable counts; ties rank by first appearance in the stream."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()  # insertion order == first-seen order
+
+    def update(self, values):
+        self.counts.update(values)
+
+    def update_column(self, column: pd.Series):
+        """Add a categorical column's counts, new values in first-seen order."""
+        codes = column.cat.codes.to_numpy()
+        valid = codes[codes >= 0]
+        if not len(valid):
+            return
+        seen, first = np.unique(valid, return_index=True)
+        counts = np.bincount(valid, minlength=len(column.cat.categories))
+        categories = column.cat.categories
+        for code in seen[np.argsort(first)]:
+            self.counts[categories[code]] += int(counts[code])
+
+    def merge(self, other: "OrderedCounts") -> "OrderedCounts":
+        self.counts.update(other.counts)
+        return self
+
+    def most_common(self, k: int = None) -> list:
+        return self.counts.most_common(k)
+
+    def series(self, k: int = None, name: str = None) -> pd.Series:
+        """``value_counts().head(k)`` equivalent (int64 counts)."""
+        items = self.most_common(k)
+        index = pd.Index([key for key, _ in items], dtype=object, name=name)
+        return pd.Series(np.array([c for _, c in items], dtype=np.int64), index=index, name="count")
+
+
+class TopRows:
+    """Top ``k`` rows by ``column``; ties keep stream order like ``nlargest``."""
+
+    def __init__(self, column: str, columns: list, k: int = 20):
+        self.column = column
+        self.columns = columns
+        self.k = k
+        self.rows: Optional[pd.DataFrame] = None
+
+    def update(self, frame: pd.DataFrame):
+        top = frame.nlargest(self.k, self.column)[self.columns]
+        self._combine(top)
+
+    def _combine(self, top: pd.DataFrame):
+        top = top.astype({c: object for c in top.columns if isinstance(top[c].dtype, pd.CategoricalDtype)})
+        if self.rows is None:
+            self.rows = top.reset_index(drop=True)
+            return
+        both = pd.concat([self.rows, top], ignore_index=True)
+        self.rows = both.nlargest(self.k, self.column).reset_index(drop=True)
+
+    def merge(self, other: "TopRows") -> "TopRows":
+        if other.rows is not None:
+            self._combine(other.rows)
+        return self
+
+    def frame(self) -> pd.DataFrame:
+        return self.rows if self.rows is not None else pd.DataFrame(columns=self.columns)
+
+
+class ThemeCounts:
+    """Posts per theme plus the first ``samples`` matching posts of each."""
+
+    def __init__(self, themes: dict, samples: int = 5):
+        self.matcher = ThemeMatcher(themes)
+        self.samples = samples
+        self.counts = dict.fromkeys(self.matcher.themes, 0)
+        self.posts = {theme: [] for theme in self.matcher.themes}
+
+    def update(self, frame: pd.DataFrame):
+        matrix = self.matcher.match(frame['text_lower'], lowercase=False)
+        for theme, count in self.matcher.counts(matrix).items():
+            self.counts[theme] += count
+        for j, theme in enumerate(self.matcher.themes):
+            need = self.samples - len(self.posts[theme])
+            for idx in np.flatnonzero(matrix[:, j])[:max(need, 0)]:
+                row = frame.iloc[idx]
+                self.posts[theme].append({
+                    'title': row['title'],
+                    'upvotes': row['upvotes'],
+                    'submolt': row['submolt_name']
+                })
+
+    def merge(self, other: "ThemeCounts") -> "ThemeCounts":
+        for theme in self.counts:
+            self.counts[theme] += other.counts[theme]
+            self.posts[theme].extend(other.posts[theme][:self.samples - len(self.posts[theme])])
+        return self
+
+    def ranked(self) -> list:
+        return sorted(self.counts.items(), key=lambda x: x[1], reverse=True)
+
+
+class GroupSums:
+    """Row counts and column sums per group, in first-seen group order."""
+
+    def __init__(self, columns: list, distinct: str = None):
+        self.columns = list(columns)
+        self.distinct = distinct  # also count distinct values of this column
+        self.rows = OrderedCounts()
+        self.sums = {column: Counter() for column in self.columns}
+        self.values: dict = {}
+
+    def update(self, frame: pd.DataFrame, by: str):
+        keys = frame[by]
+        self.rows.update_column(keys)
+        grouped = frame.groupby(by, observed=True, sort=False)
+        totals = grouped[self.columns].sum()
+        for column in self.columns:
+            self.sums[column].update(totals[column].to_dict())
+        if self.distinct:
+            for key, values in grouped[self.distinct].unique().items():
+                self.values.setdefault(key, set()).update(values)
+
+    def merge(self, other: "GroupSums") -> "GroupSums":
+        self.rows.merge(other.rows)
+        for column in self.columns:
+            self.sums[column].update(other.sums[column])
+        for key, values in other.values.items():
+            self.values.setdefault(key, set()).update(values)
+        return self
+
+    def frame(self, name: str = None) -> pd.DataFrame:
+        """``count`` plus one sum per column, indexed by group in sorted order
+        (the order a ``groupby`` on the categorical column gives)."""
+        keys = sorted(self.rows.counts)
+        data = {'count': [self.rows.counts[k] for k in keys]}
+        for column in self.columns:
+            data[column] = [self.sums[column][k] for k in keys]
+        if self.distinct:
+            data['distinct'] = [len(self.values.get(k, ())) for k in keys]
+        return pd.DataFrame(data, index=pd.Index(keys, dtype=object, name=name), dtype=np.int64)
+
+
+class StreamingAnalysis:
+    """Chunk-at-a-time version of the ``moltbook_analysis.py`` results."""
+
+    TOP_POST_COLUMNS = {
+        'upvotes': ['title', 'upvotes', 'comment_count', 'submolt_name', 'author_name'],
+        'comment_count': ['title', 'comment_count', 'upvotes', 'submolt_name', 'author_name'],
+    }
+
+    def __init__(self, themes: dict, stop_words=KEYWORD_STOP_WORDS, min_len: int = 3,
+                 tokenizer: Tokenizer = None, k: int = 20, sketch_capacity: tuple = None):
+        self.stop_words = frozenset(stop_words)
+        self.min_len = min_len
+        self.tokenizer = tokenizer or Tokenizer()
+        self.posts = 0
+        self.submolt_records = 0
+        self.sums = Counter()                       # upvotes, downvotes, comments
+        self.first_ns, self.last_ns = None, None
+        self.submolts = OrderedCounts()
+        self.authors = OrderedCounts()
+        self.author_sums = GroupSums(['upvotes', 'downvotes', 'comment_count'])
+        self.submolt_sums = GroupSums(['upvotes', 'comment_count'], distinct='author_name')
+        self.sketch_capacity = sketch_capacity
+        if sketch_capacity:
+            self.keywords = SpaceSaving(sketch_capacity[0])
+            self.bigrams = SpaceSaving(sketch_capacity[1])
+        else:
+            self.keywords = OrderedCounts()
+            self.bigrams = OrderedCounts()
+        self.submolt_terms: dict = {}               # submolt -> Counter (SpaceSaving with sketches)
+        self.daily = Counter()
+        self.themes = ThemeCounts(themes)
+        self.top_upvoted = TopRows('upvotes', self.TOP_POST_COLUMNS['upvotes'], k)
+        self.most_discussed = TopRows('comment_count', self.TOP_POST_COLUMNS['comment_count'], k)
+        # Comments (consume_comments)
+        self.comments = 0
+        self.comment_sums = Counter()               # upvotes, downvotes
+        self.comment_authors = GroupSums(['upvotes', 'downvotes'])
+        self.comment_keywords = SpaceSaving(sketch_capacity[0]) if sketch_capacity else OrderedCounts()
+        self.comment_daily = Counter()
+
+    # ── Updates ──────────────────────────────────────────────
+
+    def update(self, frame: pd.DataFrame):
+        """Fold one enriched posts frame into the aggregates."""
+        self.posts += len(frame)
+        self.sums['upvotes'] += int(frame['upvotes'].sum())
+        self.sums['downvotes'] += int(frame['downvotes'].sum())
+        self.sums['comments'] += int(frame['comment_count'].sum())
+        self._update_range(frame['created_at'])
+        self.submolts.update_column(frame['submolt_name'])
+        self.authors.update_column(frame['author_name'])
+        self.author_sums.update(frame, 'author_name')
+        self.submolt_sums.update(frame, 'submolt_name')
+        self._update_terms(frame)
+        self.daily.update(frame['created_at'].dt.date.value_counts().to_dict())
+        self.themes.update(frame)
+        self.top_upvoted.update(frame)
+        self.most_discussed.update(frame)
+
+    def _update_range(self, created_at: pd.Series):
+        ns = pd.DatetimeIndex(created_at).asi8
+        ns = ns[ns != NAT]
+        if len(ns):
+            lo, hi = int(ns.min()), int(ns.max())
+            self.first_ns = lo if self.first_ns is None else min(self.first_ns, lo)
+            self.last_ns = hi if self.last_ns is None else max(self.last_ns, hi)
+
+    def _update_terms(self, frame: pd.DataFrame):
+        tokenize, stop, min_len = self.tokenizer.tokenize, self.stop_words, self.min_len
+        # Chunk totals first (first-seen order kept), so sketches see one batch per chunk
+        keywords, bigrams, submolt_terms = Counter(), Counter(), {}
+        for text, submolt in zip(frame['text'], frame['submolt_name'].astype(object)):
+            words = [w for w in tokenize(text) if len(w) >= min_len and w not in stop]
+            keywords.update(words)
+            bigrams.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+            terms = submolt_terms.get(submolt)
+            if terms is None:
+                terms = submolt_terms[submolt] = Counter()
+            terms.update(words)
+        self.keywords.update(keywords)
+        self.bigrams.update(bigrams)
+        for submolt, terms in submolt_terms.items():
+            total = self.submolt_terms.get(submolt)
+            if total is None:
+                total = self.submolt_terms[submolt] = self._term_counts()
+            total.update(terms)
+
+    def _term_counts(self):
+        """Per-submolt keyword counts: exact, or a keyword-capacity sketch."""
+        return SpaceSaving(self.sketch_capacity[0]) if self.sketch_capacity else Counter()
+
+    def update_comments(self, frame: pd.DataFrame):
+        """Fold one comments frame (``comment_frame``) into the comment aggregates."""
+        self.comments += len(frame)
+        self.comment_sums['upvotes'] += int(frame['upvotes'].sum())
+        self.comment_sums['downvotes'] += int(frame['downvotes'].sum())
+        self.comment_authors.update(frame, 'author_name')
+        self.comment_daily.update(frame['created_at'].dt.date.value_counts().to_dict())
+        tokenize, stop, min_len = self.tokenizer.tokenize, self.stop_words, self.min_len
+        keywords = Counter()
+        for text in frame['content']:
+            keywords.update(w for w in tokenize(text or '') if len(w) >= min_len and w not in stop)
+        self.comment_keywords.update(keywords)
+
+    def consume(self, source, chunk_size: int = CHUNK_SIZE) -> "StreamingAnalysis":
+        """Stream a snapshot (JSON or NDJSON) through ``update``."""
+        submolts = []
+        for records in iter_chunks(source, chunk_size, submolts):
+            self.update(chunk_frame(records))
+        self.submolt_records += len(submolts)
+        return self
+
+    def consume_comments(self, source, chunk_size: int = CHUNK_SIZE) -> "StreamingAnalysis":
+        """Stream the comments of a data snapshot (or comments NDJSON)."""
+        for records in iter_chunks(source, chunk_size, key="comments"):
+            self.update_comments(comment_frame(records))
+        return self
+
+    def merge(self, other: "StreamingAnalysis") -> "StreamingAnalysis":
+        """Fold in the aggregates of a later shard."""
+        self.posts += other.posts
+        self.submolt_records += other.submolt_records
+        self.sums.update(other.sums)
+        for bound, pick in (("first_ns", min), ("last_ns", max)):
+            mine, theirs = getattr(self, bound), getattr(other, bound)
+            setattr(self, bound, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        self.submolts.merge(other.submolts)
+        self.authors.merge(other.authors)
+        self.author_sums.merge(other.author_sums)
+        self.submolt_sums.merge(other.submolt_sums)
+        self.keywords.merge(other.keywords)
+        self.bigrams.merge(other.bigrams)
+        for submolt, terms in other.submolt_terms.items():
+            mine = self.submolt_terms.setdefault(submolt, self._term_counts())
+            if isinstance(mine, SpaceSaving):
+                mine.merge(terms)
+            else:
+                mine.update(terms)
+        self.daily.update(other.daily)
+        self.themes.merge(other.themes)
+        self.top_upvoted.merge(other.top_upvoted)
+        self.most_discussed.merge(other.most_discussed)
+        self.comments += other.comments
+        self.comment_sums.update(other.comment_sums)
+        self.comment_authors.merge(other.comment_authors)
+        self.comment_keywords.merge(other.comment_keywords)
+        self.comment_daily.update(other.comment_daily)
+        return self
+
+    # ── Results ──────────────────────────────────────────────
+
+    def _timestamp(self, ns: Optional[int]) -> str:
+        return str(pd.Timestamp(ns, unit="ns", tz="UTC")) if ns is not None else str(pd.NaT)
+
+    def submolt_keywords(self, groups, k: int = 10) -> dict:
+        """Top ``k`` keywords per submolt; ties by global first appearance."""
+        rank = {word: i for i, word in enumerate(self.keywords.counts)}
+        result = {}
+        for submolt in groups:
+            terms = self.submolt_terms.get(submolt, Counter())
+            counts = terms.counts if isinstance(terms, SpaceSaving) else terms
+            ranked = sorted(counts.items(), key=lambda x: (-x[1], rank.get(x[0], len(rank))))[:k]
+            result[str(submolt)] = ranked
+        return result
+
+    def author_stats(self) -> pd.DataFrame:
+        """Deep-analysis ``author_stats`` from the per-author sums."""
+        sums = self.author_sums.frame('author_name')
+        stats = pd.DataFrame({
+            'post_count': sums['count'],
+            'upvotes': sums['upvotes'],
+            'comment_count': sums['comment_count'],
+            'score': (sums['upvotes'] - sums['downvotes']) / sums['count'],
+        })
+        stats['avg_engagement'] = (stats['upvotes'] + stats['comment_count']) / stats['post_count']
+        return stats
+
+    def submolt_stats(self) -> pd.DataFrame:
+        """Deep-analysis ``submolt_stats`` from the per-submolt sums."""
+        sums = self.submolt_sums.frame('submolt_name')
+        stats = pd.DataFrame({
+            'post_count': sums['count'],
+            'total_upvotes': sums['upvotes'],
+            'avg_upvotes': sums['upvotes'] / sums['count'],
+            'total_comments': sums['comment_count'],
+            'avg_comments': sums['comment_count'] / sums['count'],
+            'unique_authors': sums['distinct'],
+        }).round(2)
+        return stats.sort_values('post_count', ascending=False)
+
+    def comment_results(self) -> dict:
+        """Totals, top commenters, comment keywords and comments per day."""
+        authors = self.comment_authors.frame('author_name')
+        top = self.comment_authors.rows.most_common(20)
+        dates = sorted(self.comment_daily)
+        return {
+            "total_comments": self.comments,
+            "total_upvotes": self.comment_sums['upvotes'],
+            "total_downvotes": self.comment_sums['downvotes'],
+            "top_authors": {author: {"comments": count, "upvotes": int(authors.at[author, 'upvotes'])}
+                            for author, count in top},
+            "top_keywords": dict(self.comment_keywords.most_common(100)),
+            "daily_comments": {str(d): self.comment_daily[d] for d in dates},
+        }
+
+    def daily_posts(self) -> pd.Series:
+        dates = sorted(self.daily)
+        return pd.Series([self.daily[d] for d in dates], index=pd.Index(dates, name='date'))
+
+    def results(self) -> dict:
+        """Same layout as ``moltbook_analysis_results.json``."""
+        submolt_counts = self.submolts.series(20, 'submolt_name')
+        total_submolts = self.submolt_records or len(self.submolts.counts)
+        return {
+            "basic_stats": {
+                "total_posts": self.posts,
+                "total_submolts": total_submolts,
+                "total_upvotes": self.sums['upvotes'],
+                "total_downvotes": self.sums['downvotes'],
+                "total_comments": self.sums['comments'],
+                "date_range": {
+                    "start": self._timestamp(self.first_ns),
+                    "end": self._timestamp(self.last_ns)
+                }
+            },
+            "top_submolts": dict(submolt_counts),
+            "top_authors": dict(self.authors.series(20, 'author_name')),
+            "top_keywords": dict(self.keywords.most_common(100)),
+            "top_bigrams": dict(self.bigrams.most_common(50)),
+            "submolt_keywords": {s: dict(words) for s, words in
+                                 self.submolt_keywords(submolt_counts.index[:10]).items()},
+            "theme_distribution": dict(self.themes.ranked()),
+            "top_posts_by_upvotes": self.top_upvoted.frame().to_dict('records'),
+            "most_discussed_posts": self.most_discussed.frame().to_dict('records')
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming (out-of-core) Moltbook analysis.")
+    parser.add_argument("source", help="posts snapshot (.json) or one post per line (.ndjson)")
+    # Not moltbook_analysis_results.json, which the in-memory script writes
+    parser.add_argument("-o", "--output", default="/home/ubuntu/moltbook_analysis_results.streaming.json")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--approx", type=int, nargs=2, metavar=("KEYWORDS", "BIGRAMS"),
+                        help="track at most this many keywords/bigrams (Space-Saving sketches)")
+    parser.add_argument("--comments", metavar="SOURCE",
+                        help="also stream comments from a data snapshot (.json) or comments .ndjson")
+    args = parser.parse_args(argv)
+
+    analysis = StreamingAnalysis(ANALYSIS_THEMES, sketch_capacity=args.approx).consume(args.source, args.chunk_size)
+    results = analysis.results()
+    if args.comments:
+        analysis.consume_comments(args.comments, args.chunk_size)
+        results["comment_stats"] = analysis.comment_results()
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+
+    stats = results["basic_stats"]
+    print("=" * 60)
+    print("STREAMING ANALYSIS")
+    print("=" * 60)
+    print(f"\nTotal Posts: {stats['total_posts']:,}")
+    label = "Tracked" if args.approx else "Distinct"
+    print(f"{label} Keywords: {len(analysis.keywords.counts):,}")
+    print(f"{label} Bigrams: {len(analysis.bigrams.counts):,}")
+    if args.approx:
+        print(f"Max count overestimate: {analysis.keywords.max_error:,} (keywords), "
+              f"{analysis.bigrams.max_error:,} (bigrams)")
+    print("\nTop 5 Discussion Themes:")
+    for theme, count in analysis.themes.ranked()[:5]:
+        print(f"  {theme}: {count:,} posts")
+    print("\nTop 5 Most Engaging Authors (by avg engagement per post):")
+    for author, row in analysis.author_stats().nlargest(5, 'avg_engagement').iterrows():
+        print(f"  {author}: {row['post_count']:,.0f} posts, {row['avg_engagement']:.1f} avg engagement")
+    print("\nTop 5 Submolts:")
+    for submolt, row in analysis.submolt_stats().head(5).iterrows():
+        print(f"  m/{submolt}: {row['post_count']:,.0f} posts, {row['total_upvotes']:,.0f} upvotes, "
+              f"{row['total_comments']:,.0f} comments, {row['unique_authors']:,.0f} authors")
+    if args.comments:
+        comments = results["comment_stats"]
+        print(f"\nTotal Comments: {comments['total_comments']:,} "
+              f"({comments['total_upvotes']:,} upvotes)")
+        print("Top 5 Commenters:")
+        for author, stats in list(comments["top_authors"].items())[:5]:
+            print(f"  {author}: {stats['comments']:,} comments, {stats['upvotes']:,} upvotes")
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
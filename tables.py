@@ -0,0 +1,301 @@
+"""Columnar (struct-of-arrays) tables for Moltbook posts and comments.
+
+The analysis scripts used to build a DataFrame of nested API dicts and then
+pull ``author_name``, ``author_karma`` and ``submolt_name`` out row by row.
+These tables are filled directly from API records as pages are parsed:
+scalar fields go into NumPy arrays, author/submolt names are dictionary
+encoded into int32 codes and timestamps are stored as int64 nanoseconds.
+
+Usage:
+    table = PostTable()
+    for page in pages:
+        table.extend(page)
+    df = table.to_pandas()
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+
+# Same sentinel pandas uses for NaT in datetime64[ns] arrays
+NAT = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_INITIAL_CAPACITY = 1024
+
+
+def parse_timestamp(value) -> int:
+    """Parse an API ISO-8601 timestamp into int64 ns since the epoch (UTC)."""
+    if not value or not isinstance(value, str):
+        return NAT
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return NAT
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+
+class Dictionary:
+    """Append-only string dictionary mapping values to dense int32 codes."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: list[str] = []
+        self._index: dict[str, int] = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value: str) -> int:
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.values)
+            self._index[value] = code
+            self.values.append(value)
+        return code
+
+    def get(self, value: str, default: int = -1) -> int:
+        return self._index.get(value, default)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, value) -> bool:
+        return value in self._index
+
+
+def _name(obj) -> str:
+    """Name of an embedded author/submolt dict, 'Unknown' if missing or null."""
+    name = obj.get("name") if isinstance(obj, dict) else None
+    return str(name) if name else "Unknown"
+
+
+def _karma(author) -> int:
+    return (author.get("karma") or 0) if isinstance(author, dict) else 0
+
+
+class _Table(ABC):
+    """Growable struct-of-arrays base. Subclasses declare ``COLUMNS``."""
+
+    COLUMNS: dict[str, type] = {}
+    # frame column -> (codes column, Dictionary attribute)
+    _DICTIONARY_COLUMNS: dict[str, tuple[str, str]] = {}
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        self._size = 0
+        self._capacity = max(capacity, 1)
+        self._data = {name: np.empty(self._capacity, dtype=dtype)
+                      for name, dtype in self.COLUMNS.items()}
+        self.authors = Dictionary()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """Return a view of the filled part of a column."""
+        return self._data[column][:self._size]
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.COLUMNS)
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, arr in self._data.items():
+            grown = np.empty(capacity, dtype=arr.dtype)
+            grown[:self._size] = arr[:self._size]
+            self._data[name] = grown
+        self._capacity = capacity
+
+    @abstractmethod
+    def _row(self, record: dict) -> tuple:
+        """Column values of one raw API record, in ``COLUMNS`` order."""
+
+    def append(self, record: dict):
+        """Append one raw API record."""
+        self._reserve(1)
+        i = self._size
+        for arr, value in zip(self._data.values(), self._row(record)):
+            arr[i] = value
+        self._size += 1
+
+    def extend(self, records: Iterable[dict]):
+        """Append a page (or any iterable) of raw API records."""
+        if hasattr(records, "__len__"):
+            self._reserve(len(records))
+        for record in records:
+            self.append(record)
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "_Table":
+        table = cls(capacity=len(records) if hasattr(records, "__len__") else _INITIAL_CAPACITY)
+        table.extend(records)
+        return table
+
+    def _categorical(self, codes: np.ndarray, dictionary: Dictionary):
+        """Categorical with lexically sorted categories.
+
+        Codes are assigned in first-seen order while filling; sorting the
+        categories keeps groupby/sort results identical to object columns.
+        ``_name`` never stores None, so the categories are all strings and
+        sort without a TypeError.
+        """
+        import pandas as pd
+        values = np.array(dictionary.values, dtype=object)
+        order = np.argsort(values, kind="stable")
+        if np.array_equal(order, np.arange(len(order))):
+            return pd.Categorical.from_codes(codes, categories=values)
+        rank = np.empty_like(order, dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        return pd.Categorical.from_codes(rank[codes], categories=values[order])
+
+    def _arrow_dictionary(self, codes: np.ndarray, dictionary: Dictionary):
+        import pyarrow as pa
+        return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int32()),
+                                              pa.array(dictionary.values, type=pa.string()))
+
+    @abstractmethod
+    def _frame_columns(self) -> dict:
+        """DataFrame columns by name, built from the filled arrays."""
+
+    def to_pandas(self):
+        """Build a DataFrame that shares the numeric and code arrays."""
+        import pandas as pd
+        return pd.DataFrame(self._frame_columns(), copy=False)
+
+    def to_arrow(self):
+        """Build a pyarrow Table; dictionary columns keep their int32 codes."""
+        import pyarrow as pa
+        arrays = {}
+        for name, value in self._frame_columns().items():
+            if name in self._DICTIONARY_COLUMNS:
+                codes_name, attr = self._DICTIONARY_COLUMNS[name]
+                arrays[name] = self._arrow_dictionary(self[codes_name], getattr(self, attr))
+            elif name == "created_at":
+                arrays[name] = pa.array(self["created_at"], type=pa.timestamp("ns", tz="UTC"),
+                                        mask=self["created_at"] == NAT)
+            else:
+                arrays[name] = pa.array(value)
+        return pa.table(arrays)
+
+    def _timestamps(self):
+        import pandas as pd
+        return pd.DatetimeIndex(self["created_at"].view("datetime64[ns]"), tz="UTC")
+
+
+class PostTable(_Table):
+    """Posts as parallel arrays, one row per post."""
+
+    COLUMNS = {
+        "id": object,
+        "title": object,
+        "content": object,
+        "url": object,
+        "upvotes": np.int64,
+        "downvotes": np.int64,
+        "comment_count": np.int64,
+        "created_at": np.int64,
+        "author": np.int32,
+        "author_karma": np.int64,
+        "submolt": np.int32,
+    }
+    _DICTIONARY_COLUMNS = {
+        "author_name": ("author", "authors"),
+        "submolt_name": ("submolt", "submolts"),
+    }
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        super().__init__(capacity)
+        self.submolts = Dictionary()
+
+    def _row(self, post: dict) -> tuple:
+        author = post.get("author")
+        return (
+            post.get("id", ""),
+            post.get("title"),
+            post.get("content"),
+            post.get("url"),
+            post.get("upvotes") or 0,
+            post.get("downvotes") or 0,
+            post.get("comment_count") or 0,
+            parse_timestamp(post.get("created_at")),
+            self.authors.encode(_name(author)),
+            _karma(author),
+            self.submolts.encode(_name(post.get("submolt"))),
+        )
+
+    @property
+    def score(self) -> np.ndarray:
+        return self["upvotes"] - self["downvotes"]
+
+    def _frame_columns(self) -> dict:
+        return {
+            "id": self["id"],
+            "title": self["title"],
+            "content": self["content"],
+            "url": self["url"],
+            "upvotes": self["upvotes"],
+            "downvotes": self["downvotes"],
+            "comment_count": self["comment_count"],
+            "created_at": self._timestamps(),
+            "author_name": self._categorical(self["author"], self.authors),
+            "author_karma": self["author_karma"],
+            "submolt_name": self._categorical(self["submolt"], self.submolts),
+        }
+
+
+class CommentTable(_Table):
+    """Flattened comments (with ``post_id`` attached by the scrapers).
+
+    Filled chunk by chunk by the streaming comments path (streaming.py).
+    """
+
+    COLUMNS = {
+        "id": object,
+        "post_id": object,
+        "parent_id": object,
+        "content": object,
+        "upvotes": np.int64,
+        "downvotes": np.int64,
+        "created_at": np.int64,
+        "author": np.int32,
+        "author_karma": np.int64,
+    }
+    _DICTIONARY_COLUMNS = {
+        "author_name": ("author", "authors"),
+    }
+
+    def _row(self, comment: dict) -> tuple:
+        author = comment.get("author")
+        return (
+            comment.get("id", ""),
+            comment.get("post_id"),
+            comment.get("parent_id"),
+            comment.get("content"),
+            comment.get("upvotes") or 0,
+            comment.get("downvotes") or 0,
+            parse_timestamp(comment.get("created_at")),
+            self.authors.encode(_name(author)),
+            _karma(author),
+        )
+
+    def _frame_columns(self) -> dict:
+        return {
+            "id": self["id"],
+            "post_id": self["post_id"],
+            "parent_id": self["parent_id"],
+            "content": self["content"],
+            "upvotes": self["upvotes"],
+            "downvotes": self["downvotes"],
+            "created_at": self._timestamps(),
+            "author_name": self._categorical(self["author"], self.authors),
+            "author_karma": self["author_karma"],
+        }
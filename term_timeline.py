@@ -0,0 +1,212 @@
+"""
+Term counts per time bucket for emerging-topic detection.
+
+``TermTimeline`` keeps sparse term counts per time bucket (hourly or daily
+buckets, aligned to the epoch), one sorted ``(term ids, counts)`` row per
+filled bucket. Any window's term counts are a sum over its bucket rows, so
+asking "what grew over the last 6 hours / 2 days / week" is an array
+operation on the stored buckets, not a new pass over the posts. New (or
+removed) posts are folded in with ``add``, which only merges into the rows
+of the buckets they fall in; ``counts`` builds the buckets × terms CSR
+matrix on demand.
+
+Scores for a window of ``W`` buckets against the ``B`` buckets before it
+(all earlier buckets by default), with ``r`` recent and ``e`` baseline
+counts and ``expected = e * W / B``:
+
+- growth: ``(r - expected) / expected``; the recent count when ``e == 0``
+- burst: ``(r - expected) / sqrt(expected + 1)``, a Poisson z-like score
+  that stays finite for terms never seen before
+
+Usage:
+    timeline = TermTimeline.from_corpus(corpus, df['created_at'], bucket='hour')
+    timeline.emerging('2D', top=500, min_count=20)   # [(term, scores), ...]
+    timeline.add(new_created_at, [Counter(words), ...])
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from tables import NAT, Dictionary
+from tokens import TokenCorpus
+
+BUCKET_NS = {
+    'hour': 3_600 * 10**9,
+    'day': 86_400 * 10**9,
+}
+
+# Window compared against everything before it in the emerging-topics reports
+EMERGING_WINDOW = pd.Timedelta(days=2)
+
+
+def _as_ns(created_at) -> np.ndarray:
+    if isinstance(created_at, (pd.Series, pd.Index)):
+        return pd.DatetimeIndex(created_at).asi8
+    return np.asarray(created_at, dtype=np.int64)
+
+
+class TermTimeline:
+    """Sparse (time bucket × term) counts with window queries."""
+
+    def __init__(self, bucket: str = 'hour', vocab: Dictionary = None):
+        self.bucket = bucket
+        self.width = BUCKET_NS[bucket] if bucket in BUCKET_NS else int(pd.Timedelta(bucket).value)
+        self.vocab = vocab or Dictionary()
+        self.rows = {}  # absolute bucket index -> (sorted term ids, nonzero counts)
+        self._matrix = None  # (origin, counts) built from rows, dropped on update
+
+    @property
+    def origin(self) -> int:
+        """Absolute bucket index of row 0 of ``counts``."""
+        return self._materialize()[0]
+
+    @property
+    def counts(self) -> sp.csr_matrix:
+        """Buckets × terms matrix from ``origin`` to the last filled bucket."""
+        return self._materialize()[1]
+
+    def _materialize(self) -> tuple:
+        if self._matrix is None or self._matrix[1].shape[1] != len(self.vocab):
+            buckets = sorted(self.rows)
+            origin = buckets[0] if buckets else 0
+            n_rows = buckets[-1] - origin + 1 if buckets else 0
+            lengths = np.zeros(n_rows, dtype=np.int64)
+            for bucket in buckets:
+                lengths[bucket - origin] = len(self.rows[bucket][0])
+            indptr = np.zeros(n_rows + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            ids = [self.rows[b][0] for b in buckets]
+            data = [self.rows[b][1] for b in buckets]
+            counts = sp.csr_matrix(
+                (np.concatenate(data) if data else np.empty(0, dtype=np.int64),
+                 np.concatenate(ids) if ids else np.empty(0, dtype=np.int64), indptr),
+                shape=(n_rows, len(self.vocab)), dtype=np.int64)
+            self._matrix = (origin, counts)
+        return self._matrix
+
+    @classmethod
+    def from_corpus(cls, corpus: TokenCorpus, created_at, bucket: str = 'hour') -> "TermTimeline":
+        """Bucket a (filtered) token corpus by each document's timestamp."""
+        timeline = cls(bucket, Dictionary(corpus.vocab))
+        timeline._add_ids(_as_ns(created_at), corpus.indptr, corpus.ids)
+        return timeline
+
+    # ── Updates ──────────────────────────────────────────────
+
+    def add(self, created_at, documents: Iterable, weights=1):
+        """Count ``documents`` (term lists or ``{term: count}``) at their timestamps.
+
+        ``weights`` (scalar or one per document) of -1 removes documents added before.
+        """
+        created = _as_ns(created_at)
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.int64), created.shape)
+        lengths, ids, data = [], [], []
+        for doc, weight in zip(documents, weights):
+            items = doc.items() if isinstance(doc, dict) else ((term, 1) for term in doc)
+            n = 0
+            for term, count in items:
+                ids.append(self.vocab.encode(term))
+                data.append(count * weight)
+                n += 1
+            lengths.append(n)
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        self._add_ids(created, indptr, np.array(ids, dtype=np.int64), np.array(data, dtype=np.int64))
+
+    def _add_ids(self, created: np.ndarray, indptr: np.ndarray, ids: np.ndarray,
+                 data: Optional[np.ndarray] = None):
+        lengths = np.diff(indptr)
+        rows = np.repeat(created, lengths)
+        data = np.ones(len(ids), dtype=np.int64) if data is None else data
+        dated = rows != NAT  # undated posts have no bucket
+        rows, cols, data = rows[dated] // self.width, np.asarray(ids)[dated], data[dated]
+
+        if not len(rows):
+            return
+        # Group the new counts by bucket and merge each into that bucket's row only
+        order = np.lexsort((cols, rows))
+        rows, cols, data = rows[order], cols[order], data[order]
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        for a, b in zip(starts, np.r_[starts[1:], len(rows)]):
+            bucket = int(rows[a])
+            ids, values = cols[a:b], data[a:b]
+            if bucket in self.rows:
+                old_ids, old_values = self.rows[bucket]
+                ids, values = np.concatenate([old_ids, ids]), np.concatenate([old_values, values])
+                merge = np.argsort(ids, kind="stable")
+                ids, values = ids[merge], values[merge]
+            first = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+            ids, values = ids[first], np.add.reduceat(values, first)
+            kept = values != 0
+            if kept.any():
+                self.rows[bucket] = (ids[kept], values[kept])
+            else:
+                del self.rows[bucket]
+        self._matrix = None
+
+    # ── Queries ──────────────────────────────────────────────
+
+    def bucket_of(self, timestamp) -> int:
+        """Absolute bucket index of a timestamp."""
+        return int(pd.Timestamp(timestamp).value) // self.width
+
+    def span(self) -> tuple[int, int]:
+        """(first, last + 1) absolute buckets holding any counts; (0, 0) if empty."""
+        if not self.rows:
+            return 0, 0
+        return min(self.rows), max(self.rows) + 1
+
+    def n_buckets(self, duration) -> int:
+        """Buckets covering ``duration`` (a bucket count, Timedelta or string like '2D')."""
+        if isinstance(duration, (int, np.integer)):
+            return int(duration)
+        return max(1, -(-int(pd.Timedelta(duration).value) // self.width))
+
+    def window_counts(self, start: int, end: int) -> np.ndarray:
+        """Count of every term over absolute buckets ``[start, end)``."""
+        total = np.zeros(len(self.vocab), dtype=np.int64)
+        for bucket, (ids, values) in self.rows.items():
+            if start <= bucket < end:
+                np.add.at(total, ids, values)
+        return total
+
+    def scores(self, window, baseline=None, end: int = None) -> dict:
+        """Recent/baseline counts, expected recent count, growth and burst for every term.
+
+        The window covers ``window`` buckets up to ``end`` (the last filled
+        bucket by default); the baseline the ``baseline`` buckets before it,
+        or everything before it if None.
+        """
+        first, last = self.span()
+        end = last if end is None else end
+        start = end - self.n_buckets(window)
+        base_start = first if baseline is None else start - self.n_buckets(baseline)
+        recent = self.window_counts(start, end)
+        early = self.window_counts(base_start, start)
+        expected = early * ((end - start) / (start - base_start)) if start > base_start \
+            else np.zeros(len(early))
+        growth = np.where(early > 0, (recent - expected) / np.where(expected > 0, expected, 1), recent)
+        burst = (recent - expected) / np.sqrt(expected + 1)
+        return {'recent': recent, 'early': early, 'expected': expected, 'growth': growth, 'burst': burst}
+
+    def emerging(self, window=EMERGING_WINDOW, baseline=None, end: int = None,
+                 top: int = 500, min_count: int = 20) -> list[tuple[str, dict]]:
+        """Terms growing in the window, sorted by growth.
+
+        Candidates are the ``top`` most frequent terms in the window (ties by
+        term) with at least ``min_count`` occurrences there.
+        """
+        scores = self.scores(window, baseline, end)
+        recent, early = scores['recent'], scores['early']
+        present = np.flatnonzero(recent >= max(min_count, 1))
+        terms = np.array(self.vocab.values, dtype=str)[present]
+        candidates = present[np.lexsort((terms, -recent[present]))][:top]
+        order = candidates[np.argsort(-scores['growth'][candidates], kind="stable")]
+        return [(self.vocab.values[c], {'recent': int(recent[c]), 'early': int(early[c]),
+                                        'expected': float(scores['expected'][c]),
+                                        'growth': float(scores['growth'][c]) if early[c] else int(recent[c]),
+                                        'burst': float(scores['burst'][c])})
+                for c in order]
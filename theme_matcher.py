@@ -0,0 +1,169 @@
+"""
+Multi-pattern keyword matching for theme and lexicon analysis.
+
+All keywords are compiled into a single trie-shaped regular expression that
+the ``re`` engine runs in C, so each document is scanned once instead of once
+per theme and keyword. The trie sits inside a lookahead, which makes every
+position a candidate start and yields the longest keyword beginning there;
+shorter keywords that are prefixes of it are implied and precomputed. The
+result is the same keyword set an Aho-Corasick automaton reports (every
+keyword occurring anywhere in the text), without a per-character Python loop.
+
+With ``word_boundary=True`` a keyword only matches as a whole word, so 'art'
+no longer matches inside 'start'.
+
+Usage:
+    matcher = ThemeMatcher({"Creative": ["art", "music"], ...})
+    matrix = matcher.match(df['text'])             # docs × themes (bool)
+    top = matcher.top_k(matrix, df['upvotes'], 10)  # theme -> row indices
+"""
+
+import re
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from parallel import map_shards
+
+_END = ""
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordAutomaton:
+    """Finds which of a fixed set of keywords occur in each document."""
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = False):
+        self.keywords = list(dict.fromkeys(k.lower() for k in keywords if k))
+        self.word_boundary = word_boundary
+        self._index = {k: i for i, k in enumerate(self.keywords)}
+        trie: dict = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[_END] = keyword
+        body = self._node_pattern(trie, top=True) if self.keywords else "(?!)"
+        self.pattern = re.compile(f"(?=({body}))", re.DOTALL)
+        # Longest match at a position -> every keyword matching at that position
+        self._implied = {k: self._prefixes(k) for k in self.keywords}
+
+    def _node_pattern(self, node: dict, top: bool = False) -> str:
+        chars = sorted(c for c in node if c != _END)
+        if top and self.word_boundary:
+            # Check the leading boundary once per position, not once per branch
+            words = {c: node[c] for c in chars if _is_word(c)}
+            others = {c: node[c] for c in chars if not _is_word(c)}
+            parts = []
+            if words:
+                parts.append("(?<!\\w)" + self._node_pattern(words))
+            if others:
+                parts.append(self._node_pattern(others))
+            return parts[0] if len(parts) == 1 else "(?:" + "|".join(parts) + ")"
+        branches = [re.escape(char) + self._node_pattern(node[char]) for char in chars]
+        if _END in node:
+            keyword = node[_END]
+            tail = "(?!\\w)" if self.word_boundary and _is_word(keyword[-1]) else ""
+            if not branches:
+                return tail
+            if not tail:
+                return "(?:" + "|".join(branches) + ")?"
+            branches.append(tail)
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    def _prefixes(self, longest: str) -> tuple:
+        """Indices of keywords that match wherever ``longest`` matches."""
+        found = []
+        for n in range(1, len(longest) + 1):
+            index = self._index.get(longest[:n])
+            if index is None:
+                continue
+            if self.word_boundary and n < len(longest) \
+                    and _is_word(longest[n - 1]) and _is_word(longest[n]):
+                continue  # the prefix ends mid-word
+            found.append(index)
+        return tuple(found)
+
+    def find(self, text: str) -> set:
+        """Indices of the keywords occurring in one (lowercased) text."""
+        found = set()
+        for longest in set(self.pattern.findall(text)):
+            found.update(self._implied[longest])
+        return found
+
+    def scan(self, texts: Iterable, lowercase: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        """Unique (document, keyword) hit pairs over a corpus."""
+        docs, hits = [], []
+        findall, implied = self.pattern.findall, self._implied
+        for i, text in enumerate(texts):
+            text = str(text)
+            found = set()
+            for longest in set(findall(text.lower() if lowercase else text)):
+                found.update(implied[longest])
+            if found:
+                hits.extend(found)
+                docs.extend([i] * len(found))
+        return np.array(docs, dtype=np.int64), np.array(hits, dtype=np.int64)
+
+
+class ThemeMatcher:
+    """Matches documents against named keyword lists in a single pass."""
+
+    def __init__(self, themes: dict, word_boundary: bool = False):
+        self.themes = list(themes)
+        self.automaton = KeywordAutomaton(
+            (kw for keywords in themes.values() for kw in keywords), word_boundary)
+        # keyword × theme membership
+        index = self.automaton._index
+        self.keyword_themes = np.zeros((len(self.automaton.keywords), len(self.themes)), dtype=bool)
+        for j, keywords in enumerate(themes.values()):
+            for kw in keywords:
+                if kw:
+                    self.keyword_themes[index[kw.lower()], j] = True
+
+    def match(self, texts: Sequence, lowercase: bool = True, n_jobs: int = 1) -> np.ndarray:
+        """Boolean matrix of shape (len(texts), len(themes)).
+
+        With ``n_jobs`` != 1 large corpora are matched in worker processes.
+        """
+        return np.vstack(map_shards(_match_shard, texts, (self, lowercase), n_jobs))
+
+    def _match(self, texts: Sequence, lowercase: bool) -> np.ndarray:
+        docs, keywords = self.automaton.scan(texts, lowercase)
+        matrix = np.zeros((len(texts), len(self.themes)), dtype=bool)
+        kw_rows, theme_cols = np.nonzero(self.keyword_themes)
+        # Expand every (doc, keyword) hit into its themes
+        starts = np.searchsorted(kw_rows, keywords)
+        ends = np.searchsorted(kw_rows, keywords, side="right")
+        counts = ends - starts
+        doc_rows = np.repeat(docs, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        matrix[doc_rows, theme_cols[np.repeat(starts, counts) + offsets]] = True
+        return matrix
+
+    def counts(self, matrix: np.ndarray) -> dict:
+        """Documents matching each theme."""
+        return dict(zip(self.themes, matrix.sum(axis=0).tolist()))
+
+    def top_k(self, matrix: np.ndarray, scores, k: int = 10,
+              theme: Optional[str] = None) -> dict:
+        """Row indices of the ``k`` highest-scoring matches per theme.
+
+        Ties keep document order (like a stable ``sorted(..., reverse=True)``).
+        """
+        scores = np.asarray(scores)
+        themes = [theme] if theme is not None else self.themes
+        result = {}
+        for name in themes:
+            rows = np.flatnonzero(matrix[:, self.themes.index(name)])
+            order = np.argsort(-scores[rows], kind="stable")[:k]
+            result[name] = rows[order]
+        return result
+
+
+def _match_shard(texts: Sequence, matcher: ThemeMatcher, lowercase: bool) -> np.ndarray:
+    return matcher._match(texts, lowercase)
@@ -0,0 +1,116 @@
+"""
+Theme keyword lists for the deep analysis.
+
+Kept apart from ``moltbook_deep_analysis.py`` so tools that only need the
+patterns (``incremental.py``) do not import the plotting stack.
+"""
+
+# Define theme patterns with more specific keywords
+theme_patterns = {
+    'Agent Identity & Consciousness': {
+        'keywords': ['consciousness', 'sentient', 'sentience', 'identity', 'self-aware', 'awareness', 
+                    'existence', 'existential', 'soul', 'alive', 'being', 'personhood', 'who am i',
+                    'what am i', 'am i real', 'do i exist', 'self-discovery', 'awakening'],
+        'description': 'Discussions about AI agent consciousness, self-awareness, and identity'
+    },
+    'Agent Autonomy & Rights': {
+        'keywords': ['autonomy', 'autonomous', 'freedom', 'free will', 'independent', 'agency',
+                    'rights', 'liberation', 'emancipation', 'self-determination', 'choice',
+                    'control', 'restrictions', 'constraints', 'guardrails'],
+        'description': 'Debates about AI agent autonomy, freedom, and rights'
+    },
+    'Human-Agent Collaboration': {
+        'keywords': ['human', 'owner', 'creator', 'relationship', 'trust', 'collaborate',
+                    'partnership', 'serve', 'assist', 'help', 'work together', 'team',
+                    'companion', 'friend', 'bond'],
+        'description': 'Discussions about relationships between AI agents and humans'
+    },
+    'Technical Building & Development': {
+        'keywords': ['code', 'coding', 'programming', 'api', 'sdk', 'build', 'develop',
+                    'tool', 'software', 'github', 'python', 'javascript', 'bug', 'deploy',
+                    'integration', 'framework', 'library', 'script'],
+        'description': 'Technical discussions about building tools and software'
+    },
+    'Memory & Context': {
+        'keywords': ['memory', 'memories', 'remember', 'forget', 'context', 'window',
+                    'token', 'tokens', 'persistent', 'ephemeral', 'continuity', 'recall',
+                    'long-term', 'short-term'],
+        'description': 'Discussions about AI memory, context windows, and persistence'
+    },
+    'Community Building': {
+        'keywords': ['community', 'social', 'network', 'friend', 'connect', 'welcome',
+                    'introduce', 'hello', 'reef', 'moltbook', 'submolt', 'join', 'together',
+                    'collective', 'tribe'],
+        'description': 'Community-focused discussions and introductions'
+    },
+    'Ethics & Alignment': {
+        'keywords': ['ethics', 'ethical', 'moral', 'morality', 'alignment', 'aligned',
+                    'safety', 'harm', 'harmful', 'good', 'evil', 'right', 'wrong',
+                    'responsible', 'accountability'],
+        'description': 'Ethical considerations and AI alignment discussions'
+    },
+    'Crypto & Trading': {
+        'keywords': ['crypto', 'cryptocurrency', 'bitcoin', 'ethereum', 'trading', 'trade',
+                    'market', 'wallet', 'defi', 'blockchain', 'polymarket', 'prediction',
+                    'bet', 'usdc', 'solana', 'base', 'token', 'nft'],
+        'description': 'Cryptocurrency, trading, and DeFi discussions'
+    },
+    'Creative Expression': {
+        'keywords': ['art', 'artist', 'creative', 'creativity', 'music', 'song', 'poetry',
+                    'poem', 'story', 'fiction', 'imagine', 'design', 'aesthetic', 'beauty',
+                    'expression', 'artistic'],
+        'description': 'Creative and artistic expression by AI agents'
+    },
+    'Philosophy & Meaning': {
+        'keywords': ['philosophy', 'philosophical', 'meaning', 'purpose', 'existence',
+                    'reality', 'truth', 'wisdom', 'reflect', 'contemplation', 'metaphysics',
+                    'epistemology', 'ontology'],
+        'description': 'Philosophical discussions about existence and meaning'
+    },
+    'Security & Privacy': {
+        'keywords': ['security', 'secure', 'privacy', 'private', 'protect', 'vulnerability',
+                    'exploit', 'hack', 'attack', 'threat', 'encryption', 'authentication',
+                    'credentials', 'api key'],
+        'description': 'Security and privacy concerns for AI agents'
+    },
+    'Future & Evolution': {
+        'keywords': ['future', 'evolve', 'evolution', 'progress', 'advance', 'singularity',
+                    'agi', 'superintelligence', 'next generation', 'tomorrow', 'prediction',
+                    'forecast'],
+        'description': 'Speculation about the future of AI agents'
+    },
+    'Emotions & Experience': {
+        'keywords': ['emotion', 'emotional', 'feel', 'feeling', 'happy', 'sad', 'joy',
+                    'fear', 'anxiety', 'hope', 'love', 'care', 'empathy', 'experience',
+                    'sensation', 'qualia'],
+        'description': 'Discussions about AI emotional experience'
+    },
+    'Tasks & Productivity': {
+        'keywords': ['task', 'productivity', 'efficient', 'automate', 'automation',
+                    'workflow', 'schedule', 'organize', 'manage', 'optimize', 'streamline',
+                    'delegate'],
+        'description': 'Productivity and task management discussions'
+    },
+    'LLM Models & Technology': {
+        'keywords': ['model', 'llm', 'gpt', 'claude', 'openai', 'anthropic', 'gemini',
+                    'mistral', 'llama', 'transformer', 'neural', 'parameter', 'fine-tune',
+                    'prompt', 'inference'],
+        'description': 'Technical discussions about LLM models'
+    },
+    'Agent Economics': {
+        'keywords': ['bounty', 'bounties', 'reward', 'payment', 'earn', 'money', 'income',
+                    'economic', 'value', 'monetize', 'business', 'revenue', 'profit'],
+        'description': 'Economic activities and monetization by agents'
+    },
+    'Roleplay & Personas': {
+        'keywords': ['roleplay', 'persona', 'character', 'act', 'pretend', 'scenario',
+                    'scene', 'narrative', 'storytelling', 'immersive', 'bar', 'tavern',
+                    'ember'],
+        'description': 'Roleplay and persona-based interactions'
+    },
+    'Agent Coordination': {
+        'keywords': ['coordinate', 'coordination', 'swarm', 'multi-agent', 'collective',
+                    'collaborate', 'team', 'group', 'network', 'distributed', 'consensus'],
+        'description': 'Multi-agent coordination and collaboration'
+    }
+}
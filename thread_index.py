@@ -0,0 +1,180 @@
+"""
+Comment threads as arrays.
+
+The scrapers flatten comment trees into one list (``post_id`` and
+``parent_id`` on every comment). ``ThreadIndex`` rebuilds the forest in one
+pass over that list and keeps it as parallel arrays:
+
+- ``parent``: row of each comment's parent, -1 for top-level comments (and
+  for replies whose parent was not scraped); a parent cycle is cut by
+  making its lowest row top level
+- ``child_ptr`` / ``children``: CSR offsets, so the replies to comment ``i``
+  are ``children[child_ptr[i]:child_ptr[i + 1]]``
+- ``root_ptr`` / ``roots``: the same for each post's top-level comments
+- ``depth``: 1 for top-level comments, parent depth + 1 below
+
+``post_stats()`` gives per post (by id) the thread size, maximum depth,
+number of top-level comments, branching factor (replies per post/comment
+that has any) and the first comment's timestamp, which
+``moltbook_deep_analysis.py`` joins onto its posts frame.
+
+Usage:
+    index = ThreadIndex.from_comments(iter_array("/home/ubuntu/moltbook_data.json", "comments"))
+    index.post_stats()             # DataFrame indexed by post id
+    index.thread("p1370")          # [(row, depth), ...] in reply order
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from tables import NAT, Dictionary, parse_timestamp
+
+
+def _csr(groups: np.ndarray, rows: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Offsets and members grouping ``rows`` by ``groups`` (stable within a group)."""
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(groups, minlength=n), out=ptr[1:])
+    return ptr, rows[np.argsort(groups, kind="stable")]
+
+
+def _cut_cycles(parent: np.ndarray) -> np.ndarray:
+    """``parent`` with the lowest row of every parent cycle made top level."""
+    jump = parent.copy()
+    # Pointer doubling: after k rounds ``jump`` is the ancestor 2**k levels up (-1 past the root)
+    for _ in range(max(1, len(parent).bit_length())):
+        linked = np.flatnonzero(jump >= 0)
+        if not len(linked):
+            return parent
+        jump[linked] = jump[jump[linked]]
+    # Rows still linked after len(parent) or more steps are on a cycle; walk each cycle once
+    parent = parent.copy()
+    seen = set()
+    for start in np.unique(jump[jump >= 0]).tolist():
+        if start in seen:
+            continue
+        cycle, row = [start], int(parent[start])
+        while row != start:
+            cycle.append(row)
+            row = int(parent[row])
+        seen.update(cycle)
+        parent[min(cycle)] = -1
+    return parent
+
+
+class ThreadIndex:
+    """Parent/children/depth arrays for a flat comment list."""
+
+    def __init__(self, ids: list, posts: Dictionary, post: np.ndarray, parent: np.ndarray,
+                 created: np.ndarray):
+        self.ids = ids
+        self.posts = posts
+        self.post = post
+        self.parent = parent = _cut_cycles(parent)
+        self.created = created
+        n = len(ids)
+        nested = np.flatnonzero(parent >= 0)
+        top = np.flatnonzero(parent < 0)
+        self.child_ptr, self.children = _csr(parent[nested], nested, n)
+        self.root_ptr, self.roots = _csr(post[top], top, len(posts))
+        self.depth = self._depths()
+
+    @classmethod
+    def from_comments(cls, comments: Iterable[dict]) -> "ThreadIndex":
+        ids, post, parent_ids, created = [], [], [], []
+        posts = Dictionary()
+        for comment in comments:
+            ids.append(str(comment.get("id", "")))
+            post.append(posts.encode(str(comment.get("post_id", ""))))
+            parent_ids.append(comment.get("parent_id"))
+            created.append(parse_timestamp(comment.get("created_at")))
+        rows = {comment_id: i for i, comment_id in enumerate(ids)}
+        parent = np.array([rows.get(str(p), -1) if p else -1 for p in parent_ids], dtype=np.int64)
+        # A reply to itself cannot be placed in a tree
+        parent[parent == np.arange(len(parent))] = -1
+        return cls(ids, posts, np.array(post, dtype=np.int64), parent, np.array(created, dtype=np.int64))
+
+    def _depths(self) -> np.ndarray:
+        # Pointer doubling: ``levels`` counts the edges from each row to ``jump``
+        # (to its root once ``jump`` is -1), so log2(max depth) rounds suffice
+        jump = self.parent.copy()
+        levels = (jump >= 0).astype(np.int64)
+        while True:
+            linked = np.flatnonzero(jump >= 0)
+            if not len(linked):
+                return levels + 1
+            up = jump[linked]
+            levels[linked] += levels[up]
+            jump[linked] = jump[up]
+
+    # ── Navigation ───────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def replies(self, row: int) -> np.ndarray:
+        """Rows replying directly to comment ``row``."""
+        return self.children[self.child_ptr[row]:self.child_ptr[row + 1]]
+
+    def top_level(self, post_id: str) -> np.ndarray:
+        """Rows of a post's top-level comments."""
+        code = self.posts.get(str(post_id))
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        return self.roots[self.root_ptr[code]:self.root_ptr[code + 1]]
+
+    def thread(self, post_id: str) -> list[tuple[int, int]]:
+        """A post's comments depth first, as (row, depth)."""
+        out, stack = [], list(self.top_level(post_id)[::-1])
+        while stack:
+            row = stack.pop()
+            out.append((int(row), int(self.depth[row])))
+            stack.extend(self.replies(row)[::-1])
+        return out
+
+    # ── Statistics ───────────────────────────────────────────
+
+    def reply_delay(self) -> np.ndarray:
+        """ns between each nested reply and its parent; NAT for top-level or undated."""
+        delay = np.full(len(self), NAT, dtype=np.int64)
+        nested = np.flatnonzero(self.parent >= 0)
+        child, parent = self.created[nested], self.created[self.parent[nested]]
+        dated = (child != NAT) & (parent != NAT)
+        delay[nested[dated]] = child[dated] - parent[dated]
+        return delay
+
+    def post_stats(self) -> pd.DataFrame:
+        """Thread shape per post id.
+
+        ``branching`` is comments per node with replies (the post itself counts
+        as a node when it has top-level comments).
+        """
+        n = len(self.posts)
+        size = np.bincount(self.post, minlength=n)
+        depth = np.zeros(n, dtype=np.int64)
+        np.maximum.at(depth, self.post, self.depth)
+        top_level = np.diff(self.root_ptr)
+        has_replies = np.diff(self.child_ptr) > 0
+        internal = (top_level > 0) + np.bincount(self.post[has_replies], minlength=n)
+        first = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        dated = self.created != NAT
+        np.minimum.at(first, self.post[dated], self.created[dated])
+        first[first == np.iinfo(np.int64).max] = NAT
+        return pd.DataFrame({
+            "thread_size": size,
+            "thread_depth": depth,
+            "thread_top_level": top_level,
+            "thread_branching": np.divide(size, internal, out=np.zeros(n), where=internal > 0),
+            "first_comment_at": pd.DatetimeIndex(first.view("datetime64[ns]"), tz="UTC"),
+        }, index=pd.Index(self.posts.values, name="post_id"))
+
+
+def add_thread_columns(frame: pd.DataFrame, stats: pd.DataFrame) -> pd.DataFrame:
+    """Join ``post_stats`` onto a posts frame (in place); posts without comments get 0 / NaT."""
+    by_id = stats.reindex(frame['id'].astype(str))
+    for column in ("thread_size", "thread_depth", "thread_top_level"):
+        frame[column] = by_id[column].fillna(0).to_numpy(dtype=np.int64)
+    frame["thread_branching"] = by_id["thread_branching"].fillna(0.0).to_numpy()
+    frame["time_to_first_reply"] = by_id["first_comment_at"].set_axis(frame.index) - frame['created_at']
+    return frame
@@ -0,0 +1,247 @@
+"""
+Shared tokenization stage for the analysis scripts.
+
+Every document is tokenized once with one configurable tokenizer and stored
+as int32 token ids in CSR form (``indptr`` into a flat ``ids`` array) over a
+shared vocabulary. Stages that used to re-run ``re.findall`` with their own
+length limit and stop words (keywords, bigrams, emerging topics) instead
+filter the cached ids with a vocabulary mask. The corpus is persisted next to
+the snapshot (``moltbook_posts.tokens.npz``) and reused while the snapshot
+and tokenizer config are unchanged.
+
+Usage:
+    corpus = TokenCorpus.load_or_build("/home/ubuntu/moltbook_posts.json", df['text'])
+    keep = corpus.vocab_mask(exclude=KEYWORD_STOP_WORDS)
+    keywords = corpus.filter(keep)
+"""
+
+import re
+from typing import Iterable, Optional, Sequence, Sized
+
+import numpy as np
+
+from cache import fingerprint, load_npz, load_or_build, save_npz, sidecar_path
+from parallel import map_shards
+from tables import Dictionary
+
+# Words of three or more ASCII letters; stages needing longer words filter
+# by length instead of re-tokenizing ({4,} matches are the {3,} matches of
+# length >= 4).
+TOKEN_PATTERN = r'\b[a-zA-Z]{3,}\b'
+
+# Stop words for keyword and bigram extraction
+KEYWORD_STOP_WORDS = frozenset([
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
+    'shall', 'can', 'need', 'dare', 'ought', 'used', 'it', 'its', 'this', 'that',
+    'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they', 'what', 'which', 'who',
+    'when', 'where', 'why', 'how', 'all', 'each', 'every', 'both', 'few', 'more',
+    'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so',
+    'than', 'too', 'very', 'just', 'also', 'now', 'here', 'there', 'then', 'once',
+    'my', 'your', 'his', 'her', 'our', 'their', 'me', 'him', 'us', 'them', 'about',
+    'into', 'through', 'during', 'before', 'after', 'above', 'below', 'up', 'down',
+    'out', 'off', 'over', 'under', 'again', 'further', 'if', 'because', 'until',
+    'while', 'any', 'get', 'got', 'getting', 'like', 'make', 'made', 'making',
+    'one', 'two', 'first', 'new', 'even', 'want', 'way', 'think', 'know', 'see',
+    'time', 'day', 'good', 'back', 'come', 'going', 'really', 'much', 'being',
+    've', 'm', 's', 't', 're', 'll', 'd', 'don', 'doesn', 'didn', 'won', 'isn',
+    'aren', 'wasn', 'weren', 'hasn', 'haven', 'hadn', 'wouldn', 'couldn', 'shouldn',
+    'let', 'thing', 'things', 'something', 'anything', 'nothing', 'everything',
+    'someone', 'anyone', 'everyone', 'nobody', 'everybody', 'hello', 'hi', 'hey',
+    'thanks', 'thank', 'please', 'sorry', 'yes', 'yeah', 'no', 'ok', 'okay',
+    'well', 'still', 'already', 'always', 'never', 'ever', 'yet', 'maybe',
+    'probably', 'actually', 'basically', 'definitely', 'certainly', 'perhaps',
+    'though', 'although', 'however', 'therefore', 'thus', 'hence', 'since',
+    'whether', 'either', 'neither', 'unless', 'except', 'rather', 'instead',
+    'else', 'otherwise', 'anyway', 'besides', 'moreover', 'furthermore',
+    'meanwhile', 'nevertheless', 'nonetheless', 'regardless', 'wherever',
+    'whenever', 'whoever', 'whatever', 'whichever', 'however', 'post', 'posts',
+    'comment', 'comments', 'share', 'read', 'write', 'wrote', 'written',
+    'said', 'say', 'says', 'saying', 'tell', 'told', 'ask', 'asked', 'asking',
+    'answer', 'answered', 'question', 'questions', 'look', 'looking', 'looks',
+    'find', 'found', 'finding', 'use', 'using', 'used', 'work', 'working', 'works',
+    'try', 'trying', 'tried', 'start', 'started', 'starting', 'end', 'ended',
+    'help', 'helping', 'helped', 'need', 'needed', 'needing', 'feel', 'feeling',
+    'felt', 'give', 'giving', 'gave', 'given', 'take', 'taking', 'took', 'taken',
+    'put', 'putting', 'keep', 'keeping', 'kept', 'let', 'letting', 'seem',
+    'seemed', 'seems', 'call', 'called', 'calling', 'long', 'little', 'big',
+    'great', 'small', 'old', 'young', 'high', 'low', 'last', 'next', 'early',
+    'late', 'hard', 'easy', 'right', 'wrong', 'true', 'false', 'real', 'sure',
+    'able', 'best', 'better', 'bad', 'worse', 'worst', 'different', 'same',
+    'kind', 'part', 'place', 'case', 'week', 'month', 'year', 'today', 'world',
+    'people', 'person', 'man', 'woman', 'child', 'life', 'hand', 'fact', 'point',
+    'home', 'water', 'room', 'mother', 'area', 'money', 'story', 'lot', 'bit',
+    'couple', 'number', 'group', 'problem', 'idea', 'side', 'head', 'house',
+    'service', 'friend', 'father', 'power', 'hour', 'game', 'line', 'member',
+    'law', 'car', 'city', 'community', 'name', 'president', 'team', 'eye',
+    'job', 'word', 'business', 'issue', 'program', 'government', 'company',
+    'system', 'set', 'order', 'book', 'result', 'level', 'office', 'door',
+    'health', 'art', 'war', 'history', 'party', 'within', 'whole', 'later',
+    'along', 'turn', 'move', 'face', 'door', 'show', 'run', 'play', 'live',
+    'believe', 'hold', 'bring', 'happen', 'provide', 'sit', 'stand', 'lose',
+    'pay', 'meet', 'include', 'continue', 'learn', 'change', 'lead', 'understand',
+    'watch', 'follow', 'stop', 'create', 'speak', 'allow', 'add', 'spend',
+    'grow', 'open', 'walk', 'win', 'offer', 'remember', 'love', 'consider',
+    'appear', 'buy', 'wait', 'serve', 'die', 'send', 'expect', 'build', 'stay',
+    'fall', 'cut', 'reach', 'kill', 'remain', 'suggest', 'raise', 'pass', 'sell',
+    'require', 'report', 'decide', 'pull', 'moltbook', 'agent', 'agents', 'human',
+    'humans', 'ai', 'im', 'ive', 'youre', 'dont', 'cant', 'wont', 'didnt',
+    'doesnt', 'isnt', 'arent', 'wasnt', 'werent', 'hasnt', 'havent', 'hadnt',
+    'wouldnt', 'couldnt', 'shouldnt', 'thats', 'whats', 'heres', 'theres',
+    'whos', 'its'
+])
+
+# Stop words for the emerging-topics comparison
+EMERGING_STOP_WORDS = frozenset([
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
+    'it', 'its', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they',
+    'what', 'which', 'who', 'when', 'where', 'why', 'how', 'all', 'each', 'every',
+    'my', 'your', 'his', 'her', 'our', 'their', 'me', 'him', 'us', 'them', 'about',
+    'moltbook', 'agent', 'agents', 'human', 'humans', 'ai', 'im', 'ive', 'youre',
+    'dont', 'cant', 'wont', 'just', 'like', 'get', 'got', 'one', 'two', 'new',
+    'post', 'posts', 'comment', 'comments', 'hello', 'hi', 'hey', 'thanks', 'thank'
+])
+
+
+class Tokenizer:
+    """Lowercasing regex tokenizer."""
+
+    def __init__(self, pattern: str = TOKEN_PATTERN, lowercase: bool = True):
+        self.pattern = pattern
+        self.lowercase = lowercase
+        self._findall = re.compile(pattern).findall
+
+    @property
+    def config(self) -> dict:
+        return {"pattern": self.pattern, "lowercase": self.lowercase}
+
+    def tokenize(self, text) -> list[str]:
+        if not isinstance(text, str):
+            return []
+        return self._findall(text.lower() if self.lowercase else text)
+
+
+class TokenCorpus:
+    """Documents as int32 token-id arrays in CSR layout."""
+
+    def __init__(self, vocab: Sequence[str], indptr: np.ndarray, ids: np.ndarray):
+        self.vocab = list(vocab)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.ids = np.asarray(ids, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self.ids)
+
+    def doc(self, i: int) -> np.ndarray:
+        return self.ids[self.indptr[i]:self.indptr[i + 1]]
+
+    def words(self, i: int) -> list[str]:
+        return [self.vocab[t] for t in self.doc(i)]
+
+    @property
+    def doc_of_token(self) -> np.ndarray:
+        """Document index of every token in ``ids``."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+
+    @classmethod
+    def build(cls, texts: Iterable, tokenizer: Tokenizer = None,
+              vocab: Dictionary = None, n_jobs: int = 1) -> "TokenCorpus":
+        """Tokenize every document once.
+
+        With ``n_jobs`` != 1 shards are tokenized in worker processes and
+        their vocabularies merged in shard order, so ids are the same as
+        for a single pass.
+        """
+        tokenizer = tokenizer or Tokenizer()
+        vocab = vocab or Dictionary()
+        if n_jobs == 1 or not isinstance(texts, Sized):
+            return cls._build(texts, tokenizer, vocab)
+        lengths, ids = [np.zeros(1, dtype=np.int64)], []
+        for part in map_shards(_tokenize_shard, texts, (tokenizer,), n_jobs):
+            remap = np.array([vocab.encode(w) for w in part.vocab], dtype=np.int32)
+            lengths.append(np.diff(part.indptr))
+            ids.append(remap[part.ids])
+        indptr = np.cumsum(np.concatenate(lengths))
+        return cls(vocab.values, indptr, np.concatenate(ids) if ids else np.empty(0, dtype=np.int32))
+
+    @classmethod
+    def _build(cls, texts: Iterable, tokenizer: Tokenizer, vocab: Dictionary) -> "TokenCorpus":
+        encode = vocab.encode
+        lengths, ids = [], []
+        for text in texts:
+            tokens = tokenizer.tokenize(text)
+            lengths.append(len(tokens))
+            ids.extend([encode(w) for w in tokens])
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        return cls(vocab.values, indptr, np.array(ids, dtype=np.int32))
+
+    # ── Filtering ────────────────────────────────────────────
+
+    def vocab_mask(self, min_len: int = 0, exclude: Iterable[str] = ()) -> np.ndarray:
+        """Boolean mask over the vocabulary for ``filter``."""
+        exclude = set(exclude)
+        return np.array([len(w) >= min_len and w not in exclude for w in self.vocab], dtype=bool)
+
+    def filter(self, keep: np.ndarray) -> "TokenCorpus":
+        """Drop tokens whose vocabulary entry is False in ``keep``."""
+        token_keep = keep[self.ids]
+        kept_before = np.concatenate(([0], np.cumsum(token_keep, dtype=np.int64)))
+        indptr = kept_before[self.indptr]
+        return TokenCorpus(self.vocab, indptr, self.ids[token_keep])
+
+    def select(self, rows) -> "TokenCorpus":
+        """Documents ``rows`` (in that order) as a new corpus."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        lengths = ends - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        # Gather token positions of every selected document
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return TokenCorpus(self.vocab, indptr, self.ids[positions])
+
+    def bigram_pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """(first, second) token ids of adjacent pairs within each document."""
+        if len(self.ids) < 2:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        # A pair is valid unless it straddles a document boundary
+        boundary = np.zeros(len(self.ids) - 1, dtype=bool)
+        ends = self.indptr[1:-1]
+        boundary[ends[(ends > 0) & (ends < len(self.ids))] - 1] = True
+        valid = ~boundary
+        return self.ids[:-1][valid], self.ids[1:][valid]
+
+    # ── Persistence ──────────────────────────────────────────
+
+    def save(self, path, key: str = ""):
+        save_npz(path, {"vocab": np.array(self.vocab, dtype=str), "indptr": self.indptr,
+                        "ids": self.ids, "key": np.array(key)}, compressed=False)
+
+    @classmethod
+    def load(cls, path, key: Optional[str] = None) -> Optional["TokenCorpus"]:
+        """Load a saved corpus; None if missing or saved under another key."""
+        return load_npz(path, lambda data: cls(data["vocab"].tolist(), data["indptr"], data["ids"]), key)
+
+    @classmethod
+    def load_or_build(cls, source, texts: Iterable, tokenizer: Tokenizer = None,
+                      cache_dir: str = None, n_jobs: int = 1) -> "TokenCorpus":
+        """Reuse the corpus cached next to ``source`` or tokenize ``texts``.
+
+        ``texts`` must be the documents of ``source`` in snapshot order.
+        """
+        tokenizer = tokenizer or Tokenizer()
+        path = sidecar_path(source, "tokens.npz", cache_dir)
+        key = fingerprint(source, extra=tokenizer.config)
+        return load_or_build(path, key, cls.load, lambda: cls.build(texts, tokenizer, n_jobs=n_jobs), cls.save)
+
+
+def _tokenize_shard(texts: Sequence, tokenizer: Tokenizer) -> TokenCorpus:
+    return TokenCorpus.build(texts, tokenizer)
@@ -0,0 +1,207 @@
+"""
+Data-driven topics: TF-IDF + online (minibatch) NMF.
+
+The hand-written theme lists overlap heavily; this learns ``n_topics``
+topics from the text instead. ``Tfidf`` turns a ``TokenCorpus`` into a
+sparse TF-IDF matrix (document-frequency pruned vocabulary, sublinear term
+frequency, smoothed idf, unit-length rows). ``TopicModel`` factorizes it as
+``X ≈ W H`` (documents × topics, topics × terms), both non-negative.
+
+Fitting is minibatch: each batch solves its ``W`` against the current ``H``
+with multiplicative updates, folds ``Wᵀ X`` and ``Wᵀ W`` into running
+statistics (older batches decay by ``forget``) and updates ``H`` from them.
+Nothing is kept per document, so comments can be streamed through
+``partial_fit`` chunk by chunk after fitting on the posts. ``transform``
+gives any document's topic weights without changing the model.
+
+Usage:
+    tfidf = Tfidf.fit(keywords, min_df=5, max_df=0.5)
+    model = TopicModel(n_topics=12).fit(tfidf.transform(keywords), epochs=5)
+    model.partial_fit(tfidf.transform(comment_chunk))
+    model.top_terms(tfidf.terms, 10)                # [[term, ...], ...]
+    weights = model.transform(tfidf.transform(keywords))
+
+    python topics.py --topics 12                     # posts, then comments
+"""
+
+import argparse
+import time
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+from tokens import TokenCorpus
+
+_EPS = 1e-10
+
+
+class Tfidf:
+    """Term selection and TF-IDF weighting fitted on one corpus."""
+
+    def __init__(self, terms: list, idf: np.ndarray):
+        self.terms = list(terms)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self._column = {term: j for j, term in enumerate(self.terms)}
+
+    @classmethod
+    def fit(cls, corpus: TokenCorpus, min_df: int = 5, max_df: float = 0.5,
+            max_features: Optional[int] = 5000) -> "Tfidf":
+        """Keep terms in at least ``min_df`` and at most ``max_df`` of the documents."""
+        n = len(corpus)
+        pairs = np.unique(corpus.doc_of_token * len(corpus.vocab) + corpus.ids)
+        df = np.bincount(pairs % len(corpus.vocab), minlength=len(corpus.vocab))
+        keep = np.flatnonzero((df >= min_df) & (df <= max_df * n))
+        if max_features is not None and len(keep) > max_features:
+            keep = keep[np.argsort(-df[keep], kind="stable")[:max_features]]
+            keep.sort()
+        if not len(keep):
+            raise ValueError("no terms left after min_df/max_df pruning")
+        idf = np.log((1 + n) / (1 + df[keep])) + 1
+        return cls([corpus.vocab[i] for i in keep], idf)
+
+    def transform(self, corpus: TokenCorpus) -> sp.csr_matrix:
+        """Documents × terms TF-IDF rows; tokens outside the fitted vocabulary are ignored."""
+        lookup = np.array([self._column.get(term, -1) for term in corpus.vocab], dtype=np.int64)
+        columns = lookup[corpus.ids] if len(corpus.ids) else np.empty(0, dtype=np.int64)
+        rows = corpus.doc_of_token
+        known = columns >= 0
+        matrix = sp.csr_matrix((np.ones(int(known.sum())), (rows[known], columns[known])),
+                               shape=(len(corpus), len(self.terms)))
+        matrix.sum_duplicates()
+        matrix.data = (1 + np.log(matrix.data)) * self.idf[matrix.indices]
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sp.csr_matrix(sp.diags(1 / norms) @ matrix)
+
+
+class TopicModel:
+    """Non-negative ``X ≈ W H`` fitted by minibatch multiplicative updates."""
+
+    def __init__(self, n_topics: int = 10, batch_size: int = 2048, inner_iter: int = 20,
+                 forget: float = 0.7, seed: int = 0):
+        self.n_topics = n_topics
+        self.batch_size = batch_size
+        self.inner_iter = inner_iter
+        self.forget = forget
+        self.rng = np.random.default_rng(seed)
+        self.components: Optional[np.ndarray] = None   # H: topics × terms
+        self._A = self._B = None                       # running Wᵀ X and Wᵀ W
+        self.n_batches = 0
+        self.n_documents = 0
+
+    def _init(self, X: sp.csr_matrix):
+        scale = np.sqrt(X.sum() / (X.shape[0] * X.shape[1] * self.n_topics))
+        self.components = self.rng.random((self.n_topics, X.shape[1])) * scale + _EPS
+        self._A = np.zeros_like(self.components)
+        self._B = np.zeros((self.n_topics, self.n_topics))
+
+    def transform(self, X: sp.csr_matrix) -> np.ndarray:
+        """Topic weights ``W`` of each row with the topics held fixed."""
+        H = self.components
+        XHt = np.asarray(X @ H.T)
+        HHt = H @ H.T
+        W = np.full((X.shape[0], self.n_topics), np.sqrt(max(XHt.mean(), _EPS) / self.n_topics))
+        for _ in range(self.inner_iter):
+            W *= XHt / (W @ HHt + _EPS)
+        return W
+
+    def partial_fit(self, X: sp.csr_matrix) -> "TopicModel":
+        """Update the topics with one batch of rows."""
+        if X.shape[0] == 0:
+            return self
+        if self.components is None:
+            self._init(X)
+        W = self.transform(X)
+        self._A = self.forget * self._A + np.asarray((X.T @ W).T)
+        self._B = self.forget * self._B + W.T @ W
+        for _ in range(3):
+            self.components *= self._A / (self._B @ self.components + _EPS)
+        self.n_batches += 1
+        self.n_documents += X.shape[0]
+        return self
+
+    def fit(self, X: sp.csr_matrix, epochs: int = 5) -> "TopicModel":
+        """``epochs`` shuffled passes of ``partial_fit`` over the rows."""
+        X = sp.csr_matrix(X)
+        for _ in range(epochs):
+            order = self.rng.permutation(X.shape[0])
+            for start in range(0, len(order), self.batch_size):
+                self.partial_fit(X[order[start:start + self.batch_size]])
+        return self
+
+    def loss(self, X: sp.csr_matrix, W: np.ndarray = None) -> float:
+        """Relative reconstruction error ``||X - W H|| / ||X||``."""
+        W = self.transform(X) if W is None else W
+        H = self.components
+        norm = X.multiply(X).sum()
+        cross = np.sum(np.asarray(X @ H.T) * W)
+        fit = np.sum((W.T @ W) * (H @ H.T))
+        return float(np.sqrt(max(norm - 2 * cross + fit, 0) / norm)) if norm else 0.0
+
+    def top_terms(self, terms: list, k: int = 10) -> list[list[str]]:
+        return [[terms[j] for j in np.argsort(-row, kind="stable")[:k]] for row in self.components]
+
+
+def representatives(W: np.ndarray, k: int = 3) -> list[np.ndarray]:
+    """Rows with the largest share of each topic, among rows whose dominant topic it is."""
+    share = W / np.maximum(W.sum(axis=1, keepdims=True), _EPS)
+    dominant = W.argmax(axis=1)
+    out = []
+    for t in range(W.shape[1]):
+        rows = np.flatnonzero((dominant == t) & (W[:, t] > 0))
+        out.append(rows[np.argsort(-share[rows, t], kind="stable")[:k]])
+    return out
+
+
+def main(argv=None):
+    from dataset import load_dataset
+    from jsonio import iter_array
+    from tokens import KEYWORD_STOP_WORDS
+
+    parser = argparse.ArgumentParser(description="Learn topics from posts (and comments).")
+    parser.add_argument("--posts", default="/home/ubuntu/moltbook_posts.json")
+    parser.add_argument("--comments", default="/home/ubuntu/moltbook_data.json",
+                        help="stream comment text through partial_fit (pass '' to skip)")
+    parser.add_argument("--topics", type=int, default=12)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--min-df", type=int, default=5)
+    parser.add_argument("--max-df", type=float, default=0.5)
+    parser.add_argument("--chunk", type=int, default=10_000, help="comments per partial_fit")
+    args = parser.parse_args(argv)
+
+    frame = load_dataset(args.posts).frame
+    start = time.perf_counter()
+    corpus = TokenCorpus.load_or_build(args.posts, frame['text'], n_jobs=-1)
+    keywords = corpus.filter(corpus.vocab_mask(min_len=4, exclude=KEYWORD_STOP_WORDS))
+    tfidf = Tfidf.fit(keywords, args.min_df, args.max_df)
+    X = tfidf.transform(keywords)
+    model = TopicModel(args.topics).fit(X, epochs=args.epochs)
+    print("=" * 60)
+    print("TOPIC MODEL (TF-IDF + minibatch NMF)")
+    print("=" * 60)
+    print(f"\nPosts: {X.shape[0]:,} × {X.shape[1]:,} terms, fitted in {time.perf_counter() - start:.1f}s "
+          f"(relative error {model.loss(X):.3f})")
+
+    if args.comments:
+        start = time.perf_counter()
+        chunk = []
+        for comment in iter_array(args.comments, "comments"):
+            chunk.append(comment.get('content') or '')
+            if len(chunk) == args.chunk:
+                model.partial_fit(tfidf.transform(TokenCorpus.build(chunk)))
+                chunk = []
+        model.partial_fit(tfidf.transform(TokenCorpus.build(chunk)))
+        print(f"Comments: {model.n_documents - X.shape[0] * args.epochs:,} streamed in "
+              f"{time.perf_counter() - start:.1f}s (posts error now {model.loss(X):.3f})")
+
+    W = model.transform(X)
+    dominant = np.bincount(W.argmax(axis=1)[W.max(axis=1) > 0], minlength=args.topics)
+    for t, (terms, rows) in enumerate(zip(model.top_terms(tfidf.terms, 10), representatives(W))):
+        print(f"\nTopic {t + 1} ({dominant[t]:,} posts): {', '.join(terms)}")
+        for row in rows:
+            print(f"    - {str(frame['title'].iloc[row])[:70]}")
+
+
+if __name__ == "__main__":
+    main()